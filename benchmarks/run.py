@@ -0,0 +1,189 @@
+"""
+Бенчмарки парсера, анализатора и визуализатора
+
+Пример:
+    python -m benchmarks.run --rows 100000                  # сравнение с базой
+    python -m benchmarks.run --rows 100000 --update-baseline
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Callable, Dict
+
+from benchmarks.synthetic import write_csv
+from src.analyzer import LearningAnalyzer
+from src.parser import LogParser
+from src.streaming import StreamingAggregator
+from src.visualizer import render_reports
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Импорт CLI в чистом интерпретаторе: время, память и загружен ли matplotlib
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+from src.metrics import peak_memory_mb
+print(json.dumps({
+    "seconds": seconds,
+    "peak_mb": peak_memory_mb() or 0.0,
+    "matplotlib": "matplotlib" in sys.modules,
+}))
+"""
+
+
+def measure(func: Callable, repeat: int) -> Dict:
+    """Лучшее время из repeat запусков и пик выделенной памяти"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 1024**2}
+
+
+def measure_startup(repeat: int) -> Dict:
+    """Стоимость импорта main.py: лучшее время из repeat холодных запусков"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output))
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def run_stages(csv_path: str, workdir: str, repeat: int) -> Dict:
+    """Замеры по этапам конвейера"""
+    parser = LogParser(csv_path)
+    df = parser.parse_frame()
+    results = LearningAnalyzer(df).analyze_all()
+
+    def visualize():
+        # Новая папка на каждый запуск, иначе графики будут пропущены
+        shutil.rmtree(os.path.join(workdir, "plots"), ignore_errors=True)
+        render_reports({os.path.join(workdir, "plots"): results})
+
+    stages = {
+        "parse": parser.parse_frame,
+        "analyze": lambda: LearningAnalyzer(df).analyze_all(),
+        "streaming": lambda: StreamingAggregator()
+        .consume(parser.iter_chunks(100_000))
+        .aggregates(),
+        "visualize": visualize,
+    }
+    current = {"startup": measure_startup(repeat)}
+    current.update({name: measure(func, repeat) for name, func in stages.items()})
+    return current
+
+
+def find_regressions(current: Dict, baseline: Dict, threshold: float) -> list:
+    """Этапы, ставшие медленнее или тяжелее базы более чем на threshold"""
+    regressions = []
+    for stage, metrics in current.items():
+        base = baseline.get(stage)
+        if base is None:
+            continue
+        for key in ("seconds", "peak_mb"):
+            if metrics[key] > base[key] * (1 + threshold):
+                regressions.append(
+                    f"{stage}.{key}: {metrics[key]:.3f} > {base[key]:.3f}"
+                )
+    return regressions
+
+
+def select_baseline(baselines: Dict, rows: int, students: int, seed: int) -> Dict:
+    """Замеры базы для того же размера и тех же параметров генератора.
+
+    ValueError, если такой базы нет: замеры на других данных несравнимы.
+    """
+    entry = baselines.get(str(rows))
+    if entry is None:
+        sizes = ", ".join(sorted(baselines, key=int)) or "нет"
+        raise ValueError(f"нет базы для {rows} строк (есть: {sizes})")
+    if (entry["students"], entry["seed"]) != (students, seed):
+        raise ValueError(
+            f"база для {rows} строк снята с --students {entry['students']} "
+            f"--seed {entry['seed']}"
+        )
+    return entry["stages"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки Learning Path Analyzer")
+    parser.add_argument("--rows", type=int, default=100_000, help="Строк в логах")
+    parser.add_argument(
+        "--students", type=int, help="Студентов (по умолчанию rows/100)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов на этап")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Допустимый рост (0.25 = 25%%)"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    students = args.students or max(args.rows // 100, 10)
+    workdir = tempfile.mkdtemp(prefix="lpa-bench-")
+    try:
+        csv_path = os.path.join(workdir, "logs.csv")
+        print(f"📊 Генерация {args.rows} строк ({students} студентов)...")
+        write_csv(csv_path, args.rows, students=students, seed=args.seed)
+        current = run_stages(csv_path, workdir, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for stage, metrics in current.items():
+        print(
+            f"  {stage:<10} {metrics['seconds']:8.3f} с  {metrics['peak_mb']:8.1f} МБ"
+        )
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+    key = str(args.rows)
+
+    if args.update_baseline:
+        baselines[key] = {"students": students, "seed": args.seed, "stages": current}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"✓ База сохранена в {args.baseline}")
+        return 0
+
+    try:
+        baseline = select_baseline(baselines, args.rows, students, args.seed)
+    except ValueError as e:
+        print(f"❌ Сравнение невозможно: {e} (запустите с --update-baseline)")
+        return 2
+
+    regressions = find_regressions(current, baseline, args.threshold)
+    for line in regressions:
+        print(f"❌ Регрессия: {line}")
+    if not regressions:
+        print("✓ Регрессий нет")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
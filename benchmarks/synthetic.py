@@ -0,0 +1,99 @@
+"""
+Генератор синтетических логов LMS для бенчмарков
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Iterator
+
+# Тип активности: (доля событий, есть ли оценка, средняя длительность, название)
+ACTIVITY_TYPES = {
+    "login": (0.30, False, 3, "Вход в систему"),
+    "resource": (0.20, False, 15, "Материал"),
+    "video": (0.15, False, 25, "Видеолекция"),
+    "forum": (0.12, False, 12, "Обсуждение недели"),
+    "assignment": (0.13, True, 50, "Домашняя работа"),
+    "quiz": (0.10, True, 20, "Тест"),
+}
+# Сдвиг среднего балла по типу активности
+SCORE_EFFECT = {"assignment": -4.0, "quiz": 3.0}
+# Часы с весами: утренний, дневной и вечерний пики
+HOUR_WEIGHTS = np.array(
+    [1, 1, 1, 1, 1, 2, 4, 8, 14, 20, 24, 20, 14, 16, 20, 22, 18]
+    + [14, 16, 22, 26, 20, 10, 4],
+    dtype="float64",
+)
+TERM_START = pd.Timestamp("2024-01-15")
+TERM_DAYS = 112
+
+
+def generate_chunks(
+    rows: int,
+    students: int = 1000,
+    courses: int = 10,
+    seed: int = 42,
+    chunk_size: int = 1_000_000,
+) -> Iterator[pd.DataFrame]:
+    """Детерминированная генерация логов частями по chunk_size строк"""
+    ability = np.random.default_rng(seed).normal(75, 10, size=students)
+    for index, start in enumerate(range(0, rows, chunk_size)):
+        rng = np.random.default_rng([seed, index])
+        yield _chunk(rng, min(chunk_size, rows - start), ability, courses)
+
+
+def write_csv(path: str, rows: int, **kwargs):
+    """Запись синтетического CSV без загрузки всех строк в память"""
+    for index, chunk in enumerate(generate_chunks(rows, **kwargs)):
+        chunk.to_csv(
+            path, mode="w" if index == 0 else "a", header=index == 0, index=False
+        )
+
+
+def _chunk(rng, n: int, ability: np.ndarray, courses: int) -> pd.DataFrame:
+    names = list(ACTIVITY_TYPES)
+    shares = np.array([ACTIVITY_TYPES[t][0] for t in names])
+    type_idx = rng.choice(len(names), size=n, p=shares / shares.sum())
+
+    # Активность студентов неравномерна (Zipf-подобное распределение)
+    student_weights = 1.0 / np.arange(1, len(ability) + 1) ** 0.5
+    student = rng.choice(
+        len(ability), size=n, p=student_weights / student_weights.sum()
+    )
+
+    days = rng.integers(0, TERM_DAYS, size=n)
+    hours = rng.choice(24, size=n, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    seconds = rng.integers(0, 3600, size=n)
+    timestamps = (
+        TERM_START
+        + pd.to_timedelta(days, unit="D")
+        + pd.to_timedelta(hours * 3600 + seconds, unit="s")
+    )
+
+    # Каждый студент учится на трёх соседних курсах
+    course = (student + rng.integers(0, 3, size=n)) % courses
+
+    graded = np.array([ACTIVITY_TYPES[t][1] for t in names])[type_idx]
+    effect = np.array([SCORE_EFFECT.get(t, 0.0) for t in names])[type_idx]
+    scores = np.clip(np.rint(ability[student] + effect + rng.normal(0, 8, n)), 0, 100)
+    # Часть оцениваемых работ ещё не проверена
+    missing = ~graded | (rng.random(n) < 0.05)
+
+    mean_duration = np.array([ACTIVITY_TYPES[t][2] for t in names])[type_idx]
+    durations = rng.poisson(mean_duration)
+    activity_names = (
+        np.array([ACTIVITY_TYPES[t][3] for t in names], dtype=object)[type_idx]
+        + " "
+        + (days // 7 + 1).astype(str)
+    )
+
+    return pd.DataFrame(
+        {
+            "student_id": student + 1,
+            "activity_type": np.array(names, dtype=object)[type_idx],
+            "activity_name": activity_names,
+            "timestamp": timestamps,
+            "duration_minutes": durations,
+            "score": np.where(missing, np.nan, scores),
+            "course_id": np.char.add("C", (course + 101).astype(str)),
+        }
+    )
@@ -4,18 +4,280 @@ Learning Path Analyzer - простой запуск
 """
 
 import argparse
-import json
 import os
 from src.parser import LogParser
 from src.analyzer import LearningAnalyzer
-from src.visualizer import ResultVisualizer
+from src.visualizer import PLOT_FORMATS, ResultVisualizer, render_reports
+from src.streaming import StreamingAggregator, ingest_incremental
+from src.metrics import collector, env_flag, peak_memory_mb
+from src.cache import ParsedLogCache
+from src.filters import LogFilter
+from src.partitioned import analyze_partitioned
+from src.server import DEFAULT_PORT, Dataset, serve
+from src.sketches import SketchAggregator
+from src.sources import MultiFileParser, expand_inputs, ingest_files, is_compressed
+from src.student_index import StudentIndex, analyze_student_frame
+from src.validation import QUARANTINE_FILE, Quarantine
+from src.writers import TABLE_FORMATS, write_json, write_tables
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def analyze_in_memory(parser, n_clusters=None):
+    """Чтение всех данных в память и анализ"""
+    print("📊 Чтение данных...")
+    with collector.stage("parse"):
+        df = parser.parse_frame()
+    
+    if df.empty:
+        return None, None
+    
+    print(f"✓ Прочитано {len(df)} записей")
+    
+    print("\n🔍 Анализ данных...")
+    with collector.stage("analyze", rows=len(df)):
+        analyzer = LearningAnalyzer(df, n_clusters=n_clusters)
+        return analyzer, analyzer.analyze_all()
+
+
+def analyze_streaming(parser, chunk_size):
+    """Потоковый анализ частями по chunk_size строк"""
+    print(f"📊 Потоковое чтение данных (по {chunk_size} строк)...")
+    with collector.stage("parse_and_aggregate"):
+        if isinstance(parser, MultiFileParser):
+            aggregator = parser.aggregate(chunk_size)
+        else:
+            aggregator = StreamingAggregator().consume(parser.iter_chunks(chunk_size))
+    
+    if aggregator.rows == 0:
+        return None, None
+    
+    print(f"✓ Прочитано {aggregator.rows} записей")
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"✓ Пиковая память: {peak:.1f} МБ")
+    
+    print("\n🔍 Анализ данных...")
+    analyzer = LearningAnalyzer.from_aggregates(aggregator.aggregates())
+    return analyzer, analyzer.analyze_all()
+
+
+def analyze_approximate(parser, chunk_size):
+    """Приближённый потоковый анализ: память не зависит от числа студентов"""
+    print(f"📊 Приближённый анализ (скетчи, части по {chunk_size} строк)...")
+    with collector.stage("parse_and_aggregate"):
+        if isinstance(parser, MultiFileParser):
+            aggregator = parser.aggregate(chunk_size, aggregator_cls=SketchAggregator)
+        else:
+            aggregator = SketchAggregator().consume(parser.iter_chunks(chunk_size))
+    
+    if aggregator.rows == 0:
+        return None, None
+    
+    print(f"✓ Прочитано {aggregator.rows} записей, "
+          f"студентов ≈ {aggregator.distinct_students.estimate()}")
+    
+    print("\n🔍 Анализ данных...")
+    analyzer = LearningAnalyzer.from_aggregates(aggregator.aggregates())
+    results = analyzer.analyze_all()
+    results["approximation"] = aggregator.approximation()
+    sample = results["approximation"]["student_performance"]
+    if not sample["exact"]:
+        print(f"⚠ Успеваемость студентов — по выборке из "
+              f"{sample['sampled_students']} студентов (лучшие — среди выборки)")
+    return analyzer, results
+
+
+def analyze_incremental(parser, state_path, chunk_size):
+    """Анализ только новых строк (файлов) с сохранённым состоянием агрегатов"""
+    print("📊 Инкрементальное чтение данных...")
+    ingest = ingest_files if isinstance(parser, MultiFileParser) else ingest_incremental
+    with collector.stage("parse_and_aggregate"):
+        aggregator, new_rows = ingest(parser, state_path, chunk_size)
+    
+    if aggregator.rows == 0:
+        return None, None
+    
+    print(f"✓ Новых записей: {new_rows}, всего: {aggregator.rows}")
+    
+    print("\n🔍 Анализ данных...")
+    analyzer = LearningAnalyzer.from_aggregates(aggregator.aggregates())
+    return analyzer, analyzer.analyze_all()
+
+
+def analyze_by_partition(parser, by, workers, output_dir, plot_format='png',
+                         n_clusters=None):
+    """Параллельный анализ каждой части (например, курса) и общая сводка.
+
+    plot_format=None — без графиков частей.
+    """
+    print("📊 Чтение данных...")
+    with collector.stage("parse"):
+        df = parser.parse_frame()
+    
+    if df.empty:
+        return None, None
+    
+    print(f"\n🔍 Анализ по '{by}' ({workers or os.cpu_count()} процессов)...")
+    with collector.stage("analyze", rows=len(df)):
+        partitioned = analyze_partitioned(df, by=by, workers=workers,
+                                          n_clusters=n_clusters)
+    
+    reports = {}
+    for key, results in partitioned["partitions"].items():
+        part_dir = os.path.join(output_dir, by, safe_name(key))
+        save_results(results, part_dir)
+        reports[part_dir] = results
+    
+    rendered = 0
+    if plot_format is not None:
+        with collector.stage("partition_plots"):
+            rendered = render_reports(reports, plot_format,
+                                      workers or os.cpu_count() or 1)
+    print(f"✓ Частей: {len(reports)}, новых графиков: {rendered}")
+    # Анализаторы частей остаются в процессах пула
+    return None, partitioned["global"]
+
+
+def analyze_student(parser, student_id, output_dir):
+    """Путь одного студента через индекс по student_id"""
+    print(f"📊 Поиск студента {student_id}...")
+    if parser.cache is None:
+        # --no-cache: индекс в .cache не создаётся, поиск по данным в памяти
+        report = analyze_student_frame(parser.parse_frame(), student_id)
+    else:
+        index = StudentIndex.open_or_build(parser, rebuild=parser.cache.rebuild)
+        report = index.analyze_student(student_id) if index is not None else None
+    
+    if report is None:
+        print(f"❌ Студент {student_id} не найден")
+        return
+    
+    path = os.path.join(output_dir, f'student_{student_id}.json')
+    write_json(report, path)
+    
+    comparison = report["comparison"]
+    print(f"✓ Активностей: {comparison['activity_count']} "
+          f"(в среднем по группе {comparison['cohort_avg_activities']:.1f})")
+    print(f"✓ Результат сохранён в {path}")
+
+
+def safe_name(key):
+    """Имя папки для значения ключа разбиения"""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(key))
+
+
+def save_results(results, output_dir):
+    """Запись results.json (компактный JSON)"""
+    write_json(results, os.path.join(output_dir, 'results.json'))
+
+
+def export_tables(analyzer, output_dir, fmt):
+    """Таблицы по студентам, сессиям, переходам... в output_dir/tables/"""
+    if analyzer is None:
+        print("⚠ Таблицы не выгружаются для --by (только results.json частей)")
+        return
+    tables_dir = os.path.join(output_dir, 'tables')
+    paths = write_tables(analyzer.export_tables(), tables_dir, fmt)
+    print(f"✓ Таблицы ({fmt}): {', '.join(paths) or 'нет'} в {tables_dir}/")
+
+
+def make_cache(args):
+    """Кэш разобранных логов согласно --no-cache/--rebuild-cache"""
+    if args.no_cache:
+        return None
+    return ParsedLogCache(rebuild=args.rebuild_cache)
+
+
+def make_parser(args, cache=None, quarantine=None):
+    """Парсер для --input: один CSV или набор файлов (каталог, шаблон, .gz/.zst)"""
+    paths = expand_inputs(args.input)
+    log_filter = make_filter(args)
+    if paths == [args.input] and not is_compressed(args.input):
+        return LogParser(args.input, cache=cache, log_filter=log_filter,
+                         quarantine=quarantine)
+    return MultiFileParser(paths, cache=cache, log_filter=log_filter,
+                           workers=args.workers, quarantine=quarantine)
+
+
+def make_quarantine(args):
+    """Карантин отклонённых строк в папке результатов.
+
+    В --incremental файл дописывается: новые запуски читают только новые строки.
+    """
+    return Quarantine(os.path.join(args.output, QUARANTINE_FILE),
+                      append=args.incremental)
+
+
+def make_filter(args):
+    """Отбор строк и колонок согласно --course/--since/--until/..."""
+    columns = args.columns.split(',') if args.columns else None
+    if not (args.course or args.activity_type or args.since or args.until
+            or columns):
+        return None
+    return LogFilter(courses=args.course, activity_types=args.activity_type,
+                     since=args.since, until=args.until, columns=columns)
 
 
 def main():
     parser = argparse.ArgumentParser(description='Анализ путей обучения студентов')
-    parser.add_argument('--input', required=True, help='CSV файл с логами')
+    parser.add_argument('--input', required=True,
+                        help='CSV файл с логами, каталог или шаблон '
+                             '(поддерживаются .csv.gz и .csv.zst)')
     parser.add_argument('--output', default='results', help='Папка для результатов')
-    parser.add_argument('--student-id', type=int, help='Анализ конкретного студента')
+    parser.add_argument('--student-id', help='Анализ конкретного студента')
+    parser.add_argument('--chunk-size', type=int,
+                        help='Потоковое чтение CSV частями по N строк')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Дочитывать только новые строки файла '
+                             '(состояние хранится в папке результатов)')
+    parser.add_argument('--approximate', action='store_true',
+                        help='Приближённая статистика на скетчах (HyperLogLog, KLL, '
+                             'Misra-Gries) с границами ошибок в results.json')
+    parser.add_argument('--by',
+                        help='Раздельный анализ по колонке (например, course_id)')
+    parser.add_argument('--workers', type=int,
+                        help='Число процессов для --by, разбора нескольких файлов '
+                             'и отрисовки графиков (по умолчанию все ядра)')
+    parser.add_argument('--clusters', type=int, metavar='N',
+                        help='Разбить студентов на N групп со схожим поведением '
+                             '(MiniBatchKMeans, нужен scikit-learn)')
+    parser.add_argument('--plot-format', '--format', choices=PLOT_FORMATS,
+                        default='png',
+                        help='Формат графиков (json — только описания без отрисовки '
+                             'и без загрузки matplotlib)')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='Только results.json, без графиков')
+    parser.add_argument('--export', choices=TABLE_FORMATS,
+                        help='Выгрузка таблиц по студентам, сессиям, переходам и '
+                             'цепочкам: ndjson (строка на запись) или columnar '
+                             '(Parquet при наличии pyarrow, иначе .npy)')
+    parser.add_argument('--course', action='append',
+                        help='Только указанный курс (можно повторять)')
+    parser.add_argument('--activity-type', action='append',
+                        help='Только указанный тип активности (можно повторять)')
+    parser.add_argument('--since', help='Начало периода, например 2024-01-01')
+    parser.add_argument('--until',
+                        help='Конец периода включительно, например 2024-01-31')
+    parser.add_argument('--columns',
+                        help='Дополнительные колонки через запятую '
+                             '(обязательные читаются всегда, остальные пропускаются)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Локальный сервер анализа: данные загружаются один раз '
+                             'и остаются в памяти между запросами')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='Порт сервера на 127.0.0.1')
+    parser.add_argument('--socket', help='Unix-сокет вместо TCP-порта')
+    parser.add_argument('--trace', action='store_true',
+                        help='Записать trace.json (Chrome Trace / speedscope)')
+    parser.add_argument('--trace-alloc', action='store_true',
+                        help='Учитывать пики выделений памяти по этапам (медленнее)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Профиль cProfile в profile.prof')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Не использовать кэш разобранных логов')
+    parser.add_argument('--rebuild-cache', action='store_true',
+                        help='Пересоздать кэш разобранных логов')
     
     args = parser.parse_args()
     
@@ -24,32 +286,93 @@ def main():
     # СОЗДАЁМ ПАПКУ ДЛЯ РЕЗУЛЬТАТОВ
     os.makedirs(args.output, exist_ok=True)
     
-    # 1. Парсинг данных
-    print("📊 Чтение данных...")
-    parser = LogParser(args.input)
-    logs = parser.parse()
+    # Замеры этапов пишутся в metrics.json (кроме --serve); трассу, учёт выделений
+    # и cProfile можно включить и без флагов: LPA_TRACE=1, LPA_TRACE_ALLOC=1,
+    # LPA_PROFILE=1
+    if args.serve:
+        # Сервер работает долго: замеры всех запросов копились бы в памяти
+        collector.enabled = False
+    else:
+        collector.enable(
+            track_allocations=args.trace_alloc or env_flag('LPA_TRACE_ALLOC'))
+    profiler = None
+    if args.profile or env_flag('LPA_PROFILE'):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
     
-    if not logs:
-        print("❌ Нет данных для анализа")
+    try:
+        with collector.stage("total"):
+            run(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(args.output, 'profile.prof'))
+        collector.write_json(os.path.join(args.output, 'metrics.json'))
+        if args.trace or env_flag('LPA_TRACE'):
+            collector.write_trace(os.path.join(args.output, 'trace.json'))
+
+
+def run(args):
+    """Выбранный режим анализа, сохранение результатов и графиков"""
+    if args.serve:
+        serve({'default': Dataset(make_parser(args, make_cache(args)),
+                                  n_clusters=args.clusters)},
+              port=args.port, socket_path=args.socket)
         return
     
-    print(f"✓ Прочитано {len(logs)} записей")
+    quarantine = make_quarantine(args)
+    if args.student_id is not None:
+        analyze_student(make_parser(args, make_cache(args), quarantine),
+                        args.student_id, args.output)
+        quarantine.report()
+        return
     
-    # 2. Анализ
-    print("\n🔍 Анализ данных...")
-    analyzer = LearningAnalyzer(logs)
-    results = analyzer.analyze_all()
+    # 1-2. Парсинг и анализ
+    if args.incremental:
+        state_path = os.path.join(args.output, 'aggregate_state.json')
+        analyzer, results = analyze_incremental(
+            make_parser(args, quarantine=quarantine), state_path,
+            args.chunk_size or DEFAULT_CHUNK_SIZE)
+    elif args.approximate:
+        analyzer, results = analyze_approximate(
+            make_parser(args, quarantine=quarantine),
+            args.chunk_size or DEFAULT_CHUNK_SIZE)
+    elif args.chunk_size:
+        analyzer, results = analyze_streaming(
+            make_parser(args, quarantine=quarantine), args.chunk_size)
+    elif args.by:
+        plot_format = None if args.no_plots else args.plot_format
+        analyzer, results = analyze_by_partition(
+            make_parser(args, make_cache(args), quarantine), args.by, args.workers,
+            args.output, plot_format, args.clusters)
+    else:
+        analyzer, results = analyze_in_memory(
+            make_parser(args, make_cache(args), quarantine), args.clusters)
+    # Доли ошибок проверки строк — в metrics.json, строки — в quarantine.csv
+    quarantine.report()
+
+    if results is None:
+        print("❌ Нет данных для анализа")
+        return
     
     # 3. Сохранение результатов
-    with open(os.path.join(args.output, 'results.json'), 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, default=str)
+    with collector.stage("save_results"):
+        save_results(results, args.output)
     
     print("✓ Результаты сохранены")
     
+    if args.export:
+        with collector.stage("export_tables"):
+            export_tables(analyzer, args.output, args.export)
+    
     # 4. Визуализация
-    print("\n📈 Создание графиков...")
-    visualizer = ResultVisualizer(results)
-    visualizer.create_plots(args.output)
+    if not args.no_plots:
+        print("\n📈 Создание графиков...")
+        with collector.stage("plots"):
+            visualizer = ResultVisualizer(results, fmt=args.plot_format,
+                                          workers=args.workers or os.cpu_count() or 1)
+            visualizer.create_plots(args.output)
     
     print("\n✅ Анализ завершен!")
     print(f"Результаты в папке: {args.output}")
@@ -1,8 +1,29 @@
 # src/__init__.py
-from .parser import LogParser
-from .analyzer import (
-    LearningAnalyzer,
-)  # Измените LearningPathAnalyzer на LearningAnalyzer
-from .visualizer import ResultVisualizer
+"""
+Learning Path Analyzer
 
-__all__ = ["LogParser", "LearningAnalyzer", "ResultVisualizer"]
+Классы загружаются при первом обращении (PEP 562): `import src.parser`
+не тянет matplotlib, а `from src import ResultVisualizer` работает как прежде.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "LogParser": ".parser",
+    "LearningAnalyzer": ".analyzer",
+    "ResultVisualizer": ".visualizer",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -2,88 +2,361 @@
 Анализатор путей обучения
 """
 
+import math
+
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .clustering import (
+    activity_mix,
+    cluster_advice,
+    cluster_students,
+    cluster_summary,
+    overall_profile,
+    student_features,
+)
+from .metrics import collector, timed
+from .schema import WEEKDAYS
+from .sequences import EventSequence, frequent_paths, transition_matrix
+from .trends import (
+    WINDOW_DAYS,
+    cohort_table,
+    daily_table,
+    rolling_windows,
+    trend_summary,
+    trend_table,
+)
+from .sessions import (
+    DEFAULT_GAP_MINUTES,
+    assign_sessions,
+    session_summary,
+    session_table,
+)
+
+# Длины цепочек активностей и число самых частых цепочек в отчёте
+PATH_LENGTHS = (3, 4)
+TOP_PATHS = 10
+# Цепочка попадает в рекомендации, если её прошли хотя бы столько студентов
+MIN_PATH_STUDENTS = 2
+
+
+def _rows(analyzer: "LearningAnalyzer") -> int:
+    return len(analyzer.df)
 
 
 class LearningAnalyzer:
-    def __init__(self, logs: List[Dict]):
+    def __init__(
+        self,
+        logs: Union[pd.DataFrame, List[Dict]],
+        session_gap_minutes: float = DEFAULT_GAP_MINUTES,
+        n_clusters: Optional[int] = None,
+    ):
         self.logs = logs
-        self.df = pd.DataFrame(logs)
+        self.session_gap_minutes = session_gap_minutes
+        # Кластеризация (и загрузка scikit-learn) только по запросу
+        self.n_clusters = n_clusters
+        # DataFrame от LogParser.parse_frame() используется без копирования
+        self.df = logs if isinstance(logs, pd.DataFrame) else pd.DataFrame(logs)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._df
+
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        self._df = value
+        self.invalidate()
 
+    def invalidate(self):
+        """Сброс кэша агрегатов (вызывать после изменения self.df на месте)"""
+        self._tables: Dict = {}
+
+    @classmethod
+    def from_aggregates(cls, tables: Dict) -> "LearningAnalyzer":
+        """Анализатор поверх готовых агрегатов вместо сырых логов"""
+        analyzer = cls(pd.DataFrame())
+        analyzer._tables = dict(tables)
+        return analyzer
+
+    @timed("analyzer.analyze_all", rows=_rows)
     def analyze_all(self) -> Dict:
         """Выполнение всех анализов"""
-        return {
+        results = {
             "basic_stats": self.get_basic_stats(),
             "student_performance": self.analyze_student_performance(),
             "activity_effectiveness": self.analyze_activity_effectiveness(),
             "time_patterns": self.analyze_time_patterns(),
-            "recommendations": self.generate_recommendations(),
+            "trends": self.analyze_trends(),
+            "sessions": self.analyze_sessions(),
+            "learning_paths": self.analyze_learning_paths(),
+        }
+        if self.n_clusters:
+            results["clusters"] = self.analyze_clusters()
+        results["recommendations"] = self.generate_recommendations()
+        return results
+
+    def export_tables(self) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Табличные данные отчёта по одной строке на сущность.
+
+        Таблицы строятся по одной по мере запроса, чтобы их можно было
+        сразу записывать (writers.write_tables). Таблицы, которых нет у
+        анализатора поверх агрегатов (сессии, переходы), пропускаются.
+        """
+        students = self._table("students")
+        if students is not None:
+            yield "students", students.rename(
+                columns={"score": "avg_score"}
+            ).reset_index()
+
+        activities = self._table("activities")
+        if activities is not None:
+            yield "activities", activities.reset_index()
+
+        transitions = self._table("transitions")
+        if transitions is not None:
+            counts = transitions.stack()
+            yield "transitions", counts[counts > 0].rename("count").reset_index()
+
+        paths = self._table("paths")
+        if paths:
+            yield "paths", pd.DataFrame(paths).assign(
+                path=lambda frame: frame["path"].str.join(" → ")
+            )
+
+        sessions = self._table("sessions")
+        if sessions is not None:
+            sequence = self._table("sequence")
+            yield "sessions", sessions.assign(
+                student=sequence.student_ids[sessions["student"].to_numpy()]
+            ).rename(columns={"student": "student_id"})
+
+        daily = self._table("daily")
+        if daily is not None:
+            yield "trends", trend_table(daily, self._table("windows")).reset_index()
+
+        cohorts = self._table("cohorts")
+        if cohorts is not None:
+            yield "cohorts", cohorts.reset_index()
+
+        clusters = self._table("clusters")
+        if clusters is not None:
+            features = self._table("student_features")
+            codes = features.index.to_numpy()
+            yield "clusters", features.assign(cluster=clusters["labels"]).reset_index(
+                drop=True
+            ).assign(student_id=self._table("sequence").student_ids[codes])[
+                ["student_id", "cluster"] + list(features.columns)
+            ]
+
+    def _table(self, name: str):
+        """Агрегат по имени; каждый groupby считается один раз и кэшируется"""
+        if name not in self._tables:
+            with collector.stage(f"analyzer.build_{name}", rows=len(self.df)):
+                self._tables[name] = getattr(self, f"_build_{name}")()
+        return self._tables[name]
+
+    def _build_summary(self) -> Dict:
+        # Число студентов берём из уже сгруппированной таблицы, если она есть
+        students = self._table("students")
+        return {
+            "rows": len(self.df),
+            "students": (
+                len(students)
+                if students is not None
+                else self.df["student_id"].nunique()
+            ),
+            "start": self.df["timestamp"].min(),
+            "end": self.df["timestamp"].max(),
         }
 
+    def _build_student_weight(self) -> Optional[float]:
+        """Студентов на строку таблицы students; None — таблица полная"""
+        return None
+
+    def _build_scores(self) -> Optional[pd.Series]:
+        """Оценки в float64 без пропусков pd.NA (numpy-операции быстрее)"""
+        if "score" not in self.df.columns:
+            return None
+        return self.df["score"].astype("float64", copy=False)
+
+    def _build_score_stats(self) -> Optional[Dict]:
+        if "score" not in self.df.columns:
+            return None
+
+        scores = self._table("scores").dropna()
+        if len(scores) == 0:
+            return None
+
+        return {
+            "avg": float(scores.mean()),
+            "max": float(scores.max()),
+            "min": float(scores.min()),
+            "std": float(scores.std()),
+        }
+
+    def _build_students(self) -> Optional[pd.DataFrame]:
+        if "score" not in self.df.columns:
+            return None
+
+        return (
+            self.df[["student_id", "activity_type"]]
+            .assign(score=self._table("scores"))
+            .groupby("student_id")
+            .agg({"score": "mean", "activity_type": "count"})
+            .rename(columns={"activity_type": "activity_count"})
+        )
+
+    def _build_activities(self) -> Optional[pd.DataFrame]:
+        if "score" not in self.df.columns:
+            return None
+
+        activity_scores = (
+            self._table("scores")
+            .groupby(self.df["activity_type"], observed=True)
+            .agg(["mean", "count", "std"])
+        )
+        activity_scores.columns = ["avg_score", "count", "std_score"]
+        return activity_scores
+
+    def _build_hourly(self) -> Optional[pd.Series]:
+        if "hour" not in self.df.columns:
+            return None
+        return self.df["hour"].value_counts().sort_index()
+
+    def _build_weekday(self) -> Optional[pd.Series]:
+        if "day_of_week" not in self.df.columns:
+            return None
+        return self.df["day_of_week"].value_counts()
+
+    def _build_daily(self) -> Optional[pd.DataFrame]:
+        # По дням и разрезам; у потоковых агрегатов таблица приходит готовой
+        if self.df.empty or "timestamp" not in self.df.columns:
+            return None
+        return daily_table(self.df)
+
+    def _build_windows(self) -> Optional[pd.DataFrame]:
+        daily = self._table("daily")
+        if daily is None:
+            return None
+        return rolling_windows(daily, WINDOW_DAYS)
+
+    def _build_cohorts(self) -> Optional[pd.DataFrame]:
+        if self.df.empty or "timestamp" not in self.df.columns:
+            return None
+        return cohort_table(self.df)
+
+    def _build_sequence(self) -> Optional[EventSequence]:
+        # Порядок событий есть только у сырых логов, не у готовых агрегатов
+        if self.df.empty or "timestamp" not in self.df.columns:
+            return None
+        return EventSequence(self.df)
+
+    def _build_transitions(self) -> Optional[pd.DataFrame]:
+        sequence = self._table("sequence")
+        if sequence is None:
+            return None
+        return transition_matrix(sequence)
+
+    def _build_paths(self) -> Optional[List[Dict]]:
+        sequence = self._table("sequence")
+        if sequence is None:
+            return None
+        return [
+            dict(path, length=n)
+            for n in PATH_LENGTHS
+            for path in frequent_paths(sequence, n, TOP_PATHS)
+        ]
+
+    def _build_session_ids(self):
+        sequence = self._table("sequence")
+        if sequence is None:
+            return None
+        return assign_sessions(sequence, self.session_gap_minutes)
+
+    def _build_sessions(self) -> Optional[pd.DataFrame]:
+        session_ids = self._table("session_ids")
+        if session_ids is None:
+            return None
+        return session_table(self._table("sequence"), session_ids)
+
+    def _build_student_features(self) -> Optional[pd.DataFrame]:
+        sequence = self._table("sequence")
+        if sequence is None:
+            return None
+        return student_features(sequence, self._table("sessions"))
+
+    def _build_activity_mix(self):
+        features = self._table("student_features")
+        if features is None:
+            return None
+        return activity_mix(self._table("sequence"))[features.index.to_numpy()]
+
+    def _build_clusters(self) -> Optional[Dict]:
+        """Номера кластеров и центры; считаются один раз на анализатор"""
+        if not self.n_clusters:
+            return None
+        features = self._table("student_features")
+        if features is None or len(features) < 2:
+            return None
+        return cluster_students(features, self._table("activity_mix"), self.n_clusters)
+
+    @timed("analyzer.get_basic_stats", rows=_rows)
     def get_basic_stats(self) -> Dict:
         """Базовая статистика"""
+        summary = self._table("summary")
         stats = {
-            "total_activities": len(self.df),
-            "total_students": self.df["student_id"].nunique(),
+            "total_activities": summary["rows"],
+            "total_students": summary["students"],
             "date_range": {
-                "start": self.df["timestamp"].min().strftime("%Y-%m-%d"),
-                "end": self.df["timestamp"].max().strftime("%Y-%m-%d"),
+                "start": summary["start"].strftime("%Y-%m-%d"),
+                "end": summary["end"].strftime("%Y-%m-%d"),
             },
-            "avg_activities_per_student": (
-                len(self.df) / self.df["student_id"].nunique()
-            ),
+            "avg_activities_per_student": (summary["rows"] / summary["students"]),
         }
 
-        if "score" in self.df.columns:
-            scores = self.df["score"].dropna()
-            if len(scores) > 0:
-                stats["score_stats"] = {
-                    "avg": float(scores.mean()),
-                    "max": float(scores.max()),
-                    "min": float(scores.min()),
-                    "std": float(scores.std()),
-                }
+        score_stats = self._table("score_stats")
+        if score_stats is not None:
+            stats["score_stats"] = dict(score_stats)
 
         return stats
 
+    @timed("analyzer.analyze_student_performance", rows=_rows)
     def analyze_student_performance(self) -> Dict:
         """Анализ успеваемости студентов"""
-        if "score" not in self.df.columns:
+        student_scores = self._table("students")
+        if student_scores is None:
             return {}
 
-        student_scores = (
-            self.df.groupby("student_id")
-            .agg({"score": "mean", "activity_type": "count"})
-            .rename(columns={"activity_type": "activity_count"})
+        student_scores = student_scores.assign(
+            performance_level=pd.cut(
+                student_scores["score"],
+                bins=[0, 60, 80, 100],
+                labels=["низкий", "средний", "высокий"],
+            )
         )
 
-        student_scores["performance_level"] = pd.cut(
-            student_scores["score"],
-            bins=[0, 60, 80, 100],
-            labels=["низкий", "средний", "высокий"],
-        )
+        distribution = student_scores["performance_level"].value_counts()
+        weight = self._table("student_weight")
+        if weight is not None:
+            # Таблица студентов — выборка (приближённый режим): доли
+            # выборки пересчитываются на число всех студентов
+            distribution = (distribution * weight).round().astype("int64")
 
         return {
             "top_students": (student_scores.nlargest(5, "score").to_dict("index")),
-            "performance_distribution": (
-                student_scores["performance_level"].value_counts().to_dict()
-            ),
+            "performance_distribution": distribution.to_dict(),
             "correlation_activity_score": float(
                 student_scores["activity_count"].corr(student_scores["score"])
             ),
         }
 
+    @timed("analyzer.analyze_activity_effectiveness", rows=_rows)
     def analyze_activity_effectiveness(self) -> Dict:
         """Анализ эффективности активностей"""
-        if "score" not in self.df.columns:
+        activity_scores = self._table("activities")
+        if activity_scores is None:
             return {}
 
-        activity_scores = self.df.groupby("activity_type").agg(
-            {"score": ["mean", "count", "std"]}
-        )
-
-        activity_scores.columns = ["avg_score", "count", "std_score"]
         activity_scores = activity_scores.reset_index()
         activity_scores["effectiveness_rank"] = activity_scores["avg_score"].rank(
             ascending=False
@@ -91,33 +364,92 @@ class LearningAnalyzer:
 
         return activity_scores.to_dict("records")
 
+    @timed("analyzer.analyze_time_patterns", rows=_rows)
     def analyze_time_patterns(self) -> Dict:
         """Анализ временных паттернов"""
         patterns = {}
 
-        if "hour" in self.df.columns:
-            hourly_counts = self.df["hour"].value_counts().sort_index()
+        hourly_counts = self._table("hourly")
+        if hourly_counts is not None:
             patterns["peak_hours"] = {
                 "hours": hourly_counts.nlargest(3).index.tolist(),
                 "counts": hourly_counts.nlargest(3).values.tolist(),
             }
 
-        if "day_of_week" in self.df.columns:
-            weekday_order = [
-                "Monday",
-                "Tuesday",
-                "Wednesday",
-                "Thursday",
-                "Friday",
-                "Saturday",
-                "Sunday",
-            ]
-            weekday_counts = self.df["day_of_week"].value_counts()
-            weekday_counts = weekday_counts.reindex(weekday_order, fill_value=0)
+        weekday_counts = self._table("weekday")
+        if weekday_counts is not None:
+            weekday_counts = weekday_counts.reindex(WEEKDAYS, fill_value=0)
             patterns["weekday_distribution"] = weekday_counts.to_dict()
 
         return patterns
 
+    @timed("analyzer.analyze_trends", rows=_rows)
+    def analyze_trends(self) -> Dict:
+        """Динамика по дням и неделям в разрезах и кривые когорт"""
+        daily = self._table("daily")
+        if daily is None:
+            return {}
+
+        return trend_summary(
+            daily, self._table("windows"), self._table("cohorts"), WINDOW_DAYS
+        )
+
+    @timed("analyzer.analyze_sessions", rows=_rows)
+    def analyze_sessions(self) -> Dict:
+        """Анализ учебных сессий (события с паузами не длиннее порога)"""
+        sessions = self._table("sessions")
+        if sessions is None:
+            return {}
+
+        return session_summary(
+            self._table("sequence"),
+            self._table("session_ids"),
+            sessions,
+            self.session_gap_minutes,
+        )
+
+    @timed("analyzer.analyze_learning_paths", rows=_rows)
+    def analyze_learning_paths(self) -> Dict:
+        """Анализ последовательностей активностей студентов"""
+        transitions = self._table("transitions")
+        if transitions is None:
+            return {}
+
+        totals = transitions.sum(axis=1)
+        probabilities = transitions.div(totals.where(totals > 0), axis=0).fillna(0.0)
+        counts = transitions.stack()
+        top = counts[counts > 0].nlargest(TOP_PATHS)
+
+        return {
+            "transition_matrix": probabilities.to_dict("index"),
+            "top_transitions": [
+                {
+                    "from": source,
+                    "to": target,
+                    "count": int(count),
+                    "probability": float(probabilities.at[source, target]),
+                }
+                for (source, target), count in top.items()
+            ],
+            "frequent_paths": self._table("paths"),
+        }
+
+    @timed("analyzer.analyze_clusters", rows=_rows)
+    def analyze_clusters(self) -> Dict:
+        """Группы студентов со схожим поведением (MiniBatchKMeans);
+        пусто, если анализатор создан без n_clusters"""
+        clusters = self._table("clusters")
+        if clusters is None:
+            return {}
+
+        return cluster_summary(
+            self._table("sequence").categories,
+            self._table("student_features"),
+            self._table("activity_mix"),
+            clusters,
+        )
+
+    @timed("analyzer.generate_recommendations", rows=_rows)
     def generate_recommendations(self) -> List[Dict]:
         """Генерация рекомендаций"""
         recommendations = []
@@ -153,6 +485,17 @@ class LearningAnalyzer:
                 }
             )
 
+        path_recommendation = self._path_recommendation()
+        if path_recommendation is not None:
+            recommendations.append(path_recommendation)
+
+        best = (
+            max(activity_effectiveness, key=lambda x: x["avg_score"])["activity_type"]
+            if activity_effectiveness
+            else None
+        )
+        recommendations.extend(self._cluster_recommendations(best))
+
         stats = self.get_basic_stats()
         if "score_stats" in stats:
             avg_score = stats["score_stats"]["avg"]
@@ -170,3 +513,60 @@ class LearningAnalyzer:
                 )
 
         return recommendations
+
+    def _cluster_recommendations(self, best_activity: Optional[str]) -> List[Dict]:
+        """Советы группам студентов со средним баллом ниже общего"""
+        summary = self.analyze_clusters()
+        if not summary:
+            return []
+
+        overall = overall_profile(summary)
+        recommendations = []
+        for cluster in summary["clusters"]:
+            if cluster["avg_score"] is None or overall["avg_score"] is None:
+                continue
+            if cluster["avg_score"] >= overall["avg_score"]:
+                continue
+            suggestion = cluster_advice(cluster, overall, best_activity)
+            if suggestion is None:
+                continue
+            cluster_desc = (
+                f'Группа {cluster["cluster"] + 1} ({cluster["students"]} студентов): '
+                f'средний балл {cluster["avg_score"]:.1f} при общем '
+                f'{overall["avg_score"]:.1f}, чаще всего — '
+                f'"{cluster["dominant_activity"]}"'
+            )
+            recommendations.append(
+                {
+                    "type": "cluster",
+                    "title": "Рекомендация для группы студентов",
+                    "description": cluster_desc,
+                    "suggestion": suggestion,
+                    "cluster": cluster["cluster"],
+                }
+            )
+        return recommendations
+
+    def _path_recommendation(self) -> Optional[Dict]:
+        """Цепочка активностей с лучшим средним баллом после неё"""
+        paths = self.analyze_learning_paths().get("frequent_paths") or []
+        candidates = [
+            path
+            for path in paths
+            if path["students"] >= MIN_PATH_STUDENTS
+            and not math.isnan(path["avg_outcome_score"])
+        ]
+        if not candidates:
+            return None
+
+        best = max(candidates, key=lambda x: x["avg_outcome_score"])
+        path_desc = (
+            f'Последовательность "{" → ".join(best["path"])}" '
+            f'приводит к среднему баллу {best["avg_outcome_score"]:.1f}'
+        )
+        return {
+            "type": "path",
+            "title": "Успешный путь обучения",
+            "description": path_desc,
+            "suggestion": "Проходите материалы в этом порядке",
+        }
@@ -0,0 +1,279 @@
+"""
+Дисковый кэш разобранных логов в колоночном бинарном формате
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from .validation import Quarantine
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "learning-path-analyzer")
+DEFAULT_MAX_BYTES = 2 * 1024**3
+# Меняется вместе со схемой, чтобы не читать записи старого формата
+CACHE_VERSION = 5
+_HASH_BLOCK = 1024 * 1024
+# Строки, отклонённые при разборе файла (хранятся рядом с колонками)
+_REJECTED_FILE = "rejected.csv"
+
+
+class ParsedLogCache:
+    """Кэш DataFrame после LogParser: по файлу .npy на колонку + meta.json.
+
+    Запись ищется по пути к файлу и действительна, пока совпадают размер
+    и mtime; содержимое хэшируется только при сохранении и при смене mtime.
+    Числовые колонки и даты читаются через memory-map, строки хранятся
+    как коды + словарь значений. Вместе с колонками хранятся счётчики
+    проверки строк и отклонённые строки, чтобы повторный запуск из кэша
+    сообщал о тех же ошибках. При превышении max_bytes удаляются
+    записи, которые дольше всего не использовались.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        rebuild: bool = False,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.rebuild = rebuild
+
+    @staticmethod
+    def entry_name(filepath: str) -> str:
+        """Имя записи: версия формата и абсолютный путь к файлу"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{CACHE_VERSION}|{os.path.abspath(filepath)}".encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def signature(filepath: str) -> Dict:
+        """Размер и mtime файла: быстрая проверка без чтения содержимого"""
+        st = os.stat(filepath)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    @staticmethod
+    def content_hash(filepath: str) -> str:
+        """Хэш содержимого файла"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def load(
+        self, filepath: str, quarantine: Optional[Quarantine] = None
+    ) -> Optional[pd.DataFrame]:
+        """DataFrame из кэша или None, если записи нет или она устарела.
+
+        quarantine получает сохранённые при разборе счётчики и строки.
+        Повреждённая запись (нет или обрезан файл колонки) считается
+        промахом: store перезапишет её.
+        """
+        if self.rebuild:
+            return None
+
+        entry = os.path.join(self.cache_dir, self.entry_name(filepath))
+        meta_path = os.path.join(entry, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if not self._is_fresh(filepath, meta, meta_path):
+                return None
+            columns = self._load_columns(entry, meta)
+            if quarantine is not None and meta.get("validation"):
+                quarantine.restore(meta["validation"], self._load_rejected(entry))
+            # Отметка использования для вытеснения по LRU
+            os.utime(meta_path)
+        except (OSError, ValueError, EOFError, KeyError):
+            return None
+        # copy=False: колонки остаются отображёнными в память, а не копируются
+        return pd.DataFrame(columns, copy=False)
+
+    def _is_fresh(self, filepath: str, meta: Dict, meta_path: str) -> bool:
+        """Совпадают ли размер и mtime; при другом mtime сверяется хэш"""
+        current = self.signature(filepath)
+        if current["size"] != meta["size"]:
+            return False
+        if current["mtime_ns"] == meta["mtime_ns"]:
+            return True
+        # Файл перезаписан (например, скачан заново): читается целиком
+        # только в этом случае, а при совпадении запоминается новый mtime
+        if self.content_hash(filepath) != meta["hash"]:
+            return False
+        meta.update(current)
+        self._write_meta(meta_path, meta)
+        return True
+
+    @staticmethod
+    def _load_columns(entry: str, meta: Dict) -> Dict:
+        columns = {}
+        for i, col in enumerate(meta["columns"]):
+            # mmap_mode="c": данные читаются лениво, запись не затрагивает файл
+            array = np.load(os.path.join(entry, f"{i}.npy"), mmap_mode="c")
+            if len(array) != meta["rows"]:
+                raise ValueError(f"обрезан файл колонки {col['name']}")
+            columns[col["name"]] = decode_column(array, col)
+        return columns
+
+    @staticmethod
+    def _load_rejected(entry: str) -> Optional[pd.DataFrame]:
+        rejected_path = os.path.join(entry, _REJECTED_FILE)
+        if not os.path.exists(rejected_path):
+            return None
+        return pd.read_csv(rejected_path, dtype=str)
+
+    @staticmethod
+    def _write_meta(meta_path: str, meta: Dict):
+        tmp = f"{meta_path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, meta_path)
+
+    def store(
+        self,
+        filepath: str,
+        df: pd.DataFrame,
+        quarantine: Optional[Quarantine] = None,
+        signature: Optional[Dict] = None,
+    ) -> bool:
+        """Сохранение DataFrame; False, если тип колонки не поддерживается
+        или файл изменился после разбора.
+
+        quarantine — отклонённые при разборе строки (Quarantine с keep=True),
+        signature — результат signature(filepath) до начала разбора.
+        """
+        columns = []
+        arrays = []
+        for name in df.columns:
+            encoded = encode_column(df[name])
+            if encoded is None:
+                return False
+            spec, array = encoded
+            columns.append(dict(spec, name=name))
+            arrays.append(array)
+
+        source = self._source_state(filepath, signature)
+        if source is None:
+            return False
+
+        entry = os.path.join(self.cache_dir, self.entry_name(filepath))
+        tmp = f"{entry}.tmp{os.getpid()}"
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for i, array in enumerate(arrays):
+                np.save(os.path.join(tmp, f"{i}.npy"), array, allow_pickle=False)
+            meta = dict(source, source=filepath, rows=len(df), columns=columns)
+            if quarantine is not None:
+                meta["validation"] = quarantine.state()
+                if quarantine.frames:
+                    pd.concat(quarantine.frames).to_csv(
+                        os.path.join(tmp, _REJECTED_FILE), index=False
+                    )
+            self._write_meta(os.path.join(tmp, "meta.json"), meta)
+
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except OSError:
+            # Кэш необязателен: ошибка записи не должна ломать анализ
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+
+        self._evict(keep=entry)
+        return True
+
+    def _source_state(self, filepath: str, signature: Optional[Dict]):
+        """Размер, mtime и хэш файла или None, если он изменился после разбора"""
+        try:
+            current = self.signature(filepath)
+            if signature is not None and current != signature:
+                return None
+            return dict(current, hash=self.content_hash(filepath))
+        except OSError:
+            return None
+
+    def _evict(self, keep: str):
+        """Удаление давно не использованных записей сверх лимита"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            # Незавершённые записи других процессов не трогаются
+            if ".tmp" in name:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(os.path.join(path, "meta.json"))
+                entries.append((mtime, _dir_size(path), path))
+            except OSError:
+                # Нет meta.json или запись удалена другим процессом
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+
+def encode_column(series: pd.Series):
+    """Колонка в виде (описание, numpy-массив) или None, если тип не поддержан.
+
+    Используется и для файлов кэша, и для передачи колонок через общую память.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories.tolist()
+        if not all(isinstance(v, str) for v in categories):
+            return None
+        spec = {"kind": "category", "categories": categories, "ordered": dtype.ordered}
+        return spec, series.cat.codes.to_numpy()
+
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and (
+        pd.api.types.is_numeric_dtype(dtype)
+    ):
+        # Nullable Int8/Float32: пропуски хранятся как NaN
+        kind = dtype.numpy_dtype.kind
+        store = "float64" if kind in "iu" else dtype.numpy_dtype
+        values = series.to_numpy(dtype=store, na_value=np.nan)
+        return {"kind": "masked", "dtype": dtype.name}, values
+
+    if pd.api.types.is_datetime64_dtype(series) or (
+        pd.api.types.is_numeric_dtype(series) and series.dtype != object
+    ):
+        return {"kind": "array"}, series.to_numpy()
+
+    first = series.dropna().iloc[:1].tolist()
+    if first and type(first[0]) is datetime.date:
+        return {"kind": "date"}, pd.to_datetime(series).to_numpy("datetime64[D]")
+
+    codes, uniques = pd.factorize(series)
+    if not all(isinstance(v, str) for v in uniques):
+        return None
+    return {"kind": "codes", "categories": list(uniques)}, codes
+
+
+def decode_column(array: np.ndarray, spec: Dict):
+    """Обратное преобразование для encode_column"""
+    if spec["kind"] == "category":
+        dtype = pd.CategoricalDtype(spec["categories"], ordered=spec["ordered"])
+        return pd.Categorical.from_codes(array, dtype=dtype)
+    if spec["kind"] == "masked":
+        return pd.array(array, dtype=spec["dtype"])
+    if spec["kind"] == "date":
+        return pd.Series(array).dt.date
+    if spec["kind"] == "codes":
+        categories = pd.Index(spec["categories"], dtype=object)
+        return np.asarray(pd.Categorical.from_codes(array, categories), dtype=object)
+    return array
+
+
+def _dir_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
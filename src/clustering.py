@@ -0,0 +1,252 @@
+"""
+Кластеризация студентов по учебному поведению (MiniBatchKMeans)
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from .sequences import EventSequence
+
+DEFAULT_CLUSTERS = 4
+BATCH_SIZE = 4096
+# Доли активностей (0..1) рядом со стандартизованными признаками (порядка ±2)
+ACTIVITY_MIX_WEIGHT = 2.0
+# Признаки с тяжёлым хвостом берутся в логарифме
+LOG_FEATURES = ("events", "sessions", "avg_session_minutes")
+FEATURE_COLUMNS = [
+    "events",
+    "avg_score",
+    "score_trend",
+    "hour_sin",
+    "hour_cos",
+    "weekend_share",
+    "sessions",
+    "avg_session_minutes",
+]
+
+_NS_PER_HOUR = 3600 * 10**9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+
+def student_features(sequence: EventSequence, sessions: pd.DataFrame) -> pd.DataFrame:
+    """Числовые признаки студента (индекс — код студента EventSequence).
+
+    Все признаки считаются через bincount по кодам студентов: активность,
+    средний балл и его тренд (наклон по порядку оценок), привычное время
+    (среднее направление часа на круге), доля выходных и статистика сессий.
+    """
+    n = len(sequence.student_ids)
+    students = sequence.students
+    events = np.bincount(students, minlength=n).astype("float64")
+
+    scored = ~np.isnan(sequence.scores)
+    score_count = np.bincount(students[scored], minlength=n)
+    score_sum = np.bincount(
+        students[scored], weights=sequence.scores[scored], minlength=n
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_score = score_sum / score_count
+
+    hours = (sequence.timestamps // _NS_PER_HOUR) % 24
+    angle = hours * (2 * math.pi / 24)
+    # 1970-01-01 — четверг: сдвиг на 3 даёт понедельник = 0
+    weekday = (sequence.timestamps // _NS_PER_DAY + 3) % 7
+
+    session_count = np.bincount(sessions["student"], minlength=n).astype("float64")
+    session_minutes = np.bincount(
+        sessions["student"], weights=sessions["minutes"], minlength=n
+    )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frame = pd.DataFrame(
+            {
+                "events": events,
+                "avg_score": avg_score,
+                "score_trend": _score_trend(
+                    students[scored], sequence.scores[scored], n
+                ),
+                "hour_sin": np.bincount(students, np.sin(angle), n) / events,
+                "hour_cos": np.bincount(students, np.cos(angle), n) / events,
+                "weekend_share": np.bincount(students, weekday >= 5, n) / events,
+                "sessions": session_count,
+                "avg_session_minutes": session_minutes / session_count,
+            }
+        )
+    # Студенты, все события которых отброшены при разборе, не участвуют
+    return frame[events > 0]
+
+
+def activity_mix(sequence: EventSequence):
+    """Доли типов активностей студента: разреженная матрица студент × тип"""
+    from scipy import sparse
+
+    n = len(sequence.student_ids)
+    counts = sparse.csr_matrix(
+        (
+            np.ones(len(sequence)),
+            (sequence.students, sequence.activities),
+        ),
+        shape=(n, len(sequence.categories)),
+    )
+    counts.sum_duplicates()
+    events = np.asarray(counts.sum(axis=1)).ravel()
+    return sparse.diags(1 / np.maximum(events, 1)) @ counts
+
+
+def cluster_students(
+    features: pd.DataFrame, mix, n_clusters: int = DEFAULT_CLUSTERS, seed: int = 0
+) -> Dict:
+    """Номер кластера для каждого студента и центры кластеров.
+
+    Признаки стандартизуются, доли активностей добавляются разреженным
+    блоком; MiniBatchKMeans обучается мини-пакетами по BATCH_SIZE строк,
+    поэтому время почти линейно по числу студентов.
+    """
+    from scipy import sparse
+    from sklearn.cluster import MiniBatchKMeans
+
+    dense = features[FEATURE_COLUMNS].copy()
+    for column in LOG_FEATURES:
+        dense[column] = np.log1p(dense[column])
+    # Студенты без оценок и сессий получают средние значения
+    dense = dense.fillna(dense.mean()).fillna(0.0)
+    std = dense.std(ddof=0).replace(0, 1)
+    scaled = (dense - dense.mean()) / std
+
+    matrix = sparse.hstack(
+        [sparse.csr_matrix(scaled.to_numpy()), mix * ACTIVITY_MIX_WEIGHT], format="csr"
+    )
+    k = min(n_clusters, matrix.shape[0])
+    model = MiniBatchKMeans(
+        n_clusters=k,
+        batch_size=BATCH_SIZE,
+        n_init=3,
+        random_state=seed,
+    )
+    labels = model.fit_predict(matrix)
+    return {
+        "labels": labels,
+        "centroids": model.cluster_centers_,
+        "inertia": float(model.inertia_),
+    }
+
+
+def cluster_summary(categories, features: pd.DataFrame, mix, clusters: Dict) -> Dict:
+    """Размер кластеров и средние исходные признаки в понятных единицах"""
+    from scipy import sparse
+
+    labels = clusters["labels"]
+    k = len(clusters["centroids"])
+    sizes = np.bincount(labels, minlength=k)
+    membership = sparse.csr_matrix(
+        (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+        shape=(k, len(labels)),
+    )
+    mix_means = (membership @ mix).toarray() / np.maximum(sizes, 1)[:, None]
+    means = features.groupby(labels).mean().reindex(range(k))
+
+    result = []
+    for cluster in range(k):
+        row = means.loc[cluster]
+        shares = dict(zip(categories, mix_means[cluster].tolist()))
+        result.append(
+            {
+                "cluster": cluster,
+                "students": int(sizes[cluster]),
+                "share": float(sizes[cluster] / len(labels)),
+                "avg_score": _number(row["avg_score"]),
+                "score_trend": _number(row["score_trend"]),
+                "avg_events": _number(row["events"]),
+                "avg_sessions": _number(row["sessions"]),
+                "avg_session_minutes": _number(row["avg_session_minutes"]),
+                "typical_hour": _typical_hour(row["hour_sin"], row["hour_cos"]),
+                "weekend_share": _number(row["weekend_share"]),
+                "activity_mix": shares,
+                "dominant_activity": max(shares, key=shares.get),
+            }
+        )
+    return {
+        "n_clusters": k,
+        "features": FEATURE_COLUMNS + [f"mix_{name}" for name in categories],
+        "inertia": clusters["inertia"],
+        "clusters": result,
+    }
+
+
+def cluster_advice(
+    cluster: Dict, overall: Dict, best_activity: Optional[str]
+) -> Optional[str]:
+    """Совет группе с баллом ниже среднего: первое подходящее правило"""
+    if cluster["score_trend"] is not None and cluster["score_trend"] < 0:
+        return "Баллы снижаются: повторите пройденный материал перед новыми заданиями"
+    if best_activity is not None and cluster["activity_mix"].get(
+        best_activity, 0
+    ) < overall["activity_mix"].get(best_activity, 0):
+        return f'Добавьте в план активность "{best_activity}"'
+    if _below(cluster, overall, "avg_session_minutes"):
+        return "Занимайтесь более длинными сессиями без перерывов"
+    if _below(cluster, overall, "avg_sessions"):
+        return "Занимайтесь чаще: больше коротких учебных сессий"
+    return None
+
+
+def overall_profile(summary: Dict) -> Dict:
+    """Средние по всем студентам (взвешенные по размеру кластеров)"""
+    clusters = summary["clusters"]
+    weights = np.array([c["share"] for c in clusters])
+    profile = {}
+    for key in ("avg_score", "avg_sessions", "avg_session_minutes"):
+        values = np.array([np.nan if c[key] is None else c[key] for c in clusters])
+        known = ~np.isnan(values)
+        profile[key] = (
+            float(np.average(values[known], weights=weights[known]))
+            if known.any() and weights[known].sum() > 0
+            else None
+        )
+    names = clusters[0]["activity_mix"] if clusters else {}
+    profile["activity_mix"] = {
+        name: float(sum(c["share"] * c["activity_mix"][name] for c in clusters))
+        for name in names
+    }
+    return profile
+
+
+def _score_trend(students: np.ndarray, scores: np.ndarray, n: int) -> np.ndarray:
+    """Наклон прямой «балл ~ номер оценки» по каждому студенту (МНК)"""
+    if len(students) == 0:
+        return np.full(n, np.nan)
+
+    first = np.r_[True, students[1:] != students[:-1]]
+    index = np.arange(len(students))
+    t = index - np.maximum.accumulate(np.where(first, index, 0))
+    count = np.bincount(students, minlength=n)
+    sum_t = np.bincount(students, t, n)
+    sum_y = np.bincount(students, scores, n)
+    sum_tt = np.bincount(students, t * t, n)
+    sum_ty = np.bincount(students, t * scores, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denominator = sum_tt - sum_t * sum_t / count
+        slope = (sum_ty - sum_t * sum_y / count) / denominator
+    # Одна оценка — тренда нет
+    return np.where(denominator > 0, slope, np.nan)
+
+
+def _typical_hour(sin: float, cos: float) -> Optional[float]:
+    if np.isnan(sin) or np.isnan(cos) or (sin == 0 and cos == 0):
+        return None
+    return round(math.atan2(sin, cos) * 24 / (2 * math.pi) % 24, 2)
+
+
+def _below(cluster: Dict, overall: Dict, key: str) -> bool:
+    return (
+        cluster[key] is not None
+        and overall[key] is not None
+        and cluster[key] < overall[key]
+    )
+
+
+def _number(value) -> Optional[float]:
+    return None if pd.isna(value) else float(value)
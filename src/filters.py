@@ -0,0 +1,97 @@
+"""
+Отбор строк и колонок логов при чтении (--course, --since/--until и т.д.)
+"""
+
+import json
+
+import pandas as pd
+from typing import Iterable, Optional
+
+from .schema import DERIVED_DTYPES, REQUIRED_COLUMNS
+
+
+class LogFilter:
+    """Условия отбора, которые LogParser применяет к каждой части CSV.
+
+    Лишние колонки не читаются (usecols), строки отсеиваются по курсу и
+    типу активности сразу после чтения части, а по времени — после разбора
+    timestamp, но до вычисления производных колонок.
+    """
+
+    def __init__(
+        self,
+        courses: Optional[Iterable[str]] = None,
+        activity_types: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
+    ):
+        self.courses = sorted(str(c) for c in courses) if courses else None
+        self.activity_types = (
+            sorted(str(a) for a in activity_types) if activity_types else None
+        )
+        self.since = since
+        self.until = until
+        self.columns = list(columns) if columns else None
+
+        self._since = pd.Timestamp(since) if since else None
+        # Дата без времени в --until включает весь день
+        self._until = pd.Timestamp(until) if until else None
+        self._until_whole_day = bool(until) and len(str(until).strip()) <= 10
+        if self._until_whole_day:
+            self._until += pd.Timedelta(days=1)
+
+    def keeps_column(self, name: str) -> bool:
+        """Нужна ли колонка CSV (подходит как usecols для pd.read_csv)"""
+        if self.columns is None or name in REQUIRED_COLUMNS:
+            return True
+        if name == "course_id" and self.courses:
+            return True
+        return name in self.columns
+
+    def filter_raw(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Отбор по курсу и типу активности (до разбора времени)"""
+        mask = None
+        if self.courses:
+            if "course_id" not in df.columns:
+                raise ValueError("Отсутствует колонка: course_id")
+            mask = _and(mask, df["course_id"].astype(str).isin(self.courses))
+        if self.activity_types:
+            mask = _and(mask, df["activity_type"].astype(str).isin(self.activity_types))
+        return df if mask is None else df[mask.to_numpy()]
+
+    def filter_time(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Отбор по интервалу времени (timestamp уже разобран)"""
+        mask = None
+        if self._since is not None:
+            mask = _and(mask, df["timestamp"] >= self._since)
+        if self._until is not None:
+            if self._until_whole_day:
+                mask = _and(mask, df["timestamp"] < self._until)
+            else:
+                mask = _and(mask, df["timestamp"] <= self._until)
+        return df if mask is None else df[mask.to_numpy()]
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Отбор в уже разобранном DataFrame (например, загруженном из кэша)"""
+        df = self.filter_time(self.filter_raw(df))
+        columns = [c for c in df.columns if self.keeps_column(c) or c in DERIVED_DTYPES]
+        return df[columns].reset_index(drop=True)
+
+    def key(self) -> str:
+        """Строковое описание условий для ключей кэша и состояния"""
+        return json.dumps(
+            {
+                "courses": self.courses,
+                "activity_types": self.activity_types,
+                "since": self.since,
+                "until": self.until,
+                "columns": self.columns,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+
+
+def _and(mask, condition):
+    return condition if mask is None else mask & condition
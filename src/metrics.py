@@ -0,0 +1,177 @@
+"""
+Замеры этапов конвейера: время, CPU, строки, память
+"""
+
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_mb() -> Optional[float]:
+    """Пиковое потребление памяти процессом (МБ), если доступно"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+def env_flag(name: str) -> bool:
+    """Включение хуков через окружение (LPA_METRICS=1 и т.п.)"""
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+class MetricsCollector:
+    """Сборщик вложенных замеров этапов.
+
+    Выключен по умолчанию, тогда stage() почти ничего не стоит. Учёт
+    выделений памяти (tracemalloc) включается отдельно: он замедляет код.
+    """
+
+    def __init__(self):
+        self.enabled = env_flag("LPA_METRICS")
+        self.track_allocations = env_flag("LPA_TRACE_ALLOC")
+        self.spans: List[Dict] = []
+        self.values: Dict = {}
+        self._stack: List[Dict] = []
+        self._origin = time.perf_counter()
+        if self.enabled:
+            self.enable()
+
+    def enable(self, track_allocations: Optional[bool] = None):
+        self.enabled = True
+        if track_allocations is not None:
+            self.track_allocations = track_allocations
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def reset(self):
+        self.spans = []
+        self.values = {}
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        """Замер блока кода; вложенные этапы сохраняют глубину"""
+        if not self.enabled:
+            yield
+            return
+
+        span = {"name": name, "depth": len(self._stack), "rows": rows}
+        if tracemalloc.is_tracing():
+            # Пик родителя запоминаем до сброса, чтобы не потерять его
+            if self._stack:
+                parent = self._stack[-1]
+                parent["_alloc"] = max(
+                    parent["_alloc"], tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+        span["_alloc"] = 0
+        self._stack.append(span)
+        start_peak = peak_memory_mb()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield span
+        finally:
+            span["start_s"] = start_wall - self._origin
+            span["wall_s"] = time.perf_counter() - start_wall
+            span["cpu_s"] = time.process_time() - start_cpu
+            # ru_maxrss — пик за всю жизнь процесса, поэтому у этапа
+            # записывается, на сколько он поднял этот пик (0 — этап уложился
+            # в память предыдущих); пик процесса — peak_rss_mb в metrics.json
+            if start_peak is not None:
+                span["rss_growth_mb"] = peak_memory_mb() - start_peak
+            self._stack.pop()
+            alloc = span.pop("_alloc")
+            if tracemalloc.is_tracing():
+                alloc = max(alloc, tracemalloc.get_traced_memory()[1])
+                span["alloc_peak_mb"] = alloc / 1024**2
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent["_alloc"] = max(parent["_alloc"], alloc)
+            self.spans.append(span)
+
+    def record(self, key: str, value):
+        """Произвольное значение для metrics.json (счётчики, доли ошибок)"""
+        if self.enabled:
+            self.values[key] = value
+
+    def summary(self) -> Dict:
+        """Сумма времени и число вызовов по имени этапа"""
+        totals: Dict[str, Dict] = {}
+        for span in self.spans:
+            total = totals.setdefault(
+                span["name"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0}
+            )
+            total["calls"] += 1
+            total["wall_s"] += span["wall_s"]
+            total["cpu_s"] += span["cpu_s"]
+        return totals
+
+    def write_json(self, path: str):
+        """metrics.json: этапы в порядке начала, сводка и значения"""
+        report = {
+            "total_wall_s": time.perf_counter() - self._origin,
+            "peak_rss_mb": peak_memory_mb(),
+            "spans": sorted(self.spans, key=lambda s: s["start_s"]),
+            "summary": self.summary(),
+            "values": self.values,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+    def write_trace(self, path: str):
+        """Трасса в формате Chrome Trace Event (chrome://tracing, speedscope)"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span["name"],
+                "ph": "X",
+                "ts": span["start_s"] * 1e6,
+                "dur": span["wall_s"] * 1e6,
+                "pid": pid,
+                "tid": 0,
+                "args": {
+                    k: v
+                    for k, v in span.items()
+                    if k in ("rows", "cpu_s", "rss_growth_mb", "alloc_peak_mb")
+                },
+            }
+            for span in self.spans
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Общий сборщик процесса: модули отмечают этапы, main.py пишет отчёт
+collector = MetricsCollector()
+
+
+def timed(name: str, rows: Optional[Callable] = None):
+    """Декоратор замера метода; rows(self) — число обрабатываемых строк"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not collector.enabled:
+                return func(self, *args, **kwargs)
+            with collector.stage(name, rows=rows(self) if rows else None):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -3,55 +3,408 @@
 Парсер логов LMS
 """
 
+import io
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
-from typing import List, Dict
+from pandas.io.common import get_handle
+from typing import Deque, Iterator, List, Dict, Optional, Union
+
+from .cache import ParsedLogCache
+from .filters import LogFilter
+from .metrics import collector
+from .schema import CSV_DTYPES, DERIVED_DTYPES, READ_DTYPES, REQUIRED_COLUMNS
+from .validation import Quarantine, bad_line_frame, validate_frame
+
+# Размер части при чтении с фильтрами: отсеянные строки не копятся в памяти
+FILTER_CHUNK_SIZE = 1_000_000
+# Метка строки с неверным числом полей при чтении python-движком: строка
+# остаётся на своём месте, и номера следующих строк не сдвигаются
+_BAD_LINE_MARKER = "\x00bad_line"
 
 
 class LogParser:
-    def __init__(self, filepath: str):
+    def __init__(
+        self,
+        filepath: str,
+        cache: Optional[ParsedLogCache] = None,
+        log_filter: Optional[LogFilter] = None,
+        quarantine: Optional[Quarantine] = None,
+    ):
         self.filepath = filepath
+        self.cache = cache
+        self.log_filter = log_filter
+        # Отклонённые при проверке строки и счётчики ошибок
+        self.quarantine = quarantine if quarantine is not None else Quarantine()
+        # Был ли последний read() загрузкой из кэша
+        self.from_cache = False
 
     def parse(self) -> List[Dict]:
-        """Чтение и обработка CSV файла"""
+        """Чтение CSV файла в виде списка словарей (для совместимости)"""
+        df = self.parse_frame()
+        if "score" in df.columns:
+            # Пропуски оценок как NaN, а не pd.NA, как раньше
+            df["score"] = df["score"].astype("float64")
+        return df.to_dict("records")
+
+    def parse_frame(self) -> pd.DataFrame:
+        """Чтение и обработка CSV файла в колоночный DataFrame"""
         try:
-            df = pd.read_csv(self.filepath)
+            df = self.read()
+            if self.from_cache:
+                print("✓ Данные загружены из кэша")
+            report_frame(df)
+            return df
 
-            required = ["student_id", "activity_type", "timestamp", "score"]
-            for col in required:
-                if col not in df.columns:
-                    raise ValueError(f"Отсутствует колонка: {col}")
+        except (OSError, ValueError) as e:
+            # Ошибки отдельных строк уходят в карантин; сюда попадают только
+            # ошибки файла целиком: нет файла или обязательной колонки
+            print(f"❌ Ошибка при чтении файла: {e}")
+            return pd.DataFrame()
 
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            df["date"] = df["timestamp"].dt.date
-            df["hour"] = df["timestamp"].dt.hour
-            df["day_of_week"] = df["timestamp"].dt.day_name()
+    def read(self) -> pd.DataFrame:
+        """Разбор CSV или загрузка из кэша (без вывода и перехвата ошибок)"""
+        self.from_cache = False
+        df = self.read_cached()
+        if df is not None:
+            return df
+        if self.log_filter is not None:
+            return self._read_filtered()
+        if self.cache is None:
+            return self._prepare(self._read_csv())
 
-            if "duration_minutes" in df.columns:
-                df["duration_minutes"] = df["duration_minutes"].fillna(0)
+        # Отклонённые строки файла хранятся вместе с записью кэша: при
+        # попадании в кэш карантин и счётчики восстанавливаются из неё
+        signature = self.cache.signature(self.filepath)
+        rejected = Quarantine(keep=True)
+        df = self._prepare(self._read_csv(rejected), rejected)
+        self.quarantine.merge(rejected)
+        with collector.stage("parser.cache_store", rows=len(df)):
+            self.cache.store(self.filepath, df, rejected, signature=signature)
+        return df
 
-            logs = df.to_dict("records")
+    def read_cached(self) -> Optional[pd.DataFrame]:
+        """DataFrame из кэша (с отбором строк) или None, если записи нет"""
+        if self.cache is None:
+            return None
+        # Карантин из кэша относится ко всему файлу, а не к отобранным строкам
+        rejected = Quarantine(keep=True)
+        with collector.stage("parser.cache_load"):
+            df = self.cache.load(self.filepath, rejected)
+        if df is None:
+            return None
 
-            print(f"✓ Успешно прочитано {len(logs)} записей")
-            print(f"✓ Уникальных студентов: {df['student_id'].nunique()}")
+        self.from_cache = True
+        self.quarantine.merge(rejected)
+        if self.log_filter is not None:
+            with collector.stage("parser.filter", rows=len(df)):
+                df = self.log_filter.apply(df)
+        return df
 
-            return logs
+    def _read_csv(self, quarantine: Optional[Quarantine] = None) -> pd.DataFrame:
+        with collector.stage("parser.read_csv") as span:
+            try:
+                with _counted_fields(self.filepath) as counted:
+                    df = pd.read_csv(counted, dtype=READ_DTYPES)
+                if counted.overlong:
+                    raise pd.errors.ParserError("строка с лишними полями")
+            except pd.errors.ParserError:
+                # Строки с неверным числом полей: медленный разбор с карантином
+                lines: Deque[List[str]] = deque()
+                df = pd.read_csv(
+                    self.filepath,
+                    **self._lenient_options(self.filepath, lines, dtype=READ_DTYPES),
+                )
+                df = self._drop_bad_lines(df, lines, quarantine)
+            if span is not None:
+                span["rows"] = len(df)
+        return df
 
-        except Exception as e:
-            print(f"❌ Ошибка при чтении файла: {e}")
-            return []
+    @staticmethod
+    def _lenient_options(source, lines: Deque[List[str]], **kwargs) -> Dict:
+        """Параметры read_csv python-движком: строка с неверным числом полей
+        сохраняется в lines и заменяется строкой меток"""
+        if "names" not in kwargs:
+            # Явные имена: иначе лишние поля первой строки данных python-движок
+            # принимает за индекс, а не передаёт в on_bad_lines
+            names = pd.read_csv(source, nrows=0).columns.tolist()
+            kwargs = dict(kwargs, names=names, header=0)
+        width = len(kwargs["names"])
+
+        def replace(fields: List[str]) -> List[str]:
+            lines.append(fields)
+            return [_BAD_LINE_MARKER] * width
+
+        return dict(kwargs, engine="python", on_bad_lines=replace)
+
+    def _drop_bad_lines(
+        self,
+        df: pd.DataFrame,
+        lines: Deque[List[str]],
+        quarantine: Optional[Quarantine] = None,
+    ) -> pd.DataFrame:
+        """Строки меток — в карантин (с их номерами), остальные — дальше"""
+        marked = (df["student_id"] == _BAD_LINE_MARKER).to_numpy()
+        if not marked.any():
+            return df
+
+        rows = df.index[marked]
+        rejected = bad_line_frame([lines.popleft() for _ in rows], rows)
+        quarantine = self.quarantine if quarantine is None else quarantine
+        quarantine.add(self.filepath, len(rows), rejected)
+        df = df[~marked].copy()
+        for col in df.select_dtypes("category").columns:
+            df[col] = df[col].cat.remove_unused_categories()
+        return df
+
+    def _read_filtered(self) -> pd.DataFrame:
+        """Чтение с отбором строк по частям; в кэш сохраняется только полный файл"""
+        with collector.stage("parser.read_csv") as span:
+            chunks = [
+                self._prepare(chunk)
+                for chunk in self._read_chunks(
+                    self.filepath, FILTER_CHUNK_SIZE, **self._read_options()
+                )
+            ]
+            df = concat_frames(chunks)
+            if span is not None:
+                span["rows"] = len(df)
+        return df
+
+    def _read_options(self) -> Dict:
+        options = {"dtype": READ_DTYPES}
+        if self.log_filter is not None:
+            options["usecols"] = self.log_filter.keeps_column
+        return options
 
-    def get_stats(self, logs: List[Dict]) -> Dict:
+    def iter_chunks(
+        self, chunk_size: int, offset: int = 0, end: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Потоковое чтение CSV частями не более chunk_size строк.
+
+        offset — позиция в байтах, с которой начинаются ещё не прочитанные
+        строки (для дописываемых файлов); заголовок берётся из первой строки.
+        end — позиция, до которой читать: строки, дописанные во время
+        чтения, остаются следующему запуску.
+        """
+        if offset == 0 and end is None:
+            chunks = self._read_chunks(
+                self.filepath, chunk_size, **self._read_options()
+            )
+            for chunk in chunks:
+                yield self._prepare(chunk)
+            return
+
+        with open(self.filepath, "rb") as f:
+            header = f.readline()
+            names = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+            f.seek(max(offset, len(header)))
+            source = f if end is None else _ByteRange(f, end)
+            chunks = self._read_chunks(
+                source, chunk_size, names=names, header=None, **self._read_options()
+            )
+            for chunk in chunks:
+                yield self._prepare(chunk)
+
+    def _read_chunks(self, source, chunk_size: int, **kwargs) -> Iterator[pd.DataFrame]:
+        """Части CSV; после строки с неверным числом полей чтение продолжается
+        python-движком, который передаёт такие строки в карантин"""
+        start = source.tell() if hasattr(source, "tell") else None
+        width = len(kwargs["names"]) if "names" in kwargs else None
+        # Номера строк данных (индекс частей) совпадают у обоих движков
+        done = 0
+        try:
+            with _counted_fields(source, width) as counted:
+                for chunk in pd.read_csv(counted, chunksize=chunk_size, **kwargs):
+                    # Часть с лишними полями C-движок мог прочитать без ошибки
+                    if counted.overlong:
+                        break
+                    done = chunk.index[-1] + 1 if len(chunk) else done
+                    yield chunk
+                else:
+                    return
+        except pd.errors.EmptyDataError:
+            return
+        except pd.errors.ParserError:
+            pass
+
+        if start is not None:
+            source.seek(start)
+        lines: Deque[List[str]] = deque()
+        chunks = pd.read_csv(
+            source,
+            chunksize=chunk_size,
+            **self._lenient_options(source, lines, **kwargs),
+        )
+        for chunk in chunks:
+            # Строки до ошибки уже отданы быстрым чтением; их строки меток
+            # (если есть) не должны сдвигать сопоставление с lines
+            skipped = (chunk.index < done) & (chunk["student_id"] == _BAD_LINE_MARKER)
+            for _ in range(skipped.sum()):
+                lines.popleft()
+            chunk = self._drop_bad_lines(chunk[chunk.index >= done], lines)
+            if len(chunk):
+                yield chunk
+
+    def _prepare(
+        self, df: pd.DataFrame, quarantine: Optional[Quarantine] = None
+    ) -> pd.DataFrame:
+        """Проверка колонок и строк, отбор строк и производные поля времени"""
+        for col in REQUIRED_COLUMNS:
+            if col not in df.columns:
+                raise ValueError(f"Отсутствует колонка: {col}")
+
+        if self.log_filter is not None:
+            with collector.stage("parser.filter", rows=len(df)):
+                df = self.log_filter.filter_raw(df)
+        # Типы, диапазоны и разбор времени; отклонённые строки — в карантин
+        with collector.stage("parser.validate", rows=len(df)):
+            rows = len(df)
+            df, rejected = validate_frame(df)
+        quarantine = self.quarantine if quarantine is None else quarantine
+        quarantine.add(self.filepath, rows, rejected)
+        if self.log_filter is not None:
+            df = self.log_filter.filter_time(df)
+        with collector.stage("parser.derive_columns", rows=len(df)):
+            df["date"] = df["timestamp"].dt.normalize()
+            df["hour"] = df["timestamp"].dt.hour.astype(DERIVED_DTYPES["hour"])
+            df["day_of_week"] = pd.Categorical.from_codes(
+                df["timestamp"].dt.dayofweek.fillna(-1).astype("int8"),
+                dtype=DERIVED_DTYPES["day_of_week"],
+            )
+
+        if "duration_minutes" in df.columns:
+            df["duration_minutes"] = df["duration_minutes"].fillna(0)
+
+        return df
+
+    def get_stats(self, logs: Union[pd.DataFrame, List[Dict]]) -> Dict:
         """Базовая статистика данных"""
-        if not logs:
+        df = logs if isinstance(logs, pd.DataFrame) else pd.DataFrame(logs)
+        if df.empty:
             return {}
 
-        df = pd.DataFrame(logs)
-
         return {
             "total_records": len(df),
             "unique_students": df["student_id"].nunique(),
             "start_date": df["timestamp"].min().strftime("%Y-%m-%d"),
             "end_date": df["timestamp"].max().strftime("%Y-%m-%d"),
             "activity_types": df["activity_type"].value_counts().to_dict(),
-            "avg_score": df["score"].mean() if "score" in df.columns else None,
+            "avg_score": (
+                df["score"].astype("float64").mean() if "score" in df.columns else None
+            ),
         }
+
+
+def report_frame(df: pd.DataFrame):
+    """Вывод размера разобранных данных и запись объёма в метрики"""
+    memory_mb = df.memory_usage(deep=True).sum() / 1024**2
+    collector.record("parsed_frame_mb", memory_mb)
+
+    print(f"✓ Успешно прочитано {len(df)} записей")
+    print(f"✓ Уникальных студентов: {df['student_id'].nunique()}")
+    print(f"✓ Объём в памяти: {memory_mb:.2f} МБ")
+
+
+class _ByteRange(io.RawIOBase):
+    """Открытый файл, читаемый только до позиции end"""
+
+    def __init__(self, f, end: int):
+        self._f = f
+        self._end = end
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        return self._f.seek(pos, whence)
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._end - self._f.tell())
+        if size <= 0:
+            return 0
+        return self._f.readinto(memoryview(buffer)[:size])
+
+
+class _FieldCounter(io.RawIOBase):
+    """Поток CSV, в котором по мере чтения считаются поля каждой строки.
+
+    C-движок pandas не сверяет число полей первой строки каждого блока
+    разбора (в том числе части chunksize) и первой строки данных: лишние
+    поля отбрасываются или становятся индексом. overlong — прочитана строка,
+    где полей больше width (по умолчанию — числа полей заголовка).
+    """
+
+    def __init__(self, f, width: Optional[int] = None):
+        self._f = f
+        self._max_commas = None if width is None else width - 1
+        # Разделители незаконченной строки и открытые кавычки в конце блока
+        self._commas = 0
+        self._quoted = False
+        self.overlong = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = self._f.readinto(buffer)
+        if size and not self.overlong:
+            self._scan(np.frombuffer(memoryview(buffer)[:size], dtype=np.uint8))
+        return size
+
+    def _scan(self, data: np.ndarray):
+        commas = data == ord(",")
+        newlines = data == ord("\n")
+        quotes = data == ord('"')
+        if self._quoted or quotes.any():
+            # Запятые и переводы строк внутри кавычек — часть значения
+            outside = (np.cumsum(quotes) + self._quoted) % 2 == 0
+            commas &= outside
+            newlines &= outside
+            self._quoted = not outside[-1]
+
+        # Разделители по строкам блока; последняя строка может продолжиться
+        # в следующем блоке
+        starts = np.flatnonzero(newlines) + 1
+        starts = np.concatenate(([0], starts[starts < len(data)]))
+        per_line = np.add.reduceat(commas.view(np.uint8), starts, dtype=np.int32)
+        if newlines[-1]:
+            per_line = np.append(per_line, 0)
+        per_line[0] += self._commas
+        self._commas = int(per_line[-1])
+        if self._max_commas is None:
+            if len(per_line) == 1:
+                return
+            self._max_commas = int(per_line[0])
+        self.overlong = bool(per_line.max() > self._max_commas)
+
+
+@contextmanager
+def _counted_fields(source, width: Optional[int] = None):
+    """_FieldCounter для пути (с распаковкой по расширению) или открытого файла"""
+    if not isinstance(source, str):
+        yield _FieldCounter(source, width)
+        return
+    with get_handle(source, "rb", compression="infer", is_text=False) as handles:
+        yield _FieldCounter(handles.handle, width)
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Объединение разобранных частей с сохранением компактных типов"""
+    df = pd.concat(frames, ignore_index=True)
+    # Части с целыми и строковыми student_id: один студент — одна строка
+    if "student_id" in df.columns and df["student_id"].dtype == object:
+        df["student_id"] = df["student_id"].astype(str)
+    # Категории частей различаются, после concat они становятся object
+    for col, dtype in CSV_DTYPES.items():
+        if dtype == "category" and col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
@@ -0,0 +1,127 @@
+"""
+Параллельный анализ по частям данных (например, по курсам)
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from .analyzer import LearningAnalyzer
+from .cache import decode_column, encode_column
+from .streaming import StreamingAggregator
+
+
+class SharedFrame:
+    """Колонки DataFrame в общей памяти: процессы читают их без pickle.
+
+    Строковые колонки передаются как коды + словарь значений.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns: List[Dict] = []
+        self._blocks: List[shared_memory.SharedMemory] = []
+        for name in df.columns:
+            encoded = encode_column(df[name])
+            if encoded is None:
+                # Колонки со смешанными типами анализом не используются
+                continue
+            spec, array = encoded
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self._blocks.append(block)
+            self.columns.append(
+                dict(spec, name=name, shm=block.name, array_dtype=array.dtype.str)
+            )
+        self.rows = len(df)
+
+    def close(self):
+        """Освобождение общей памяти"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_slice(columns: List[Dict], rows: int, start: int, stop: int) -> pd.DataFrame:
+    """Строки [start, stop) из SharedFrame (вызывается в рабочем процессе)"""
+    data = {}
+    for spec in columns:
+        block = shared_memory.SharedMemory(name=spec["shm"])
+        try:
+            array = np.ndarray((rows,), np.dtype(spec["array_dtype"]), buffer=block.buf)
+            data[spec["name"]] = decode_column(array[start:stop].copy(), spec)
+            del array
+        finally:
+            block.close()
+    return pd.DataFrame(data)
+
+
+def _analyze_slice(task: Dict):
+    df = read_slice(task["columns"], task["rows"], task["start"], task["stop"])
+    aggregator = StreamingAggregator()
+    aggregator.update(df)
+    analyzer = LearningAnalyzer(df, n_clusters=task["n_clusters"])
+    return task["key"], analyzer.analyze_all(), aggregator
+
+
+def analyze_partitioned(
+    df: pd.DataFrame,
+    by: str = "course_id",
+    workers: Optional[int] = None,
+    n_clusters: Optional[int] = None,
+) -> Dict:
+    """analyze_all() для каждой части данных в пуле процессов.
+
+    n_clusters — число групп студентов в каждой части (None — без групп).
+
+    Возвращает {"partitions": {ключ: результаты}, "global": сводка}, где
+    сводка собирается слиянием агрегатов частей, без повторного прохода.
+    """
+    if by not in df.columns:
+        raise ValueError(f"Отсутствует колонка: {by}")
+    if df.empty:
+        return {"partitions": {}, "global": {}}
+
+    # Сортировка делает каждую часть непрерывным диапазоном строк
+    df = df.sort_values(by, kind="stable", na_position="last", ignore_index=True)
+    keys = df[by].astype(str).where(df[by].notna(), "unknown").to_numpy()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    stops = np.r_[starts[1:], len(keys)]
+
+    partitions = {}
+    total = StreamingAggregator()
+    with SharedFrame(df) as shared:
+        tasks = [
+            {
+                "key": keys[start],
+                "columns": shared.columns,
+                "rows": shared.rows,
+                "start": int(start),
+                "stop": int(stop),
+                "n_clusters": n_clusters,
+            }
+            for start, stop in zip(starts, stops)
+        ]
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(tasks) == 1:
+            outputs = [_analyze_slice(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                outputs = list(pool.map(_analyze_slice, tasks))
+
+    for key, results, aggregator in outputs:
+        partitions[key] = results
+        total.merge(aggregator)
+
+    global_results = LearningAnalyzer.from_aggregates(total.aggregates()).analyze_all()
+    return {"partitions": partitions, "global": global_results}
@@ -0,0 +1,42 @@
+"""
+Схема логов LMS: типы колонок после чтения и разбора
+"""
+
+import pandas as pd
+
+REQUIRED_COLUMNS = ["student_id", "activity_type", "timestamp", "score"]
+
+WEEKDAYS = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+# Типы колонок CSV, применяемые при чтении (timestamp разбирается отдельно).
+# student_id — int64, если все идентификаторы целые, иначе строки (object):
+# буквенно-цифровые идентификаторы ("S1", "stu-42") допустимы
+CSV_DTYPES = {
+    "activity_type": "category",
+    "activity_name": "category",
+    "course_id": "category",
+    "duration_minutes": "float32",
+    # Float64: дробные оценки (72.3) должны попадать в отчёт без искажений
+    "score": "Float64",
+}
+
+# Типы, задаваемые при чтении: строковые колонки сразу в категории, а
+# числовые читаются с выводом типа и приводятся к CSV_DTYPES при проверке
+# (validation.validate_frame), чтобы одно нечисловое значение не прерывало
+# разбор всего файла
+READ_DTYPES = {col: dtype for col, dtype in CSV_DTYPES.items() if dtype == "category"}
+
+# Производные колонки (hour — nullable, чтобы пережить NaT в timestamp)
+DERIVED_DTYPES = {
+    "date": "datetime64[ns]",
+    "hour": "Int8",
+    "day_of_week": pd.CategoricalDtype(WEEKDAYS, ordered=True),
+}
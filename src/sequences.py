@@ -0,0 +1,126 @@
+"""
+Пути обучения: переходы между активностями и частые цепочки (n-граммы)
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+
+class EventSequence:
+    """События, упорядоченные по (student_id, timestamp), в виде массивов кодов.
+
+    Все вычисления идут над целыми массивами: n-грамма — это n подряд идущих
+    событий одного студента, поэтому достаточно сдвигов массива и проверки,
+    что первое и последнее событие окна принадлежат одному студенту.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        students, student_ids = pd.factorize(df["student_id"])
+        activity = df["activity_type"].astype("category")
+        activities = activity.cat.codes.to_numpy()
+        timestamps = df["timestamp"].to_numpy("datetime64[ns]").view("int64")
+        if "score" in df.columns:
+            scores = df["score"].to_numpy("float64", na_value=np.nan)
+        else:
+            scores = np.full(len(df), np.nan)
+
+        valid = (students >= 0) & (activities >= 0) & ~pd.isna(df["timestamp"])
+        valid = np.asarray(valid)
+        # lexsort устойчив: события с одинаковым временем сохраняют порядок файла
+        order = np.lexsort((timestamps[valid], students[valid]))
+
+        self.students = students[valid][order]
+        # Исходный student_id по коду студента
+        self.student_ids = np.asarray(student_ids)
+        self.activities = activities[valid][order].astype("int64")
+        self.scores = scores[valid][order]
+        self.timestamps = timestamps[valid][order]
+        if "duration_minutes" in df.columns:
+            durations = df["duration_minutes"].to_numpy("float64", na_value=0.0)
+            self.durations = np.nan_to_num(durations[valid][order])
+        else:
+            self.durations = np.zeros(len(self.timestamps))
+        # Ближайшая оценка студента начиная с события (для форумов и входов,
+        # у которых своей оценки нет): ffill по развёрнутому массиву
+        reverse = pd.Series(self.scores[::-1])
+        self.next_scores = reverse.groupby(self.students[::-1]).ffill().to_numpy()[::-1]
+        self.categories = activity.cat.categories.tolist()
+
+    def __len__(self) -> int:
+        return len(self.activities)
+
+    def ngram_keys(self, n: int):
+        """Окна из n событий одного студента: (коды, студенты, оценки).
+
+        Код n-граммы — запись кодов активностей в системе счисления с
+        основанием «число активностей»; оценка — ближайшая полученная
+        студентом начиная с последнего события окна.
+        """
+        windows = len(self) - n + 1
+        if windows <= 0:
+            empty = np.empty(0, dtype="int64")
+            return empty, empty, np.empty(0, dtype="float64")
+
+        base = len(self.categories)
+        keys = np.zeros(windows, dtype="int64")
+        for start in range(n):
+            stop = start + windows
+            keys = keys * base + self.activities[start:stop]
+
+        last = n - 1
+        starts = self.students[:windows]
+        same_student = starts == self.students[last:]
+        outcome = self.next_scores[last:]
+        return keys[same_student], starts[same_student], outcome[same_student]
+
+    def decode(self, key: int, n: int) -> List[str]:
+        """Последовательность названий активностей по коду n-граммы"""
+        base = len(self.categories)
+        path = []
+        for _ in range(n):
+            key, code = divmod(key, base)
+            path.append(self.categories[code])
+        return path[::-1]
+
+
+def transition_matrix(sequence: EventSequence) -> pd.DataFrame:
+    """Число переходов «активность → следующая активность» одного студента"""
+    keys, _, _ = sequence.ngram_keys(2)
+    size = len(sequence.categories)
+    counts = np.bincount(keys, minlength=size * size).reshape(size, size)
+    frame = pd.DataFrame(counts, index=sequence.categories, columns=sequence.categories)
+    frame.index.name = "from"
+    frame.columns.name = "to"
+    return frame
+
+
+def frequent_paths(
+    sequence: EventSequence, n: int, top: int = 10, min_support: int = 1
+) -> List[Dict]:
+    """Самые частые цепочки из n активностей и средний балл после них"""
+    keys, students, outcome = sequence.ngram_keys(n)
+    if len(keys) == 0:
+        return []
+
+    stats = (
+        pd.DataFrame({"key": keys, "student": students, "outcome": outcome})
+        .groupby("key")
+        .agg(
+            count=("student", "size"),
+            students=("student", "nunique"),
+            avg_outcome_score=("outcome", "mean"),
+        )
+    )
+    stats = stats[stats["count"] >= min_support].nlargest(top, "count")
+    return [
+        {
+            "path": sequence.decode(int(key), n),
+            "count": int(count),
+            "students": int(unique),
+            "avg_outcome_score": float(score),
+        }
+        for key, count, unique, score in zip(
+            stats.index, stats["count"], stats["students"], stats["avg_outcome_score"]
+        )
+    ]
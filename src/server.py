@@ -0,0 +1,322 @@
+"""
+Локальный сервер анализа: данные остаются в памяти между запросами
+"""
+
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+
+from .analyzer import LearningAnalyzer
+from .student_index import cohort_summary, student_report
+from .validation import Quarantine
+from .visualizer import PLOT_FORMATS, ResultVisualizer, render_figure
+from .writers import dumps
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_ENTRIES = 256
+
+# Имя анализа в URL -> метод LearningAnalyzer
+ANALYSES = {
+    "basic_stats": "get_basic_stats",
+    "student_performance": "analyze_student_performance",
+    "activity_effectiveness": "analyze_activity_effectiveness",
+    "time_patterns": "analyze_time_patterns",
+    "trends": "analyze_trends",
+    "sessions": "analyze_sessions",
+    "learning_paths": "analyze_learning_paths",
+    "clusters": "analyze_clusters",
+    "recommendations": "generate_recommendations",
+}
+CONTENT_TYPES = {
+    "json": "application/json; charset=utf-8",
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Dataset:
+    """Разобранные логи в памяти и анализатор с кэшем агрегатов.
+
+    Версия увеличивается при каждой загрузке; если исходные файлы
+    изменились (размер или mtime), данные перечитываются при следующем
+    запросе.
+    """
+
+    def __init__(self, parser, n_clusters: Optional[int] = None):
+        self.parser = parser
+        self.n_clusters = n_clusters
+        self.version = 0
+        self.signature = None
+        self.analyzer: Optional[LearningAnalyzer] = None
+        self._results: Optional[Dict] = None
+
+    def files(self):
+        return getattr(self.parser, "paths", None) or [self.parser.filepath]
+
+    def current_signature(self) -> Tuple:
+        signature = []
+        for path in self.files():
+            st = os.stat(path)
+            signature.append((os.path.abspath(path), st.st_size, st.st_mtime_ns))
+        return tuple(signature)
+
+    def is_stale(self) -> bool:
+        return self.analyzer is None or self.signature != self.current_signature()
+
+    def load(self):
+        signature = self.current_signature()
+        # Счётчики проверки строк относятся к текущей версии данных
+        self.parser.quarantine = Quarantine()
+        df = self.parser.parse_frame()
+        # Строки по студентам подряд: запрос по студенту — срез без фильтрации.
+        # Анализатор получает тот же отсортированный DataFrame, без второй копии
+        # (строки без student_id отклоняет проверка при разборе)
+        if not df.empty:
+            df = df.sort_values(
+                ["student_id", "timestamp"], kind="stable", ignore_index=True
+            )
+        self.analyzer = LearningAnalyzer(df, n_clusters=self.n_clusters)
+        self._results = None
+        self.signature = signature
+        self.version += 1
+
+        self._students = df
+        if df.empty:
+            self._ids, self._offsets = np.empty(0), np.zeros(1, dtype="int64")
+            return
+        self._ids, starts = np.unique(df["student_id"].to_numpy(), return_index=True)
+        self._offsets = np.r_[starts, len(df)]
+        self._cohort = cohort_summary(df)
+
+    def analysis(self, name: Optional[str] = None):
+        if name is not None:
+            return getattr(self.analyzer, ANALYSES[name])()
+        # Полный отчёт нужен и для графиков — считается один раз на версию
+        if self._results is None:
+            self._results = self.analyzer.analyze_all()
+        return self._results
+
+    def student(self, student_id) -> Optional[Dict]:
+        if self._ids.dtype.kind in "iuf" and not isinstance(student_id, int):
+            return None
+        if self._ids.dtype.kind not in "iuf":
+            # Строковые идентификаторы: "/students/7" ищется как "7"
+            student_id = str(student_id)
+        pos = np.searchsorted(self._ids, student_id)
+        if pos >= len(self._ids) or self._ids[pos] != student_id:
+            return None
+        start, stop = self._offsets[pos], self._offsets[pos + 1]
+        rows = self._students.iloc[start:stop]
+        return student_report(student_id, rows, *self._cohort)
+
+    def plot(self, chart: str, fmt: str) -> bytes:
+        specs = ResultVisualizer(self.analysis(), fmt).chart_specs()
+        if chart not in specs:
+            raise HTTPError(404, f"Нет графика: {chart}")
+        if fmt == "json":
+            return dumps(specs[chart])
+        buffer = io.BytesIO()
+        render_figure(specs[chart], buffer, fmt)
+        return buffer.getvalue()
+
+
+class ResultCache:
+    """LRU-кэш ответов; ключ включает версию данных и параметры запроса"""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple, Tuple[str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Tuple[str, bytes]]:
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key: Tuple, value: Tuple[str, bytes]):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+class AnalysisServer:
+    """HTTP-сервер на asyncio только для localhost.
+
+    Соединения обслуживаются конкурентно, а расчёты выполняются в одном
+    рабочем потоке: анализатор и сборщик метрик не рассчитаны на
+    одновременные вызовы, а ответы из кэша отдаются без очереди.
+    """
+
+    def __init__(
+        self, datasets: Dict[str, Dataset], cache_entries: int = DEFAULT_CACHE_ENTRIES
+    ):
+        self.datasets = datasets
+        self.cache = ResultCache(cache_entries)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def start(self, port: int = DEFAULT_PORT, socket_path: Optional[str] = None):
+        """Запуск сервера на 127.0.0.1:port или на Unix-сокете"""
+        for dataset in self.datasets.values():
+            if dataset.is_stale():
+                await self._run(dataset.load)
+        if socket_path:
+            return await asyncio.start_unix_server(self.handle, path=socket_path)
+        return await asyncio.start_server(self.handle, HOST, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            # Заголовки не используются, но их нужно дочитать
+            while (await reader.readline()).strip():
+                pass
+            if len(request_line) < 2 or request_line[0] != "GET":
+                raise HTTPError(405, "Поддерживается только GET")
+            status, content_type, body = 200, *await self.dispatch(request_line[1])
+        except HTTPError as e:
+            status, content_type, body = e.status, *_error(str(e))
+        except Exception as e:
+            status, content_type, body = 500, *_error(f"{type(e).__name__}: {e}")
+
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+    async def dispatch(self, target: str) -> Tuple[str, bytes]:
+        """Ответ (тип содержимого, тело) для пути запроса"""
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if parts == ["health"]:
+            versions = {name: d.version for name, d in self.datasets.items()}
+            validation = {
+                name: d.parser.quarantine.summary() for name, d in self.datasets.items()
+            }
+            body = {
+                "datasets": versions,
+                "cache": self.cache.stats(),
+                "validation": validation,
+            }
+            return CONTENT_TYPES["json"], dumps(body)
+
+        dataset = await self._dataset(query.get("dataset", "default"))
+        handler, params = self._route(dataset, parts, query)
+        key = (query.get("dataset", "default"), dataset.version) + params
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = await self._run(handler)
+        self.cache.put(key, result)
+        return result
+
+    def _route(self, dataset: Dataset, parts, query) -> Tuple[Callable, Tuple]:
+        if parts and parts[0] == "analyze" and len(parts) <= 2:
+            name = parts[1] if len(parts) == 2 else None
+            if name is not None and name not in ANALYSES:
+                raise HTTPError(404, f"Неизвестный анализ: {name}")
+            return _json_handler(lambda: dataset.analysis(name)), ("analyze", name)
+
+        if len(parts) == 2 and parts[0] == "students":
+            student_id = int(parts[1]) if parts[1].lstrip("-").isdigit() else parts[1]
+
+            def student():
+                report = dataset.student(student_id)
+                if report is None:
+                    raise HTTPError(404, f"Студент {student_id} не найден")
+                return report
+
+            return _json_handler(student), ("students", student_id)
+
+        if len(parts) == 2 and parts[0] == "plots":
+            fmt = query.get("format", "png")
+            if fmt not in PLOT_FORMATS:
+                raise HTTPError(400, f"Неизвестный формат графиков: {fmt}")
+            chart = parts[1]
+            return (
+                lambda: (CONTENT_TYPES[fmt], dataset.plot(chart, fmt)),
+                ("plots", chart, fmt),
+            )
+
+        raise HTTPError(404, "Неизвестный путь")
+
+    async def _dataset(self, name: str) -> Dataset:
+        if name not in self.datasets:
+            raise HTTPError(404, f"Неизвестный набор данных: {name}")
+        dataset = self.datasets[name]
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if dataset.is_stale():
+                await self._run(dataset.load)
+        return dataset
+
+    async def _run(self, func: Callable):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func)
+
+
+def serve(
+    datasets: Dict[str, Dataset],
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+):
+    """Запуск сервера до прерывания (Ctrl+C)"""
+
+    async def main():
+        server = await AnalysisServer(datasets).start(port, socket_path)
+        address = socket_path or f"http://{HOST}:{port}"
+        print(f"✓ Сервер запущен: {address} (Ctrl+C для остановки)")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n✓ Сервер остановлен")
+
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+def _json_handler(func: Callable) -> Callable:
+    return lambda: (CONTENT_TYPES["json"], dumps(func()))
+
+
+def _error(message: str) -> Tuple[str, bytes]:
+    return CONTENT_TYPES["json"], dumps({"error": message})
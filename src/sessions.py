@@ -0,0 +1,143 @@
+"""
+Учебные сессии: события студента, разделённые паузами не длиннее порога
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+from .sequences import EventSequence
+
+DEFAULT_GAP_MINUTES = 30
+# Границы длительности сессий (минуты) для связи длины сессии с оценками
+LENGTH_BINS = [0, 15, 30, 60, 120, np.inf]
+LENGTH_LABELS = ["0-15", "15-30", "30-60", "60-120", "120+"]
+SESSION_COLUMNS = [
+    "student",
+    "minutes",
+    "events",
+    "active_minutes",
+    "score_sum",
+    "score_count",
+]
+
+_NS_PER_MINUTE = 60 * 10**9
+
+
+def assign_sessions(
+    sequence: EventSequence, gap_minutes: float = DEFAULT_GAP_MINUTES
+) -> np.ndarray:
+    """Номер сессии для каждого события EventSequence.
+
+    Новая сессия начинается при смене студента или если событие началось
+    позже чем через gap_minutes после окончания всех предыдущих событий
+    студента (начало + duration_minutes).
+    """
+    if len(sequence) == 0:
+        return np.empty(0, dtype="int64")
+
+    starts = sequence.timestamps
+    ends = starts + (sequence.durations * _NS_PER_MINUTE).astype("int64")
+    # Накопленный максимум окончаний внутри студента
+    reach = pd.Series(ends).groupby(sequence.students).cummax().to_numpy()
+
+    new_session = np.ones(len(sequence), dtype=bool)
+    same_student = sequence.students[1:] == sequence.students[:-1]
+    new_session[1:] = ~same_student | (
+        starts[1:] - reach[:-1] > gap_minutes * _NS_PER_MINUTE
+    )
+    return np.cumsum(new_session) - 1
+
+
+def session_table(sequence: EventSequence, session_ids: np.ndarray) -> pd.DataFrame:
+    """Одна строка на сессию: студент, длительность, события, оценки.
+
+    События одной сессии идут подряд, поэтому агрегаты считаются через
+    reduceat по началам сессий без группировки.
+    """
+    n = len(session_ids)
+    if n == 0:
+        return pd.DataFrame(columns=SESSION_COLUMNS)
+
+    first = np.flatnonzero(np.r_[True, session_ids[1:] != session_ids[:-1]])
+    starts = sequence.timestamps
+    ends = starts + (sequence.durations * _NS_PER_MINUTE).astype("int64")
+    scored = ~np.isnan(sequence.scores)
+    return pd.DataFrame(
+        {
+            "student": sequence.students[first],
+            "minutes": (np.maximum.reduceat(ends, first) - starts[first])
+            / _NS_PER_MINUTE,
+            "events": np.diff(np.r_[first, n]),
+            "active_minutes": np.add.reduceat(sequence.durations, first),
+            "score_sum": np.add.reduceat(np.where(scored, sequence.scores, 0), first),
+            "score_count": np.add.reduceat(scored.astype("int64"), first),
+        }
+    )
+
+
+def session_summary(
+    sequence: EventSequence,
+    session_ids: np.ndarray,
+    sessions: pd.DataFrame,
+    gap_minutes: float = DEFAULT_GAP_MINUTES,
+) -> Dict:
+    """Число и длина сессий, состав активностей и связь сессий с оценками"""
+    if len(sessions) == 0:
+        return {}
+
+    students = sessions.groupby("student").agg(
+        sessions=("minutes", "size"),
+        avg_minutes=("minutes", "mean"),
+        score_sum=("score_sum", "sum"),
+        score_count=("score_count", "sum"),
+    )
+    student_score = students["score_sum"] / students["score_count"].where(
+        students["score_count"] > 0
+    )
+
+    return {
+        "gap_minutes": gap_minutes,
+        "total_sessions": len(sessions),
+        "sessions_per_student": float(students["sessions"].mean()),
+        "avg_session_minutes": float(sessions["minutes"].mean()),
+        "median_session_minutes": float(sessions["minutes"].median()),
+        "avg_active_minutes": float(sessions["active_minutes"].mean()),
+        "avg_events_per_session": float(sessions["events"].mean()),
+        "activity_mix": _activity_mix(sequence, session_ids, len(sessions)),
+        "score_by_session_length": _score_by_length(sessions),
+        "correlation_sessions_score": float(students["sessions"].corr(student_score)),
+        "correlation_session_length_score": float(
+            students["avg_minutes"].corr(student_score)
+        ),
+    }
+
+
+def _activity_mix(
+    sequence: EventSequence, session_ids: np.ndarray, total: int
+) -> Dict[str, Dict]:
+    """Доля сессий с каждой активностью и среднее число таких событий в сессии"""
+    size = len(sequence.categories)
+    per_session = np.bincount(sequence.activities, minlength=size) / total
+    # Уникальные пары (сессия, активность) — без матрицы сессии × активности
+    pairs = np.unique(session_ids * size + sequence.activities)
+    with_activity = np.bincount(pairs % size, minlength=size) / total
+    return {
+        name: {
+            "share_of_sessions": float(with_activity[code]),
+            "avg_per_session": float(per_session[code]),
+        }
+        for code, name in enumerate(sequence.categories)
+    }
+
+
+def _score_by_length(sessions: pd.DataFrame) -> Dict[str, float]:
+    """Средний балл событий в сессиях разной длительности"""
+    buckets = pd.cut(
+        sessions["minutes"], LENGTH_BINS, labels=LENGTH_LABELS, right=False
+    )
+    totals = (
+        sessions[["score_sum", "score_count"]].groupby(buckets, observed=False).sum()
+    )
+    means = totals["score_sum"] / totals["score_count"].where(totals["score_count"] > 0)
+    return {str(label): float(value) for label, value in means.items()}
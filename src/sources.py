@@ -0,0 +1,281 @@
+"""
+Несколько файлов логов: каталоги, glob-шаблоны и сжатые CSV (.gz, .zst)
+"""
+
+import glob
+import importlib.util
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from .cache import ParsedLogCache
+from .filters import LogFilter
+from .metrics import collector
+from .parser import LogParser, concat_frames, report_frame
+from .streaming import StreamingAggregator
+from .validation import Quarantine
+
+LOG_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+
+
+def expand_inputs(spec: str) -> List[str]:
+    """Файлы логов для --input: файл, каталог или glob-шаблон (по порядку имён)"""
+    if os.path.isdir(spec):
+        paths = [
+            entry.path
+            for entry in os.scandir(spec)
+            if entry.is_file() and entry.name.endswith(LOG_SUFFIXES)
+        ]
+    elif any(c in spec for c in "*?["):
+        paths = [path for path in glob.glob(spec) if os.path.isfile(path)]
+    else:
+        paths = [spec]
+
+    if any(path.endswith(".zst") for path in paths) and (
+        importlib.util.find_spec("zstandard") is None
+    ):
+        raise ValueError("Для файлов .zst нужен пакет zstandard")
+    return sorted(paths)
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(COMPRESSED_SUFFIXES)
+
+
+class MultiFileParser:
+    """Набор файлов логов с интерфейсом LogParser.
+
+    Файлы разбираются в пуле процессов, но одновременно в работе не больше
+    workers файлов: память ограничена итоговым набором данных и несколькими
+    разбираемыми файлами. С кэшем каждый файл хранится отдельной записью,
+    поэтому при ежедневном запуске заново разбираются только новые файлы.
+    """
+
+    # Статистика не зависит от того, откуда прочитаны данные
+    get_stats = LogParser.get_stats
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        cache: Optional[ParsedLogCache] = None,
+        log_filter: Optional[LogFilter] = None,
+        workers: Optional[int] = None,
+        quarantine: Optional[Quarantine] = None,
+    ):
+        self.paths = list(paths)
+        self.cache = cache
+        self.log_filter = log_filter
+        # Строки, отклонённые в процессах пула, собираются здесь
+        self.quarantine = quarantine if quarantine is not None else Quarantine()
+        self.workers = workers or os.cpu_count() or 1
+        # Пропускная способность по файлам последнего чтения
+        self.file_stats: List[Dict] = []
+
+    def parse_frame(self) -> pd.DataFrame:
+        """Разбор всех файлов и объединение в один DataFrame"""
+        if not self.paths:
+            print("❌ Файлы логов не найдены")
+            return pd.DataFrame()
+
+        try:
+            self.file_stats = []
+            with collector.stage("parser.files") as span:
+                frames = []
+                for df, stats, rejected in self._parse_files():
+                    frames.append(df)
+                    self._add_stats(stats, rejected)
+                df = concat_frames(frames)
+                if span is not None:
+                    span["rows"] = len(df)
+            self._report()
+            report_frame(df)
+            return df
+
+        except (OSError, ValueError) as e:
+            print(f"❌ Ошибка при чтении файлов: {e}")
+            return pd.DataFrame()
+
+    def _parse_files(self) -> List[Tuple[pd.DataFrame, Dict, Quarantine]]:
+        """Результаты _parse_file в порядке путей.
+
+        Записи кэша загружаются в этом процессе: отображённые в память
+        колонки не копируются через пул, в него уходят только промахи.
+        """
+        results = {}
+        for path in self.paths:
+            cached = _load_cached(path, self.cache, self.log_filter)
+            if cached is not None:
+                results[path] = cached
+        jobs = [
+            (path, self.cache, self.log_filter)
+            for path in self.paths
+            if path not in results
+        ]
+        for result in run_bounded(_parse_file, jobs, self.workers):
+            results[result[1]["path"]] = result
+        return [results[path] for path in self.paths]
+
+    def iter_chunks(self, chunk_size: int, offset: int = 0) -> Iterator[pd.DataFrame]:
+        """Последовательное потоковое чтение всех файлов"""
+        if offset:
+            raise ValueError("Смещение поддерживается только для одного файла")
+        for path in self.paths:
+            parser = LogParser(
+                path, log_filter=self.log_filter, quarantine=self.quarantine
+            )
+            yield from parser.iter_chunks(chunk_size)
+
+    def aggregate(
+        self,
+        chunk_size: int,
+        paths: Optional[List[str]] = None,
+        aggregator_cls: Type[StreamingAggregator] = StreamingAggregator,
+    ) -> StreamingAggregator:
+        """Потоковые агрегаты по файлам (все или paths), посчитанные параллельно"""
+        jobs = [
+            (path, chunk_size, self.log_filter, aggregator_cls)
+            for path in (self.paths if paths is None else paths)
+        ]
+        aggregator = aggregator_cls()
+        self.file_stats = []
+        for part, stats, rejected in run_bounded(_aggregate_file, jobs, self.workers):
+            aggregator.merge(part)
+            self._add_stats(stats, rejected)
+        self._report()
+        return aggregator
+
+    def _add_stats(self, stats: Dict, rejected: Quarantine):
+        self.quarantine.merge(rejected)
+        stats["rejected"] = rejected.rejected
+        self.file_stats.append(stats)
+        seconds = max(stats["seconds"], 1e-9)
+        stats["rows_per_s"] = stats["rows"] / seconds
+        stats["mb_per_s"] = stats["bytes"] / 1024**2 / seconds
+
+    def _report(self):
+        """Вывод пропускной способности по файлам и запись в метрики"""
+        for stats in self.file_stats:
+            source = " (кэш)" if stats["cached"] else ""
+            print(
+                f"  {os.path.basename(stats['path'])}: {stats['rows']} строк, "
+                f"{stats['seconds']:.2f} с, {stats['rows_per_s']:,.0f} строк/с, "
+                f"{stats['mb_per_s']:.1f} МБ/с{source}"
+            )
+        collector.record("input_files", self.file_stats)
+
+
+def run_bounded(func: Callable, jobs: List, workers: int) -> Iterator:
+    """Результаты func(job) по порядку заданий.
+
+    В пуле одновременно не больше workers заданий: результаты забираются
+    по мере готовности, а не накапливаются в очереди.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield func(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        pending: deque = deque()
+        for job in jobs:
+            pending.append(pool.submit(func, job))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def ingest_files(
+    parser: MultiFileParser, state_path: str, chunk_size: int
+) -> Tuple[StreamingAggregator, int]:
+    """Агрегаты по новым файлам поверх сохранённого состояния.
+
+    Уже обработанные файлы пропускаются; если какой-то из них изменился
+    или изменились фильтры строк, состояние строится заново.
+    """
+    files = {os.path.abspath(path): _file_signature(path) for path in parser.paths}
+    log_filter = parser.log_filter
+    watermark = {
+        "files": files,
+        "filter": log_filter.key() if log_filter is not None else None,
+    }
+
+    aggregator, done = StreamingAggregator(), {}
+    if os.path.exists(state_path):
+        saved, previous = StreamingAggregator.load(state_path)
+        if _files_unchanged(previous, watermark):
+            aggregator, done = saved, previous["files"]
+
+    new_paths = [path for path in parser.paths if os.path.abspath(path) not in done]
+    rows_before = aggregator.rows
+    if new_paths:
+        aggregator.merge(parser.aggregate(chunk_size, new_paths))
+    skipped = len(parser.paths) - len(new_paths)
+    print(f"✓ Новых файлов: {len(new_paths)}, пропущено: {skipped}")
+
+    # Удалённые из каталога файлы остаются учтёнными в состоянии
+    watermark["files"] = {**done, **files}
+    aggregator.save(state_path, watermark)
+    return aggregator, aggregator.rows - rows_before
+
+
+def _files_unchanged(previous: Dict, current: Dict) -> bool:
+    if "files" not in previous or previous.get("filter") != current["filter"]:
+        return False
+    return all(
+        current["files"].get(path, signature) == signature
+        for path, signature in previous["files"].items()
+    )
+
+
+def _file_signature(path: str) -> Dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _parse_file(job) -> Tuple[pd.DataFrame, Dict, Quarantine]:
+    path, cache, log_filter = job
+    start = time.perf_counter()
+    quarantine = Quarantine(keep=True)
+    parser = LogParser(path, cache=cache, log_filter=log_filter, quarantine=quarantine)
+    df = parser.read()
+    return df, _file_stats(path, len(df), start, parser.from_cache), quarantine
+
+
+def _load_cached(
+    path: str, cache: Optional[ParsedLogCache], log_filter: Optional[LogFilter]
+) -> Optional[Tuple[pd.DataFrame, Dict, Quarantine]]:
+    """То же, что _parse_file, но только при попадании в кэш"""
+    if cache is None:
+        return None
+    start = time.perf_counter()
+    quarantine = Quarantine(keep=True)
+    parser = LogParser(path, cache=cache, log_filter=log_filter, quarantine=quarantine)
+    df = parser.read_cached()
+    if df is None:
+        return None
+    return df, _file_stats(path, len(df), start, True), quarantine
+
+
+def _aggregate_file(job) -> Tuple[StreamingAggregator, Dict, Quarantine]:
+    path, chunk_size, log_filter, aggregator_cls = job
+    start = time.perf_counter()
+    quarantine = Quarantine(keep=True)
+    parser = LogParser(path, log_filter=log_filter, quarantine=quarantine)
+    aggregator = aggregator_cls().consume(parser.iter_chunks(chunk_size))
+    return aggregator, _file_stats(path, aggregator.rows, start, False), quarantine
+
+
+def _file_stats(path: str, rows: int, start: float, cached: bool) -> Dict:
+    return {
+        "path": path,
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - start,
+        "cached": cached,
+    }
@@ -0,0 +1,367 @@
+"""
+Потоковая агрегация логов для CSV, не помещающихся в память
+"""
+
+import hashlib
+import json
+import math
+import os
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Tuple
+
+from .trends import WINDOW_DAYS, daily_table, rolling_windows
+
+
+class StreamingAggregator:
+    """Инкрементальные агрегаты (счётчики, суммы, суммы квадратов) по частям"""
+
+    def __init__(self):
+        self.rows = 0
+        self.start = None
+        self.end = None
+        self.scores = {"count": 0, "sum": 0.0, "sumsq": 0.0, "min": None, "max": None}
+        self.students: Optional[pd.DataFrame] = None
+        self.activities: Optional[pd.DataFrame] = None
+        self.hourly: Optional[pd.Series] = None
+        self.weekday: Optional[pd.Series] = None
+        self.daily: Optional[pd.DataFrame] = None
+        # Скользящие окна и первый день, изменившийся после их расчёта
+        self.windows: Optional[pd.DataFrame] = None
+        self.changed_from: Optional[str] = None
+
+    def consume(self, chunks: Iterable[pd.DataFrame]) -> "StreamingAggregator":
+        """Обработка всех частей потока"""
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def update(self, chunk: pd.DataFrame):
+        """Добавление очередной части логов в агрегаты"""
+        if chunk.empty:
+            return
+
+        self.rows += len(chunk)
+        self.start = _merge_extreme(self.start, chunk["timestamp"].min(), min)
+        self.end = _merge_extreme(self.end, chunk["timestamp"].max(), max)
+
+        # Суммы всегда в float64, независимо от типа хранения оценок
+        score = chunk["score"].astype("float64")
+        scores = score.dropna()
+        if len(scores) > 0:
+            self.scores["count"] += len(scores)
+            self.scores["sum"] += float(scores.sum())
+            self.scores["sumsq"] += float((scores**2).sum())
+            self.scores["min"] = _merge_extreme(self.scores["min"], scores.min(), min)
+            self.scores["max"] = _merge_extreme(self.scores["max"], scores.max(), max)
+
+        with_sq = chunk[["student_id", "activity_type"]].assign(
+            score=score, score_sq=score**2
+        )
+        self._update_students(chunk, with_sq)
+        activities = with_sq.groupby("activity_type", observed=True).agg(
+            score_count=("score", "count"),
+            score_sum=("score", "sum"),
+            score_sumsq=("score_sq", "sum"),
+        )
+        # Категории в частях могут различаться: ключи слияния — обычные строки
+        activities.index = activities.index.astype(object)
+        weekday = chunk["day_of_week"].value_counts()
+        weekday.index = weekday.index.astype(object)
+
+        self.activities = _add(self.activities, activities)
+        self.hourly = _add(self.hourly, chunk["hour"].value_counts())
+        self.weekday = _add(self.weekday, weekday)
+        self._update_daily(daily_table(chunk, students=False))
+
+    def _update_daily(self, daily: pd.DataFrame):
+        """Суммы по дням; запоминается самый ранний затронутый день"""
+        if daily.empty:
+            return
+        self.daily = _add(self.daily, daily)
+        first = min(daily.index.get_level_values("date"))
+        if self.changed_from is None or first < self.changed_from:
+            self.changed_from = first
+
+    def _update_students(self, chunk: pd.DataFrame, with_sq: pd.DataFrame):
+        """Суммы по студентам (объём растёт с числом студентов)"""
+        students = with_sq.groupby("student_id").agg(
+            activity_count=("activity_type", "count"),
+            score_count=("score", "count"),
+            score_sum=("score", "sum"),
+            score_sumsq=("score_sq", "sum"),
+        )
+        self.students = _add_students(self.students, students)
+
+    def merge(self, other: "StreamingAggregator") -> "StreamingAggregator":
+        """Слияние с агрегатами другой части данных (файла, процесса)"""
+        self.rows += other.rows
+        self.start = _merge_extreme(self.start, other.start, min)
+        self.end = _merge_extreme(self.end, other.end, max)
+        for key in ("count", "sum", "sumsq"):
+            self.scores[key] += other.scores[key]
+        for key, func in (("min", min), ("max", max)):
+            self.scores[key] = _merge_extreme(self.scores[key], other.scores[key], func)
+
+        self.students = _add_students(self.students, other.students)
+        for name in ("activities", "hourly", "weekday"):
+            setattr(self, name, _add(getattr(self, name), getattr(other, name)))
+        if other.daily is not None:
+            self._update_daily(other.daily)
+        return self
+
+    def aggregates(self) -> Dict:
+        """Таблицы агрегатов в формате LearningAnalyzer.from_aggregates"""
+        student_table = None
+        if self.students is not None:
+            students = self.students.sort_index()
+            student_table = pd.DataFrame(
+                {
+                    "score": students["score_sum"] / students["score_count"],
+                    "activity_count": students["activity_count"].astype("int64"),
+                }
+            )
+
+        activities = self.activities.sort_index()
+        activity_table = pd.DataFrame(
+            {
+                "avg_score": activities["score_sum"] / activities["score_count"],
+                "count": activities["score_count"].astype("int64"),
+                "std_score": [
+                    _std(*row)
+                    for row in activities[
+                        ["score_count", "score_sum", "score_sumsq"]
+                    ].itertuples(index=False)
+                ],
+            }
+        )
+
+        return {
+            "summary": {
+                "rows": self.rows,
+                "students": self._distinct_students(),
+                "start": self.start,
+                "end": self.end,
+            },
+            "score_stats": self._score_stats(),
+            "students": student_table,
+            "activities": activity_table,
+            "hourly": self.hourly.sort_index().astype("int64"),
+            "weekday": self.weekday.astype("int64"),
+            "daily": self.daily,
+            "windows": self._trend_windows(),
+        }
+
+    def _trend_windows(self) -> Optional[pd.DataFrame]:
+        """Скользящие окна: пересчитываются только дни, затронутые новыми
+        данными (и окна, в которые они входят)"""
+        if self.daily is None:
+            return None
+        if self.windows is None or self.changed_from is not None:
+            self.windows = rolling_windows(
+                self.daily.sort_index(),
+                WINDOW_DAYS,
+                previous=self.windows,
+                changed_from=self.changed_from,
+            )
+            self.changed_from = None
+        return self.windows
+
+    def _distinct_students(self) -> int:
+        return 0 if self.students is None else len(self.students)
+
+    def save(self, path: str, watermark: Dict):
+        """Сохранение состояния агрегатов и отметки прочитанных данных"""
+        state = {
+            "watermark": watermark,
+            "rows": self.rows,
+            "start": None if self.start is None else self.start.isoformat(),
+            "end": None if self.end is None else self.end.isoformat(),
+            "scores": {k: _to_float(v) for k, v in self.scores.items()},
+            "students": _table_to_json(self.students),
+            "activities": _table_to_json(self.activities),
+            "hourly": _table_to_json(self.hourly),
+            "weekday": _table_to_json(self.weekday),
+            "daily": _table_to_json(self.daily),
+            "windows": _table_to_json(self._trend_windows()),
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["StreamingAggregator", Dict]:
+        """Загрузка состояния, сохранённого save()"""
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+
+        aggregator = cls()
+        aggregator.rows = state["rows"]
+        aggregator.start = _ts_from_json(state["start"])
+        aggregator.end = _ts_from_json(state["end"])
+        aggregator.scores = state["scores"]
+        for name in ("students", "activities", "hourly", "weekday"):
+            setattr(aggregator, name, _table_from_json(state[name]))
+        for name in ("daily", "windows"):
+            setattr(aggregator, name, _table_from_json(state.get(name)))
+        return aggregator, state["watermark"]
+
+    def _score_stats(self) -> Optional[Dict]:
+        count = self.scores["count"]
+        if count == 0:
+            return None
+
+        return {
+            "avg": self.scores["sum"] / count,
+            "max": float(self.scores["max"]),
+            "min": float(self.scores["min"]),
+            "std": _std(count, self.scores["sum"], self.scores["sumsq"]),
+        }
+
+
+def _add(total, part):
+    """Слияние частичных агрегатов по ключу"""
+    if total is None:
+        return part
+    if part is None:
+        return total
+    return total.add(part, fill_value=0)
+
+
+def _add_students(total, part):
+    """Слияние сумм по студентам; если в одной из частей student_id — строки,
+    целые идентификаторы другой части тоже приводятся к строкам"""
+    if total is not None and part is not None:
+        if (total.index.dtype == object) != (part.index.dtype == object):
+            total, part = total.rename(index=str), part.rename(index=str)
+    return _add(total, part)
+
+
+def ingest_incremental(
+    parser, state_path: str, chunk_size: int
+) -> Tuple[StreamingAggregator, int]:
+    """Дочитывание дописанных в конец файла строк поверх сохранённого состояния.
+
+    Возвращает агрегатор и число новых строк. Читается только то, что было
+    в файле к началу запуска, до последнего перевода строки: строки,
+    дописанные во время чтения, и недописанная последняя строка остаются
+    следующему запуску. Если файл подменён или укорочен или изменились
+    фильтры строк, состояние строится заново.
+    """
+    size = os.path.getsize(parser.filepath)
+    end = _complete_end(parser.filepath, size)
+    log_filter = getattr(parser, "log_filter", None)
+    watermark = {
+        "path": os.path.abspath(parser.filepath),
+        "offset": end,
+        "head": _head_hash(parser.filepath, end),
+        "filter": log_filter.key() if log_filter is not None else None,
+    }
+
+    aggregator, offset = StreamingAggregator(), 0
+    if os.path.exists(state_path):
+        saved, previous = StreamingAggregator.load(state_path)
+        # Состояние старого формата без дневных таблиц строится заново
+        complete = saved.daily is not None or saved.rows == 0
+        if complete and _watermark_matches(previous, watermark, parser.filepath, size):
+            aggregator, offset = saved, previous["offset"]
+
+    rows_before = aggregator.rows
+    if end > offset:
+        aggregator.consume(parser.iter_chunks(chunk_size, offset=offset, end=end))
+    aggregator.save(state_path, watermark)
+    return aggregator, aggregator.rows - rows_before
+
+
+def _watermark_matches(
+    watermark: Dict, current: Dict, filepath: str, size: int
+) -> bool:
+    return (
+        watermark["path"] == current["path"]
+        and watermark.get("filter") == current["filter"]
+        and watermark["offset"] <= size
+        and watermark["head"] == _head_hash(filepath, watermark["offset"])
+    )
+
+
+def _complete_end(filepath: str, size: int, block: int = 64 * 1024) -> int:
+    """Позиция после последнего перевода строки в первых size байтах"""
+    with open(filepath, "rb") as f:
+        pos = size
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            found = f.read(pos - start).rfind(b"\n")
+            if found >= 0:
+                return start + found + 1
+            pos = start
+    return 0
+
+
+def _head_hash(filepath: str, size: int, limit: int = 64 * 1024) -> str:
+    """Хэш начала файла — признак того, что файл только дописывался"""
+    with open(filepath, "rb") as f:
+        return hashlib.blake2b(f.read(min(size, limit)), digest_size=16).hexdigest()
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+def _ts_from_json(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+def _table_to_json(table) -> Optional[Dict]:
+    """Таблица агрегатов в JSON-совместимый словарь"""
+    if table is None:
+        return None
+
+    state = {"name": table.index.name, "index": table.index.tolist()}
+    if isinstance(table.index, pd.MultiIndex):
+        state["names"] = list(table.index.names)
+    if isinstance(table, pd.DataFrame):
+        state["columns"] = table.columns.tolist()
+        state["data"] = table.to_numpy(dtype="float64").tolist()
+    else:
+        state["data"] = table.tolist()
+    return state
+
+
+def _table_from_json(state: Optional[Dict]):
+    if state is None:
+        return None
+
+    if "names" in state:
+        index = pd.MultiIndex.from_tuples(
+            [tuple(key) for key in state["index"]], names=state["names"]
+        )
+    else:
+        index = pd.Index(state["index"], name=state["name"])
+    if "columns" in state:
+        return pd.DataFrame(state["data"], index=index, columns=state["columns"])
+    return pd.Series(state["data"], index=index)
+
+
+def _merge_extreme(current, value, func):
+    if pd.isna(value):
+        return current
+    if current is None:
+        return value
+    return func(current, value)
+
+
+def _std(count, total, sumsq) -> float:
+    """Выборочное стандартное отклонение (ddof=1) по суммам.
+
+    Считается в рациональной арифметике: для целых оценок суммы точны,
+    и разность sumsq - sum²/n не теряет значащих разрядов.
+    """
+    n = int(count)
+    if n < 2:
+        return np.nan
+    var = (Fraction(sumsq) - Fraction(total) ** 2 / n) / (n - 1)
+    return math.sqrt(max(var, 0))
@@ -0,0 +1,209 @@
+"""
+Индекс логов по студентам для быстрых запросов по одному студенту
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple, Union
+
+from .analyzer import LearningAnalyzer
+from .cache import CACHE_VERSION, DEFAULT_CACHE_DIR, decode_column, encode_column
+
+
+class StudentIndex:
+    """Логи, отсортированные по (student_id, timestamp), по .npy на колонку.
+
+    offsets.npy хранит границы строк каждого студента, поэтому запрос
+    читает через memory-map только его строки. Агрегаты по всей группе
+    (когорте) считаются один раз при построении.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.student_ids = np.load(os.path.join(path, "student_ids.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+
+    @staticmethod
+    def location(
+        filepaths: Union[str, List[str]],
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        variant: str = "",
+    ) -> str:
+        """Папка индекса для исходных файлов (по путям, размерам и mtime).
+
+        variant различает индексы одних файлов с разными фильтрами строк.
+        """
+        if isinstance(filepaths, str):
+            filepaths = [filepaths]
+        parts = []
+        for filepath in filepaths:
+            st = os.stat(filepath)
+            parts.append(f"{os.path.abspath(filepath)}|{st.st_size}|{st.st_mtime_ns}")
+        # Версия кэша: индекс старого формата (типов колонок) строится заново
+        key = "\n".join([str(CACHE_VERSION)] + parts + [variant])
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(cache_dir, f"students-{digest}")
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, path: str) -> "StudentIndex":
+        """Построение индекса по DataFrame от LogParser"""
+        df = df.dropna(subset=["student_id"]).sort_values(
+            ["student_id", "timestamp"], kind="stable", ignore_index=True
+        )
+        ids = df["student_id"].to_numpy()
+        if ids.dtype == object:
+            ids = ids.astype(str)
+        student_ids, starts = np.unique(ids, return_index=True)
+
+        tmp = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        columns = []
+        for name in df.columns:
+            encoded = encode_column(df[name])
+            if encoded is None:
+                continue
+            spec, array = encoded
+            np.save(os.path.join(tmp, f"{len(columns)}.npy"), array)
+            columns.append(dict(spec, name=name))
+
+        np.save(os.path.join(tmp, "student_ids.npy"), student_ids)
+        np.save(os.path.join(tmp, "offsets.npy"), np.r_[starts, len(df)])
+        cohort, cohort_scores = cohort_summary(df)
+        np.save(os.path.join(tmp, "cohort_scores.npy"), cohort_scores)
+        meta = {"columns": columns, "cohort": cohort}
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return cls(path)
+
+    @classmethod
+    def open_or_build(
+        cls, parser, cache_dir: str = DEFAULT_CACHE_DIR, rebuild: bool = False
+    ) -> Optional["StudentIndex"]:
+        """Готовый индекс для файла парсера или новый (с полным разбором)"""
+        log_filter = getattr(parser, "log_filter", None)
+        variant = log_filter.key() if log_filter is not None else ""
+        filepaths = getattr(parser, "paths", None) or parser.filepath
+        path = cls.location(filepaths, cache_dir, variant)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path) and not rebuild:
+            # Отметка использования для вытеснения из кэша по LRU
+            os.utime(meta_path)
+            return cls(path)
+
+        df = parser.parse_frame()
+        if df.empty:
+            return None
+        return cls.build(df, path)
+
+    def _key(self, student_id):
+        return _student_key(student_id, self.student_ids.dtype.kind == "U")
+
+    def student_rows(self, student_id) -> Optional[pd.DataFrame]:
+        """Строки одного студента в порядке времени или None"""
+        key = self._key(student_id)
+        if key is None:
+            return None
+        pos = np.searchsorted(self.student_ids, key)
+        if pos >= len(self.student_ids) or self.student_ids[pos] != key:
+            return None
+
+        start, stop = self.offsets[pos], self.offsets[pos + 1]
+        data = {}
+        for i, spec in enumerate(self.meta["columns"]):
+            array = np.load(os.path.join(self.path, f"{i}.npy"), mmap_mode="r")
+            data[spec["name"]] = decode_column(np.array(array[start:stop]), spec)
+        return pd.DataFrame(data)
+
+    def analyze_student(self, student_id) -> Optional[Dict]:
+        """Путь обучения студента и сравнение с когортой"""
+        rows = self.student_rows(student_id)
+        if rows is None:
+            return None
+        student_id = self._key(student_id)
+
+        cohort_scores = np.load(os.path.join(self.path, "cohort_scores.npy"))
+        return student_report(student_id, rows, self.meta["cohort"], cohort_scores)
+
+
+def analyze_student_frame(df: pd.DataFrame, student_id) -> Optional[Dict]:
+    """Путь студента по DataFrame в памяти, без индекса на диске (--no-cache)"""
+    if df.empty:
+        return None
+    ids = df["student_id"]
+    key = _student_key(student_id, not pd.api.types.is_integer_dtype(ids))
+    if key is None:
+        return None
+    rows = df[(ids == key).to_numpy()]
+    if rows.empty:
+        return None
+
+    rows = rows.sort_values("timestamp", kind="stable", ignore_index=True)
+    return student_report(key, rows, *cohort_summary(df))
+
+
+def _student_key(student_id, strings: bool):
+    """student_id в типе идентификаторов данных (из CLI — всегда строка)"""
+    if strings:
+        return str(student_id)
+    if str(student_id).lstrip("-").isdigit():
+        return int(student_id)
+    return None
+
+
+def student_report(
+    student_id, rows: pd.DataFrame, cohort: Dict, cohort_scores: np.ndarray
+) -> Dict:
+    """Последовательность активностей, траектория оценок и сравнение"""
+    columns = [
+        col
+        for col in ["timestamp", "activity_type", "activity_name", "score"]
+        if col in rows.columns
+    ]
+    rows = rows.assign(score=rows["score"].astype("float64"))
+    scored = rows.dropna(subset=["score"])
+    trajectory = scored[["timestamp", "score"]].assign(
+        running_avg=scored["score"].expanding().mean()
+    )
+
+    avg_score = float(scored["score"].mean()) if len(scored) else None
+    percentile = None
+    if avg_score is not None and len(cohort_scores):
+        rank = np.searchsorted(cohort_scores, avg_score, side="right")
+        percentile = float(rank / len(cohort_scores) * 100)
+
+    return {
+        "student_id": student_id,
+        "activity_sequence": rows[columns].to_dict("records"),
+        "score_trajectory": trajectory.to_dict("records"),
+        "comparison": {
+            "activity_count": len(rows),
+            "cohort_avg_activities": cohort["avg_activities_per_student"],
+            "avg_score": avg_score,
+            "cohort_avg_score": cohort["avg_score"],
+            "score_percentile": percentile,
+        },
+    }
+
+
+def cohort_summary(df: pd.DataFrame) -> Tuple[Dict, np.ndarray]:
+    """Сводка по когорте и отсортированные средние баллы студентов"""
+    stats = LearningAnalyzer(df).get_basic_stats()
+    summary = {
+        "students": stats["total_students"],
+        "avg_activities_per_student": stats["avg_activities_per_student"],
+        "avg_score": stats.get("score_stats", {}).get("avg"),
+    }
+    means = df["score"].astype("float64").groupby(df["student_id"]).mean().dropna()
+    return summary, np.sort(means.to_numpy(dtype="float64"))
@@ -0,0 +1,288 @@
+"""
+Динамика по времени: скользящие окна по дням и кривые когорт по неделе начала
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+WINDOW_DAYS = 7
+COHORT_WEEKS = 12
+# Разрезы динамики помимо общего ("all", "all")
+DIMENSIONS = ("course_id", "activity_type")
+DAILY_COLUMNS = ["events", "score_count", "score_sum"]
+INDEX_NAMES = ["dimension", "value", "date"]
+
+
+def daily_table(df: pd.DataFrame, students: bool = True) -> pd.DataFrame:
+    """Суммы по дням в каждом разрезе: индекс (dimension, value, date).
+
+    date — строка YYYY-MM-DD, поэтому таблицы частей складываются через
+    _add и сохраняются в JSON без преобразований. events, score_count и
+    score_sum аддитивны; active_students (различные студенты за день)
+    считается только по целым данным (students=True).
+
+    Ключ «разрез × день» — целое число, суммы считаются через bincount,
+    различные студенты — через np.unique пар (ключ, студент).
+    """
+    days, valid = _day_numbers(df["timestamp"])
+    if not valid.any():
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+
+    days = days[valid]
+    first_day = days.min()
+    n_days = int(days.max() - first_day) + 1
+    scores = df["score"].to_numpy("float64", na_value=np.nan)[valid]
+    student_codes = None
+    if students:
+        student_codes = pd.factorize(df["student_id"])[0][valid]
+
+    frames = []
+    for dimension in ("all",) + DIMENSIONS:
+        if dimension == "all":
+            codes, values = np.zeros(len(days), dtype="int64"), ["all"]
+        elif dimension in df.columns:
+            codes, values = pd.factorize(df[dimension])
+            codes = codes[valid]
+        else:
+            continue
+        known = codes >= 0
+        keys = codes[known].astype("int64") * n_days + (days[known] - first_day)
+        table = _daily_sums(
+            keys,
+            len(values) * n_days,
+            scores[known],
+            None if student_codes is None else student_codes[known],
+        )
+        present = np.flatnonzero(table["events"].to_numpy() > 0)
+        table = table.iloc[present]
+        table.index = pd.MultiIndex.from_arrays(
+            [
+                np.full(len(present), dimension, dtype=object),
+                np.asarray([str(v) for v in values], dtype=object)[present // n_days],
+                _day_strings(first_day + present % n_days),
+            ],
+            names=INDEX_NAMES,
+        )
+        frames.append(table)
+    return pd.concat(frames)
+
+
+def _daily_sums(keys, size, scores, students) -> pd.DataFrame:
+    """Суммы по ключу «код значения × число дней + день» для всех size ключей"""
+    scored = ~np.isnan(scores)
+    columns = {
+        "events": np.bincount(keys, minlength=size),
+        "score_count": np.bincount(keys[scored], minlength=size),
+        "score_sum": np.bincount(keys[scored], scores[scored], minlength=size),
+    }
+    if students is not None and len(students):
+        n_students = int(students.max()) + 1
+        pairs = np.unique(keys * n_students + students)
+        columns["active_students"] = np.bincount(pairs // n_students, minlength=size)
+    return pd.DataFrame(columns, dtype="float64")
+
+
+def rolling_windows(
+    daily: pd.DataFrame,
+    window: int = WINDOW_DAYS,
+    previous: Optional[pd.DataFrame] = None,
+    changed_from: Optional[str] = None,
+) -> pd.DataFrame:
+    """Суммы за последние window дней для каждого дня каждого разреза.
+
+    Таблица разворачивается в матрицу «день × разрез», пропущенные дни
+    заполняются нулями, и rolling считает все разрезы одним проходом.
+    Если передано предыдущее окно и changed_from (первый изменившийся
+    день), пересчитываются только окна, содержащие дни с changed_from.
+    """
+    if daily.empty:
+        return pd.DataFrame()
+
+    wide = daily.unstack(["dimension", "value"], fill_value=0)
+    wide.index = pd.to_datetime(wide.index)
+    wide = wide.reindex(
+        pd.date_range(wide.index.min(), wide.index.max(), freq="D"), fill_value=0
+    )
+
+    first = None
+    if previous is not None and not previous.empty and changed_from is not None:
+        first = pd.Timestamp(changed_from)
+        context = first - pd.Timedelta(days=window - 1)
+        wide = wide.loc[context:]
+
+    rolled = wide.rolling(window, min_periods=1).sum()
+    if "active_students" in daily.columns:
+        # Различных студентов за окно без сырых данных не сложить: среднее за день
+        rolled["active_students"] = (
+            wide["active_students"].rolling(window, min_periods=1).mean()
+        )
+    if first is not None:
+        rolled = rolled.loc[first:]
+
+    windows = rolled.stack(["dimension", "value"], future_stack=True)
+    windows.index = windows.index.set_levels(
+        windows.index.levels[0].strftime("%Y-%m-%d"), level=0
+    )
+    windows = windows.reorder_levels([1, 2, 0]).rename_axis(INDEX_NAMES)
+    # Окна без событий не хранятся: разрез, появившийся позже, не получает
+    # нулевых строк за прошлые дни ни при полном, ни при частичном пересчёте
+    windows = windows[windows["events"] > 0]
+    if first is not None:
+        kept = previous[previous.index.get_level_values("date") < changed_from]
+        windows = pd.concat([kept, windows])
+    return windows.sort_index()
+
+
+def weekly_table(daily: pd.DataFrame) -> pd.DataFrame:
+    """Суммы по неделям (с понедельника) из дневной таблицы"""
+    dates = pd.to_datetime(daily.index.get_level_values("date"))
+    weeks = (dates - pd.to_timedelta(dates.weekday, unit="D")).strftime("%Y-%m-%d")
+    columns = [c for c in DAILY_COLUMNS if c in daily.columns]
+    return (
+        daily[columns]
+        .groupby(
+            [
+                daily.index.get_level_values("dimension"),
+                daily.index.get_level_values("value"),
+                pd.Index(weeks, name="week"),
+            ]
+        )
+        .sum()
+    )
+
+
+def cohort_table(df: pd.DataFrame, max_weeks: int = COHORT_WEEKS) -> pd.DataFrame:
+    """Кривые когорт: индекс (cohort, week), когорта — неделя первого события.
+
+    active_students — сколько студентов когорты были активны на неделе
+    week от начала, retention — их доля, avg_score — средний балл за неделю.
+    """
+    days, valid = _day_numbers(df["timestamp"])
+    students, _ = pd.factorize(df["student_id"])
+    valid &= students >= 0
+    days, students = days[valid], students[valid]
+    scores = df["score"].to_numpy("float64", na_value=np.nan)[valid]
+    if len(days) == 0:
+        return pd.DataFrame()
+
+    # Понедельник недели: 1970-01-01 — четверг
+    weeks = days - (days + 3) % 7
+    n_students = students.max() + 1
+    first_week = np.full(n_students, weeks.max())
+    np.minimum.at(first_week, students, weeks)
+    cohort_weeks, cohorts = np.unique(first_week, return_inverse=True)
+    offsets = (weeks - first_week[students]) // 7
+    keep = offsets < max_weeks
+
+    keys = cohorts[students[keep]] * max_weeks + offsets[keep]
+    size = len(cohort_weeks) * max_weeks
+    pairs = np.unique(students[keep] * max_weeks + offsets[keep])
+    active = np.bincount(
+        cohorts[pairs // max_weeks] * max_weeks + pairs % max_weeks, minlength=size
+    )
+    scored = ~np.isnan(scores[keep])
+    score_count = np.bincount(keys[scored], minlength=size)
+    score_sum = np.bincount(keys[scored], scores[keep][scored], minlength=size)
+    cohort_size = np.bincount(cohorts, minlength=len(cohort_weeks))
+
+    present = np.flatnonzero(active > 0)
+    cohort_of = present // max_weeks
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame(
+            {
+                "active_students": active[present],
+                "avg_score": score_sum[present] / score_count[present],
+                "cohort_size": cohort_size[cohort_of],
+                "retention": active[present] / cohort_size[cohort_of],
+            },
+            index=pd.MultiIndex.from_arrays(
+                [_day_strings(cohort_weeks[cohort_of]), present % max_weeks],
+                names=["cohort", "week"],
+            ),
+        )
+
+
+def trend_table(
+    daily: pd.DataFrame, windows: pd.DataFrame, window: int = WINDOW_DAYS
+) -> pd.DataFrame:
+    """Показатели дня и скользящего окна: индекс (dimension, value, date)"""
+    suffix = f"_{window}d"
+    days = windows.add_suffix(suffix).join(daily.add_suffix("_day"))
+    days = days.fillna({f"{column}_day": 0 for column in daily.columns})
+    columns = {
+        "events": days["events_day"],
+        "avg_score": _ratio(days["score_sum_day"], days["score_count_day"]),
+        f"events{suffix}": days[f"events{suffix}"],
+        f"avg_score{suffix}": _ratio(
+            days[f"score_sum{suffix}"], days[f"score_count{suffix}"]
+        ),
+    }
+    if "active_students" in daily.columns:
+        columns["active_students"] = days["active_students_day"]
+        columns[f"active_students{suffix}"] = days[f"active_students{suffix}"]
+    return pd.DataFrame(columns, index=days.index)
+
+
+def trend_summary(
+    daily: pd.DataFrame,
+    windows: pd.DataFrame,
+    cohorts: Optional[pd.DataFrame],
+    window: int = WINDOW_DAYS,
+) -> Dict:
+    """Ряды по дням (со скользящим окном), по неделям и кривые когорт"""
+    if daily.empty:
+        return {}
+
+    days = trend_table(daily, windows, window)
+    weeks = weekly_table(daily)
+    weeks = pd.DataFrame(
+        {
+            "events": weeks["events"],
+            "avg_score": _ratio(weeks["score_sum"], weeks["score_count"]),
+        }
+    )
+
+    result = {
+        "window_days": window,
+        "daily": _series(days, "date"),
+        "weekly": _series(weeks, "week"),
+    }
+    if cohorts is not None and not cohorts.empty:
+        result["cohorts"] = {
+            cohort: _records(group.droplevel("cohort"), "week")
+            for cohort, group in cohorts.groupby(level="cohort")
+        }
+    return result
+
+
+def _day_numbers(timestamps: pd.Series):
+    """Номер дня от 1970-01-01 и маска строк с заданным временем"""
+    values = timestamps.to_numpy("datetime64[ns]")
+    valid = ~np.isnat(values)
+    return values.astype("datetime64[D]").astype("int64"), valid
+
+
+def _day_strings(days: np.ndarray) -> np.ndarray:
+    """Номера дней в строки YYYY-MM-DD (форматируются только различные)"""
+    unique, inverse = np.unique(days, return_inverse=True)
+    labels = np.datetime_as_string(unique.astype("datetime64[D]"))
+    return labels.astype(object)[inverse]
+
+
+def _ratio(total: pd.Series, count: pd.Series) -> pd.Series:
+    return total / count.where(count > 0)
+
+
+def _series(table: pd.DataFrame, key: str) -> Dict[str, Dict[str, list]]:
+    """{разрез: {значение: [записи по времени]}}"""
+    result: Dict[str, Dict[str, list]] = {}
+    for (dimension, value), group in table.groupby(level=["dimension", "value"]):
+        rows = group.droplevel(["dimension", "value"])
+        result.setdefault(dimension, {})[value] = _records(rows, key)
+    return result
+
+
+def _records(table: pd.DataFrame, key: str) -> list:
+    table = table.astype("float64").replace({np.nan: None})
+    return table.rename_axis(key).reset_index().to_dict("records")
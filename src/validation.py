@@ -0,0 +1,225 @@
+"""
+Проверка строк логов целыми колонками и карантин отклонённых строк
+"""
+
+import os
+from collections import Counter
+
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import collector
+from .schema import CSV_DTYPES
+
+SCORE_RANGE = (0, 100)
+QUARANTINE_FILE = "quarantine.csv"
+# Исходные колонки в файле карантина (прочие колонки CSV не сохраняются)
+RAW_COLUMNS = [
+    "student_id",
+    "activity_type",
+    "activity_name",
+    "course_id",
+    "timestamp",
+    "score",
+    "duration_minutes",
+]
+# row — номер записи данных с нуля (без заголовка; при --incremental — от
+# начала дочитанной части), raw_line — поля строки с неверным числом полей
+QUARANTINE_COLUMNS = ["source", "row", "reason", "raw_line"] + RAW_COLUMNS
+# Строка CSV с неверным числом полей (перехватывается при чтении)
+BAD_LINE = "bad_line"
+
+
+def validate_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Проверка и приведение к типам схемы части CSV без циклов по строкам.
+
+    Числовые колонки читаются без заданного типа: у чистых данных pandas
+    сам выводит int64/float64, а при мусоре — object, и тогда значения
+    приводятся через to_numeric. Возвращает корректные строки в типах
+    schema.CSV_DTYPES и отклонённые строки в исходном виде с колонкой
+    reason (причины через «;»: student_id — пустой идентификатор,
+    activity_type, timestamp, score, score_range, duration_minutes,
+    duration_range).
+    """
+    columns, checks = _check_columns(df)
+    bad = None
+    for mask in checks.values():
+        bad = mask if bad is None else bad | mask
+
+    if bad is None or not bad.any():
+        for name, values in columns.items():
+            df[name] = values
+        return df, df.iloc[:0]
+
+    good = (~bad).to_numpy()
+    rejected = df[bad.to_numpy()].copy()
+    reasons = pd.Series("", index=rejected.index)
+    for name, mask in checks.items():
+        hit = mask[bad].to_numpy()
+        reasons[hit] = reasons[hit] + name + ";"
+    rejected["reason"] = reasons.str.rstrip(";")
+
+    df = df[good].copy()
+    for name, values in columns.items():
+        df[name] = values[good]
+    return df, rejected
+
+
+def _check_columns(df: pd.DataFrame):
+    """Приведённые колонки (до отбора строк) и маски ошибок по причинам"""
+    columns = {}
+    checks = {}
+
+    columns["student_id"] = _student_ids(df["student_id"])
+    checks["student_id"] = df["student_id"].isna()
+
+    checks["activity_type"] = df["activity_type"].isna()
+
+    timestamps = _timestamps(df["timestamp"])
+    checks["timestamp"] = timestamps.isna()
+    columns["timestamp"] = timestamps
+
+    scores = _numeric(df["score"])
+    checks["score"] = scores.isna() & df["score"].notna()
+    checks["score_range"] = (scores < SCORE_RANGE[0]) | (scores > SCORE_RANGE[1])
+    columns["score"] = scores.astype(CSV_DTYPES["score"])
+
+    if "duration_minutes" in df.columns:
+        durations = _numeric(df["duration_minutes"])
+        checks["duration_minutes"] = durations.isna() & df["duration_minutes"].notna()
+        checks["duration_range"] = durations < 0
+        columns["duration_minutes"] = durations.astype(CSV_DTYPES["duration_minutes"])
+    return columns, checks
+
+
+def _student_ids(ids: pd.Series) -> pd.Series:
+    """int64, если все идентификаторы целые, иначе строки"""
+    if pd.api.types.is_integer_dtype(ids):
+        return ids
+    students = _numeric(ids)
+    present = ids.notna()
+    if (students.notna() == present).all() and (students[present] % 1 == 0).all():
+        return students.fillna(-1).astype("int64")
+    return ids.astype(str).where(present)
+
+
+def _numeric(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _timestamps(values: pd.Series) -> pd.Series:
+    """Разбор времени: формат выводится по первому значению, а строки,
+    не подошедшие под него, разбираются повторно по отдельности"""
+    parsed = pd.to_datetime(values, errors="coerce")
+    failed = parsed.isna() & values.notna()
+    if failed.any():
+        retry = pd.to_datetime(values[failed], format="mixed", errors="coerce")
+        parsed[failed] = retry
+    return parsed
+
+
+def bad_line_frame(lines: List[List[str]], rows) -> pd.DataFrame:
+    """Строки CSV с неверным числом полей в формате отклонённых строк"""
+    return pd.DataFrame(
+        {"reason": BAD_LINE, "raw_line": [",".join(fields) for fields in lines]},
+        index=rows,
+    )
+
+
+class Quarantine:
+    """Счётчики проверки и отклонённые строки.
+
+    path — CSV карантина, дописывается по мере разбора частей (при
+    append=False файл прошлого запуска заменяется); keep — хранить
+    отклонённые строки в памяти, чтобы передать их из процесса пула.
+    Без path и keep считаются только счётчики.
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, append: bool = False, keep: bool = False
+    ):
+        self.path = path
+        self.append = append
+        self.keep = keep
+        self.rows = 0
+        self.rejected = 0
+        self.reasons: Counter = Counter()
+        self.frames: List[pd.DataFrame] = []
+        self._written = False
+
+    def add(self, source: str, rows: int, rejected: pd.DataFrame):
+        """Учёт проверенной части: rows строк, из них rejected отклонены"""
+        self.rows += rows
+        if rejected.empty:
+            return
+
+        self.rejected += len(rejected)
+        for reason in rejected["reason"]:
+            self.reasons.update(reason.split(";"))
+        frame = rejected.reindex(columns=QUARANTINE_COLUMNS)
+        frame["source"] = source
+        frame["row"] = rejected.index
+        self._store(frame)
+
+    def merge(self, other: "Quarantine"):
+        """Учёт результатов другого Quarantine (например, из процесса пула)"""
+        self.rows += other.rows
+        self.rejected += other.rejected
+        self.reasons.update(other.reasons)
+        for frame in other.frames:
+            self._store(frame)
+
+    def state(self) -> Dict:
+        """Счётчики для сохранения вместе с записью кэша"""
+        return {
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "reasons": dict(self.reasons),
+        }
+
+    def restore(self, state: Dict, frame: Optional[pd.DataFrame] = None):
+        """Учёт счётчиков и строк, сохранённых state() (попадание в кэш)"""
+        self.rows += state["rows"]
+        self.rejected += state["rejected"]
+        self.reasons.update(state["reasons"])
+        if frame is not None:
+            self._store(frame)
+
+    def _store(self, frame: pd.DataFrame):
+        if self.keep:
+            self.frames.append(frame)
+        if self.path is None:
+            return
+
+        header = not self._written and not (self.append and os.path.exists(self.path))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        frame.to_csv(self.path, mode="w" if header else "a", header=header, index=False)
+        self._written = True
+
+    def summary(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "error_rate": self.rejected / self.rows if self.rows else 0.0,
+            "reasons": dict(self.reasons.most_common()),
+        }
+
+    def report(self):
+        """Доли ошибок в metrics.json и предупреждение об отклонённых строках"""
+        summary = self.summary()
+        collector.record("validation", summary)
+        if self.rejected == 0:
+            # Карантин прошлого запуска не относится к текущим данным
+            if self.path and not self.append and os.path.exists(self.path):
+                os.remove(self.path)
+            return
+
+        reasons = ", ".join(f"{k}: {v}" for k, v in summary["reasons"].items())
+        print(
+            f"⚠ Отклонено строк: {self.rejected} из {self.rows} "
+            f"({summary['error_rate']:.2%}; {reasons})"
+        )
+        if self.path:
+            print(f"⚠ Отклонённые строки с причинами: {self.path}")
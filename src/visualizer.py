@@ -2,125 +2,349 @@
 Визуализация результатов
 """
 
-import matplotlib.pyplot as plt
-import pandas as pd
-from typing import Dict
+import hashlib
+import json
+import math
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+PLOT_FORMATS = ("png", "svg", "json")
+MANIFEST = ".plots.json"
+DPI = 150
+# Рядов на линейном графике динамики (остальные разрезы не рисуются)
+MAX_SERIES = 6
+# Подписей по оси дат на линейном графике
+MAX_TICKS = 10
 
 
 class ResultVisualizer:
-    def __init__(self, results: Dict):
+    def __init__(self, results: Dict, fmt: str = "png", workers: int = 1):
+        if fmt not in PLOT_FORMATS:
+            raise ValueError(f"Неизвестный формат графиков: {fmt}")
         self.results = results
+        self.fmt = fmt
+        self.workers = workers
 
     def create_plots(self, output_dir: str):
         """Создание всех графиков"""
+        render_reports({output_dir: self.results}, self.fmt, self.workers)
+        print(f"✓ Графики сохранены в {output_dir}/")
+
+    def chart_specs(self) -> Dict[str, Dict]:
+        """Описания графиков (данные, подписи) без отрисовки"""
+        builders = {
+            # 1. Распределение оценок
+            "score_distribution": _score_distribution_spec,
+            # 2. Эффективность активностей
+            "activity_effectiveness": _activity_effectiveness_spec,
+            # 3. Временные паттерны
+            "time_patterns": _time_patterns_spec,
+            # 4. Динамика по дням в скользящем окне
+            "trends": _trends_spec,
+            # 5. Кривые удержания когорт
+            "cohorts": _cohorts_spec,
+        }
+        specs = {}
+        for name, builder in builders.items():
+            spec = builder(self.results)
+            if spec is not None:
+                specs[name] = spec
+        return specs
+
+
+def render_reports(reports: Dict[str, Dict], fmt: str = "png", workers: int = 1):
+    """Отрисовка графиков для нескольких отчётов {папка: результаты}.
+
+    Графики, входные данные которых не изменились с прошлой отрисовки
+    (по хэшу в .plots.json), пропускаются; остальные рисуются в пуле
+    процессов. Возвращает число отрисованных графиков.
+    """
+    jobs = []
+    manifests = {}
+    for output_dir, results in reports.items():
         os.makedirs(output_dir, exist_ok=True)
+        manifest = _load_manifest(output_dir)
+        manifests[output_dir] = manifest
+        for name, spec in ResultVisualizer(results, fmt).chart_specs().items():
+            filename = f"{name}.{fmt}"
+            digest = _spec_hash(spec, fmt)
+            path = os.path.join(output_dir, filename)
+            if manifest.get(filename) == digest and os.path.exists(path):
+                continue
+            manifest[filename] = digest
+            jobs.append((spec, path, fmt))
 
-        # 1. Распределение оценок
-        if "student_performance" in self.results:
-            self._plot_score_distribution(output_dir)
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            list(pool.map(_render_job, jobs))
+    else:
+        for job in jobs:
+            _render_job(job)
 
-        # 2. Эффективность активностей
-        if "activity_effectiveness" in self.results:
-            self._plot_activity_effectiveness(output_dir)
+    for output_dir, manifest in manifests.items():
+        with open(os.path.join(output_dir, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    return len(jobs)
 
-        # 3. Временные паттерны
-        if "time_patterns" in self.results:
-            self._plot_time_patterns(output_dir)
 
-        print(f"✓ Графики сохранены в {output_dir}/")
+def _render_job(job):
+    spec, path, fmt = job
+    if fmt == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(spec, f, ensure_ascii=False, indent=2)
+    else:
+        render_figure(spec, path, fmt)
+
+
+def render_figure(spec: Dict, path: str, fmt: str = "png"):
+    """Отрисовка описания графика через объектный API Agg (без pyplot)"""
+    # matplotlib загружается только при отрисовке: запуски без графиков
+    # и с --plot-format json стартуют без него
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=spec["figsize"])
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(1, len(spec["panels"]), squeeze=False)[0]
+
+    for ax, panel in zip(axes, spec["panels"]):
+        _draw_panel(ax, panel)
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=DPI, format=fmt)
+
+
+def _draw_panel(ax, panel: Dict):
+    if panel.get("kind") == "line":
+        _draw_lines(ax, panel)
+        return
+
+    x = panel["x"]
+    y = [math.nan if v is None else v for v in panel["y"]]
+    numeric_x = all(isinstance(v, (int, float)) for v in x)
+    positions = x if numeric_x else list(range(len(x)))
+    bars = ax.bar(positions, y)
+
+    ax.set_title(panel["title"])
+    ax.set_xlabel(panel["xlabel"])
+    ax.set_ylabel(panel["ylabel"])
+    if not numeric_x:
+        ax.set_xticks(positions)
+        rotation = panel.get("xtick_rotation", 0)
+        ax.set_xticklabels(x, rotation=rotation, ha="right" if rotation else "center")
+
+    # Подписи над столбцами
+    for bar, label in zip(bars, panel.get("bar_labels") or []):
+        height = bar.get_height()
+        if math.isnan(height):
+            continue
+        ax.text(
+            bar.get_x() + bar.get_width() / 2.0,
+            height + panel.get("label_offset", 0),
+            label,
+            ha="center",
+            va="bottom",
+            fontsize=panel.get("label_fontsize"),
+        )
+
+
+def _draw_lines(ax, panel: Dict):
+    """Несколько рядов на общей оси x; подписи x прореживаются"""
+    x = panel["x"]
+    positions = list(range(len(x)))
+    for series in panel["series"]:
+        y = [math.nan if v is None else v for v in series["y"]]
+        ax.plot(positions, y, label=series["label"])
+
+    ax.set_title(panel["title"])
+    ax.set_xlabel(panel["xlabel"])
+    ax.set_ylabel(panel["ylabel"])
+    step = max(1, math.ceil(len(x) / MAX_TICKS))
+    ax.set_xticks(positions[::step])
+    rotation = panel.get("xtick_rotation", 0)
+    ax.set_xticklabels(
+        x[::step], rotation=rotation, ha="right" if rotation else "center"
+    )
+    if len(panel["series"]) > 1:
+        ax.legend(fontsize=8)
+
+
+def _score_distribution_spec(results: Dict) -> Optional[Dict]:
+    """График распределения оценок"""
+    perf_data = results.get("student_performance") or {}
+    if "performance_distribution" not in perf_data:
+        return None
+
+    distribution = perf_data["performance_distribution"]
+    return {
+        "figsize": [10, 6],
+        "panels": [
+            {
+                "title": "Распределение студентов по успеваемости",
+                "xlabel": "Уровень успеваемости",
+                "ylabel": "Количество студентов",
+                "x": [str(k) for k in distribution],
+                "y": [_number(v) for v in distribution.values()],
+                "bar_labels": [f"{int(v)}" for v in distribution.values()],
+            }
+        ],
+    }
+
+
+def _activity_effectiveness_spec(results: Dict) -> Optional[Dict]:
+    """График эффективности активностей"""
+    activities = results.get("activity_effectiveness")
+    if not activities:
+        return None
+
+    return {
+        "figsize": [12, 6],
+        "panels": [
+            {
+                "title": "Эффективность типов активностей",
+                "xlabel": "Тип активности",
+                "ylabel": "Средний балл",
+                "x": [str(a["activity_type"]) for a in activities],
+                "y": [_number(a["avg_score"]) for a in activities],
+                "xtick_rotation": 45,
+                # Добавление количества
+                "bar_labels": [f"n={a['count']}" for a in activities],
+                "label_offset": 1,
+                "label_fontsize": 9,
+            }
+        ],
+    }
+
+
+def _time_patterns_spec(results: Dict) -> Optional[Dict]:
+    """График временных паттернов"""
+    time_data = results.get("time_patterns") or {}
+    if "weekday_distribution" not in time_data:
+        return None
+
+    # График 1: Дни недели
+    weekdays = time_data["weekday_distribution"]
+    panels: List[Dict] = [
+        {
+            "title": "Активность по дням недели",
+            "xlabel": "День недели",
+            "ylabel": "Количество активностей",
+            "x": list(weekdays.keys()),
+            "y": [_number(v) for v in weekdays.values()],
+            "xtick_rotation": 45,
+        }
+    ]
+
+    # График 2: Часы пик
+    if "peak_hours" in time_data:
+        panels.append(
+            {
+                "title": "Часы наибольшей активности",
+                "xlabel": "Час дня",
+                "ylabel": "Количество активностей",
+                "x": [int(h) for h in time_data["peak_hours"]["hours"]],
+                "y": [_number(c) for c in time_data["peak_hours"]["counts"]],
+            }
+        )
+
+    return {"figsize": [15, 6], "panels": panels}
+
+
+def _trends_spec(results: Dict) -> Optional[Dict]:
+    """Графики событий и среднего балла в скользящем окне по курсам"""
+    trends = results.get("trends") or {}
+    daily = trends.get("daily") or {}
+    # По курсам, если они есть в логах, иначе по типам активностей
+    groups = daily.get("course_id") or daily.get("activity_type") or daily.get("all")
+    if not groups:
+        return None
+
+    # Разрезы с наибольшим числом событий
+    largest = sorted(
+        groups, key=lambda value: -sum(row["events"] for row in groups[value])
+    )[:MAX_SERIES]
+    dates = sorted({row["date"] for value in largest for row in groups[value]})
+    window = trends["window_days"]
+
+    panels = []
+    for column, title, ylabel in (
+        (f"events_{window}d", "События", "Количество активностей"),
+        (f"avg_score_{window}d", "Средний балл", "Средний балл"),
+    ):
+        panels.append(
+            {
+                "kind": "line",
+                "title": f"{title} за {window} дней",
+                "xlabel": "Дата",
+                "ylabel": ylabel,
+                "x": dates,
+                "series": [
+                    {
+                        "label": str(value),
+                        "y": _aligned(groups[value], "date", dates, column),
+                    }
+                    for value in largest
+                ],
+                "xtick_rotation": 45,
+            }
+        )
+    return {"figsize": [15, 6], "panels": panels}
+
+
+def _cohorts_spec(results: Dict) -> Optional[Dict]:
+    """Кривые удержания и среднего балла когорт по неделям от начала"""
+    cohorts = (results.get("trends") or {}).get("cohorts")
+    if not cohorts:
+        return None
+
+    # Последние когорты: на графике читается не больше MAX_SERIES кривых
+    names = sorted(cohorts)[-MAX_SERIES:]
+    weeks = sorted({int(row["week"]) for name in names for row in cohorts[name]})
+    panels = []
+    for column, title, ylabel in (
+        ("retention", "Удержание когорт", "Доля активных студентов"),
+        ("avg_score", "Средний балл когорт", "Средний балл"),
+    ):
+        panels.append(
+            {
+                "kind": "line",
+                "title": title,
+                "xlabel": "Неделя от начала",
+                "ylabel": ylabel,
+                "x": [str(w) for w in weeks],
+                "series": [
+                    {"label": name, "y": _aligned(cohorts[name], "week", weeks, column)}
+                    for name in names
+                ],
+            }
+        )
+    return {"figsize": [15, 6], "panels": panels}
+
+
+def _aligned(rows: List[Dict], key: str, points: List, column: str) -> List:
+    """Значения ряда в точках points (пропуски — None)"""
+    values = {row[key]: row[column] for row in rows}
+    return [
+        None if values.get(point) is None else _number(values[point])
+        for point in points
+    ]
+
+
+def _number(value) -> Optional[float]:
+    """Число для описания графика (NaN -> None, чтобы JSON был корректным)"""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _spec_hash(spec: Dict, fmt: str) -> str:
+    payload = json.dumps([spec, fmt, DPI], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
 
-    def _plot_score_distribution(self, output_dir: str):
-        """График распределения оценок"""
-        perf_data = self.results["student_performance"]
-
-        if "performance_distribution" in perf_data:
-            fig, ax = plt.subplots(figsize=(10, 6))
-
-            distribution = perf_data["performance_distribution"]
-            bars = ax.bar(distribution.keys(), distribution.values())
-
-            ax.set_title("Распределение студентов по успеваемости")
-            ax.set_xlabel("Уровень успеваемости")
-            ax.set_ylabel("Количество студентов")
-
-            # Добавление значений на столбцы
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2.0,
-                    height,
-                    f"{int(height)}",
-                    ha="center",
-                    va="bottom",
-                )
-
-            plt.tight_layout()
-            plt.savefig(f"{output_dir}/score_distribution.png", dpi=150)
-            plt.close()
-
-    def _plot_activity_effectiveness(self, output_dir: str):
-        """График эффективности активностей"""
-        activities = self.results["activity_effectiveness"]
-
-        if activities:
-            df = pd.DataFrame(activities)
-
-            fig, ax = plt.subplots(figsize=(12, 6))
-
-            x = range(len(df))
-            bars = ax.bar(x, df["avg_score"])
-
-            ax.set_title("Эффективность типов активностей")
-            ax.set_xlabel("Тип активности")
-            ax.set_ylabel("Средний балл")
-            ax.set_xticks(x)
-            ax.set_xticklabels(df["activity_type"], rotation=45, ha="right")
-
-            # Добавление количества
-            for i, (bar, count) in enumerate(zip(bars, df["count"])):
-                height = bar.get_height()
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2.0,
-                    height + 1,
-                    f"n={count}",
-                    ha="center",
-                    va="bottom",
-                    fontsize=9,
-                )
-
-            plt.tight_layout()
-            plt.savefig(f"{output_dir}/activity_effectiveness.png", dpi=150)
-            plt.close()
-
-    def _plot_time_patterns(self, output_dir: str):
-        """График временных паттернов"""
-        time_data = self.results["time_patterns"]
-
-        if "weekday_distribution" in time_data:
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-            # График 1: Дни недели
-            weekdays = time_data["weekday_distribution"]
-            days = list(weekdays.keys())
-            counts = list(weekdays.values())
-
-            ax1.bar(days, counts)
-            ax1.set_title("Активность по дням недели")
-            ax1.set_xlabel("День недели")
-            ax1.set_ylabel("Количество активностей")
-            ax1.tick_params(axis="x", rotation=45)
-
-            # График 2: Часы пик
-            if "peak_hours" in time_data:
-                hours = time_data["peak_hours"]["hours"]
-                hour_counts = time_data["peak_hours"]["counts"]
-
-                ax2.bar(hours, hour_counts)
-                ax2.set_title("Часы наибольшей активности")
-                ax2.set_xlabel("Час дня")
-                ax2.set_ylabel("Количество активностей")
-
-            plt.tight_layout()
-            plt.savefig(f"{output_dir}/time_patterns.png", dpi=150)
-            plt.close()
+def _load_manifest(output_dir: str) -> Dict:
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
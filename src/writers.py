@@ -0,0 +1,182 @@
+"""
+Запись результатов: компактный JSON, NDJSON по сущностям и колоночный формат
+"""
+
+import importlib.util
+import json
+import math
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Tuple
+
+from .cache import decode_column, encode_column
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость: без неё — стандартный json
+    orjson = None
+
+# Строк на одну запись NDJSON: таблица сессий не превращается в список
+# словарей целиком
+BATCH_ROWS = 100_000
+
+
+def dumps(value) -> bytes:
+    """Компактный JSON (UTF-8) с прямой записью numpy-чисел и дат.
+
+    Пропуски (NaN, ±inf) записываются как null и с orjson, и со
+    стандартным json. Документ собирается в памяти целиком: results.json
+    состоит из сводок и ограниченных топов, большие таблицы пишутся
+    частями через write_tables.
+    """
+    if orjson is not None:
+        # orjson не принимает numpy-скаляры в ключах даже с OPT_NON_STR_KEYS
+        return orjson.dumps(
+            _plain_keys(value),
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        _nan_to_none(value),
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_default,
+        allow_nan=False,
+    ).encode("utf-8")
+
+
+def write_json(value, path: str):
+    """Запись value в path через временный файл"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(dumps(value))
+    os.replace(tmp, path)
+
+
+class NdjsonWriter:
+    """Таблицы в <name>.ndjson: одна строка — одна запись (студент, сессия...)"""
+
+    suffix = ".ndjson"
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+
+    def write(self, name: str, frame: pd.DataFrame) -> str:
+        path = os.path.join(self.output_dir, name + self.suffix)
+        with open(path, "w", encoding="utf-8") as f:
+            for start in range(0, len(frame), BATCH_ROWS):
+                stop = start + BATCH_ROWS
+                lines = frame.iloc[start:stop].to_json(
+                    orient="records", lines=True, date_format="iso", force_ascii=False
+                )
+                f.write(lines if lines.endswith("\n") else lines + "\n")
+        return path
+
+
+class ColumnarWriter:
+    """Таблицы в колоночном формате.
+
+    При установленном pyarrow — <name>.parquet, иначе каталог <name>/ с
+    .npy на колонку и meta.json (тот же формат, что у кэша разобранных логов).
+    Колонки записываются по одной, без промежуточной копии таблицы.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.parquet = importlib.util.find_spec("pyarrow") is not None
+
+    def write(self, name: str, frame: pd.DataFrame) -> str:
+        if self.parquet:
+            path = os.path.join(self.output_dir, f"{name}.parquet")
+            frame.to_parquet(path, index=False)
+            return path
+
+        path = os.path.join(self.output_dir, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        columns = []
+        for i, column in enumerate(frame.columns):
+            encoded = encode_column(frame[column])
+            if encoded is None:
+                # Смешанные типы: значения как строки
+                encoded = encode_column(frame[column].astype(str))
+            spec, array = encoded
+            np.save(os.path.join(path, f"{i}.npy"), array, allow_pickle=False)
+            columns.append(dict(spec, name=str(column)))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"columns": columns, "rows": len(frame)}, f, ensure_ascii=False)
+        return path
+
+
+WRITERS = {"ndjson": NdjsonWriter, "columnar": ColumnarWriter}
+TABLE_FORMATS = tuple(WRITERS)
+
+
+def write_tables(
+    tables: Iterable[Tuple[str, pd.DataFrame]], output_dir: str, fmt: str
+) -> Dict[str, str]:
+    """Запись таблиц по мере их получения; возвращает пути по именам"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Неизвестный формат таблиц: {fmt}")
+    os.makedirs(output_dir, exist_ok=True)
+    writer = WRITERS[fmt](output_dir)
+    return {name: writer.write(name, frame) for name, frame in tables}
+
+
+def read_columnar(path: str) -> pd.DataFrame:
+    """Таблица, записанная ColumnarWriter (.parquet или каталог с .npy)"""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    return pd.DataFrame(
+        {
+            col["name"]: decode_column(
+                np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r"), col
+            )
+            for i, col in enumerate(meta["columns"])
+        }
+    )
+
+
+def _default(value):
+    """Типы, которые json/orjson не записывают сами"""
+    if isinstance(value, np.generic):
+        return _nan_to_none(value.item())
+    if isinstance(value, np.ndarray):
+        return _nan_to_none(value.tolist())
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    return str(value)
+
+
+def _nan_to_none(value):
+    """NaN и бесконечности -> None, как их записывает orjson; ключи — как
+    в _plain_keys"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {_plain_key(key): _nan_to_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_nan_to_none(item) for item in value]
+    return value
+
+
+def _plain_keys(value):
+    """Ключи-numpy-скаляры (np.int64, np.float32) -> числа Python"""
+    if isinstance(value, dict):
+        return {_plain_key(key): _plain_keys(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain_keys(item) for item in value]
+    return value
+
+
+def _plain_key(key):
+    return key.item() if isinstance(key, np.generic) else key
@@ -2,6 +2,7 @@
 Тесты для анализатора
 """
 
+import json
 import unittest
 import pandas as pd
 from datetime import datetime
@@ -75,6 +76,25 @@ class TestLearningAnalyzer(unittest.TestCase):
             self.assertIn("activity_type", activity)
             self.assertIn("avg_score", activity)
 
+    def test_dataframe_input(self):
+        """Тест анализа DataFrame без списка словарей"""
+        analyzer = LearningAnalyzer(pd.DataFrame(self.test_logs))
+
+        self.assertEqual(
+            json.dumps(analyzer.analyze_all(), default=str),
+            json.dumps(self.analyzer.analyze_all(), default=str),
+        )
+
+    def test_aggregates_cached(self):
+        """Тест кэширования агрегатов и сброса при смене данных"""
+        students = self.analyzer._table("students")
+        self.analyzer.analyze_all()
+        self.assertIs(self.analyzer._table("students"), students)
+
+        self.analyzer.df = pd.DataFrame(self.test_logs[:2])
+        self.assertEqual(self.analyzer.get_basic_stats()["total_activities"], 2)
+        self.assertEqual(len(self.analyzer._table("students")), 1)
+
     def test_generate_recommendations(self):
         """Тест генерации рекомендаций"""
         recommendations = self.analyzer.generate_recommendations()
@@ -0,0 +1,77 @@
+"""
+Тесты генератора синтетических логов и проверки регрессий
+"""
+
+import json
+import unittest
+import src
+from benchmarks.run import (
+    DEFAULT_BASELINE,
+    find_regressions,
+    measure_startup,
+    select_baseline,
+)
+from benchmarks.synthetic import generate_chunks
+
+
+class TestSyntheticLogs(unittest.TestCase):
+    def test_deterministic(self):
+        """Тест воспроизводимости при одинаковом seed"""
+        first = next(generate_chunks(500, students=50, seed=7))
+        second = next(generate_chunks(500, students=50, seed=7))
+
+        self.assertTrue(first.equals(second))
+        self.assertFalse(first.equals(next(generate_chunks(500, students=50))))
+
+    def test_shape(self):
+        """Тест размеров, частей и пропусков оценок"""
+        chunks = list(generate_chunks(2500, students=50, chunk_size=1000))
+        df = chunks[0]
+
+        self.assertEqual([len(c) for c in chunks], [1000, 1000, 500])
+        self.assertTrue(df["score"].dropna().between(0, 100).all())
+        self.assertTrue(df.loc[df["activity_type"] == "login", "score"].isna().all())
+        self.assertLessEqual(df["student_id"].max(), 50)
+
+    def test_find_regressions(self):
+        """Тест порога регрессии"""
+        baseline = {"parse": {"seconds": 1.0, "peak_mb": 100.0}}
+
+        ok = {"parse": {"seconds": 1.2, "peak_mb": 100.0}}
+        slow = {"parse": {"seconds": 1.3, "peak_mb": 100.0}}
+        self.assertEqual(find_regressions(ok, baseline, 0.25), [])
+        self.assertEqual(len(find_regressions(slow, baseline, 0.25)), 1)
+
+    def test_select_baseline(self):
+        """Тест: сравнение только с базой того же размера и генератора"""
+        stages = {"parse": {"seconds": 1.0, "peak_mb": 100.0}}
+        baselines = {"100000": {"students": 1000, "seed": 42, "stages": stages}}
+
+        self.assertIs(select_baseline(baselines, 100_000, 1000, 42), stages)
+        with self.assertRaisesRegex(ValueError, "есть: 100000"):
+            select_baseline(baselines, 1_000_000, 10_000, 42)
+        with self.assertRaises(ValueError):
+            select_baseline(baselines, 100_000, 1000, 7)
+
+    def test_committed_baseline(self):
+        """Тест: в репозитории есть база для размера по умолчанию"""
+        with open(DEFAULT_BASELINE, encoding="utf-8") as f:
+            baselines = json.load(f)
+        stages = select_baseline(baselines, 100_000, 1000, 42)
+        self.assertEqual(
+            set(stages), {"startup", "parse", "analyze", "streaming", "visualize"}
+        )
+
+    def test_startup(self):
+        """Тест: CLI импортируется без matplotlib, классы пакета доступны"""
+        startup = measure_startup(1)
+
+        self.assertFalse(startup["matplotlib"])
+        self.assertGreater(startup["seconds"], 0)
+        self.assertEqual(src.ResultVisualizer.__module__, "src.visualizer")
+        with self.assertRaises(AttributeError):
+            src.Missing
+
+
+if __name__ == "__main__":
+    unittest.main()
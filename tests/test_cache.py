@@ -0,0 +1,132 @@
+"""
+Тесты кэша разобранных логов
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src.cache import ParsedLogCache
+from src.parser import LogParser
+
+
+class TestParsedLogCache(unittest.TestCase):
+    def setUp(self):
+        """Создание тестовых данных"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmpdir, "logs.csv")
+        with open(self.csv_path, "w") as f:
+            f.write(
+                "student_id,activity_type,timestamp,score,duration_minutes\n"
+                "1,login,2024-01-15 09:30:00,85,5\n"
+                "2,forum,2024-01-16 14:20:00,,20\n"
+                "3,quiz,2024-01-17 11:15:00,92,\n"
+            )
+        self.cache = ParsedLogCache(os.path.join(self.tmpdir, "cache"))
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_roundtrip(self):
+        """Тест сохранения и загрузки без изменений"""
+        df = LogParser(self.csv_path).parse_frame()
+
+        self.assertIsNone(self.cache.load(self.csv_path))
+        self.assertTrue(self.cache.store(self.csv_path, df))
+        cached = self.cache.load(self.csv_path)
+
+        self.assertTrue(cached.equals(df))
+        self.assertTrue(cached.dtypes.equals(df.dtypes))
+
+    def test_parser_uses_cache(self):
+        """Тест повторного чтения через кэш и сброса при изменении файла"""
+        LogParser(self.csv_path, cache=self.cache).parse_frame()
+        self.assertIsNotNone(self.cache.load(self.csv_path))
+
+        with open(self.csv_path, "a") as f:
+            f.write("4,quiz,2024-01-18 12:00:00,70,10\n")
+        self.assertIsNone(self.cache.load(self.csv_path))
+
+        df = LogParser(self.csv_path, cache=self.cache).parse_frame()
+        self.assertEqual(len(df), 4)
+
+    def test_rebuild_and_eviction(self):
+        """Тест принудительной пересборки и ограничения размера"""
+        df = LogParser(self.csv_path).parse_frame()
+        self.cache.store(self.csv_path, df)
+        self.assertIsNone(
+            ParsedLogCache(self.cache.cache_dir, rebuild=True).load(self.csv_path)
+        )
+
+        # Незавершённая запись другого процесса не вытесняется
+        writing = os.path.join(self.cache.cache_dir, "entry.tmp999999")
+        os.makedirs(writing)
+
+        other = os.path.join(self.tmpdir, "other.csv")
+        shutil.copy(self.csv_path, other)
+        small = ParsedLogCache(self.cache.cache_dir, max_bytes=1)
+        key = small.entry_name(other)
+        small.store(other, df)
+
+        self.assertEqual(
+            sorted(os.listdir(self.cache.cache_dir)), sorted([key, "entry.tmp999999"])
+        )
+        self.assertIsNotNone(small.load(other))
+
+    def test_hash_only_on_changed_mtime(self):
+        """Тест: содержимое хэшируется только при смене mtime"""
+        df = LogParser(self.csv_path).parse_frame()
+        self.cache.store(self.csv_path, df)
+
+        with mock.patch.object(
+            ParsedLogCache, "content_hash", side_effect=AssertionError
+        ):
+            self.assertIsNotNone(self.cache.load(self.csv_path))
+
+        # Тот же размер и содержимое, новый mtime: попадание после сверки хэша
+        st = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIsNotNone(self.cache.load(self.csv_path))
+        with mock.patch.object(
+            ParsedLogCache, "content_hash", side_effect=AssertionError
+        ):
+            self.assertIsNotNone(self.cache.load(self.csv_path))
+
+        # Тот же размер, другое содержимое
+        with open(self.csv_path, "r+") as f:
+            f.seek(len(f.readline()))
+            f.write("9")
+        self.assertIsNone(self.cache.load(self.csv_path))
+
+    def test_damaged_entry_is_rebuilt(self):
+        """Тест: отсутствующий или обрезанный файл колонки — промах"""
+        LogParser(self.csv_path, cache=self.cache).parse_frame()
+        entry = os.path.join(self.cache.cache_dir, self.cache.entry_name(self.csv_path))
+
+        column = os.path.join(entry, "0.npy")
+        with open(column, "r+b") as f:
+            f.truncate(os.path.getsize(column) - 1)
+        self.assertIsNone(self.cache.load(self.csv_path))
+
+        parser = LogParser(self.csv_path, cache=self.cache)
+        self.assertEqual(len(parser.parse_frame()), 3)
+        self.assertFalse(parser.from_cache)
+        self.assertIsNotNone(self.cache.load(self.csv_path))
+
+        os.remove(os.path.join(entry, "1.npy"))
+        self.assertIsNone(self.cache.load(self.csv_path))
+
+    def test_load_keeps_memory_map(self):
+        """Тест: числовые колонки из кэша не копируются в память"""
+        df = LogParser(self.csv_path).parse_frame()
+        self.cache.store(self.csv_path, df)
+        cached = self.cache.load(self.csv_path)
+
+        self.assertIsInstance(cached["duration_minutes"].to_numpy().base, np.memmap)
+
+
+if __name__ == "__main__":
+    unittest.main()
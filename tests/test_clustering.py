@@ -0,0 +1,121 @@
+"""
+Тесты кластеризации студентов
+"""
+
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.analyzer import LearningAnalyzer
+from src.clustering import activity_mix, cluster_students, student_features
+from src.sequences import EventSequence
+from src.sessions import assign_sessions, session_table
+
+
+def two_groups(students_per_group=40, seed=0):
+    """Утренние студенты с тестами и растущими баллами против вечерних
+    студентов с форумом и падающими баллами"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for student in range(2 * students_per_group):
+        morning = student < students_per_group
+        day = pd.Timestamp("2024-01-15") + pd.Timedelta(days=int(rng.integers(0, 5)))
+        hour = 9 if morning else 21
+        for i in range(6):
+            activity = "quiz" if morning or i % 3 == 0 else "forum"
+            score = (70 + 4 * i if morning else 70 - 4 * i) + rng.normal(0, 1)
+            rows.append(
+                {
+                    "student_id": student,
+                    "activity_type": activity,
+                    "timestamp": day + pd.Timedelta(hours=hour, minutes=10 * i),
+                    "score": score if activity == "quiz" else None,
+                    "duration_minutes": 8,
+                }
+            )
+    df = pd.DataFrame(rows)
+    df["hour"] = df["timestamp"].dt.hour
+    df["day_of_week"] = df["timestamp"].dt.day_name()
+    return df
+
+
+class TestClustering(unittest.TestCase):
+    def test_student_features(self):
+        """Тест балла, тренда, времени суток и доли выходных"""
+        df = pd.DataFrame(
+            {
+                "student_id": [7, 7, 7, 8],
+                "activity_type": ["quiz", "quiz", "quiz", "forum"],
+                "timestamp": pd.to_datetime(
+                    [
+                        "2024-01-13 10:00",  # суббота
+                        "2024-01-15 10:00",
+                        "2024-01-16 10:00",
+                        "2024-01-15 22:00",
+                    ]
+                ),
+                "score": [60, 70, 80, None],
+            }
+        )
+        sequence = EventSequence(df)
+        sessions = session_table(sequence, assign_sessions(sequence))
+        features = student_features(sequence, sessions)
+
+        first = features.iloc[0]
+        self.assertEqual(first["events"], 3)
+        self.assertAlmostEqual(first["avg_score"], 70.0)
+        self.assertAlmostEqual(first["score_trend"], 10.0)
+        self.assertAlmostEqual(first["weekend_share"], 1 / 3)
+        self.assertEqual(first["sessions"], 3)
+        self.assertTrue(np.isnan(features.iloc[1]["avg_score"]))
+
+        mix = activity_mix(sequence).toarray()
+        self.assertEqual(mix.tolist(), [[0.0, 1.0], [1.0, 0.0]])
+
+    def test_cluster_students(self):
+        """Тест: две очевидные группы попадают в разные кластеры"""
+        sequence = EventSequence(two_groups())
+        sessions = session_table(sequence, assign_sessions(sequence))
+        features = student_features(sequence, sessions)
+        clusters = cluster_students(features, activity_mix(sequence), n_clusters=2)
+
+        labels = clusters["labels"]
+        self.assertEqual(len(set(labels[:40])), 1)
+        self.assertEqual(len(set(labels[40:])), 1)
+        self.assertNotEqual(labels[0], labels[-1])
+        self.assertEqual(clusters["centroids"].shape, (2, 8 + 2))
+
+    def test_analyzer_clusters(self):
+        """Тест сводки кластеров, рекомендаций по группам и выгрузки"""
+        analyzer = LearningAnalyzer(two_groups(), n_clusters=2)
+        results = analyzer.analyze_all()
+
+        clusters = results["clusters"]["clusters"]
+        self.assertEqual(sorted(c["students"] for c in clusters), [40, 40])
+        evening = min(clusters, key=lambda c: c["avg_score"])
+        self.assertLess(evening["score_trend"], 0)
+        self.assertEqual(evening["dominant_activity"], "forum")
+        self.assertAlmostEqual(evening["typical_hour"], 21.0)
+
+        advice = [r for r in results["recommendations"] if r["type"] == "cluster"]
+        self.assertEqual([r["cluster"] for r in advice], [evening["cluster"]])
+        self.assertIn("повторите", advice[0]["suggestion"])
+
+        table = dict(analyzer.export_tables())["clusters"]
+        self.assertEqual(table["student_id"].tolist(), list(range(80)))
+        self.assertEqual(table["cluster"].nunique(), 2)
+
+        self.assertEqual(LearningAnalyzer.from_aggregates({}).analyze_clusters(), {})
+
+    def test_clusters_opt_in(self):
+        """Тест: без n_clusters группы не считаются и sklearn не нужен"""
+        analyzer = LearningAnalyzer(two_groups())
+        with mock.patch("src.analyzer.cluster_students") as cluster:
+            results = analyzer.analyze_all()
+        cluster.assert_not_called()
+        self.assertNotIn("clusters", results)
+        self.assertNotIn("clusters", dict(analyzer.export_tables()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Тесты замеров этапов
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from src.metrics import MetricsCollector
+
+
+class TestMetricsCollector(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        """Тест выключенного сборщика"""
+        metrics = MetricsCollector()
+        metrics.enabled = False
+        with metrics.stage("parse"):
+            pass
+
+        self.assertEqual(metrics.spans, [])
+
+    def test_nested_stages(self):
+        """Тест вложенных этапов, строк и памяти"""
+        metrics = MetricsCollector()
+        metrics.enable(track_allocations=True)
+        with metrics.stage("analyze", rows=10):
+            with metrics.stage("groupby", rows=10):
+                data = [0] * 100_000
+            del data
+        metrics.record("rows_rejected", 0)
+
+        spans = {span["name"]: span for span in metrics.spans}
+        self.assertEqual(spans["groupby"]["depth"], 1)
+        self.assertEqual(spans["analyze"]["rows"], 10)
+        self.assertGreaterEqual(spans["analyze"]["wall_s"], spans["groupby"]["wall_s"])
+        self.assertGreaterEqual(
+            spans["analyze"]["alloc_peak_mb"], spans["groupby"]["alloc_peak_mb"]
+        )
+        self.assertGreater(spans["groupby"]["alloc_peak_mb"], 0.5)
+        # Рост пикового RSS за этап не меньше, чем у вложенного этапа
+        self.assertGreaterEqual(
+            spans["analyze"]["rss_growth_mb"], spans["groupby"]["rss_growth_mb"]
+        )
+        self.assertGreaterEqual(spans["groupby"]["rss_growth_mb"], 0)
+
+    def test_write_json_and_trace(self):
+        """Тест metrics.json и трассы Chrome"""
+        metrics = MetricsCollector()
+        metrics.enable()
+        with metrics.stage("parse"):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            metrics.write_json(os.path.join(tmpdir, "metrics.json"))
+            metrics.write_trace(os.path.join(tmpdir, "trace.json"))
+            with open(os.path.join(tmpdir, "metrics.json")) as f:
+                report = json.load(f)
+            with open(os.path.join(tmpdir, "trace.json")) as f:
+                trace = json.load(f)
+
+        self.assertEqual(report["summary"]["parse"]["calls"], 1)
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+
+
+if __name__ == "__main__":
+    unittest.main()
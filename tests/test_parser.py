@@ -5,6 +5,8 @@
 import unittest
 import pandas as pd
 from io import StringIO
+from src.analyzer import LearningAnalyzer
+from src.filters import LogFilter
 from src.parser import LogParser
 
 
@@ -39,6 +41,103 @@ class TestLogParser(unittest.TestCase):
         self.assertEqual(logs[0]["student_id"], 1)
         self.assertEqual(logs[0]["activity_type"], "login")
 
+    def test_parse_frame(self):
+        """Тест колоночного результата парсинга"""
+        df = self.parser.parse_frame()
+
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertEqual(len(df), 5)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["timestamp"]))
+        self.assertEqual(df["student_id"].tolist(), [1, 1, 2, 2, 3])
+        self.assertEqual(df.iloc[0]["activity_type"], "login")
+
+    def test_compact_schema(self):
+        """Тест компактных типов колонок"""
+        df = self.parser.parse_frame()
+
+        self.assertIsInstance(df["activity_type"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["hour"].dtype, "Int8")
+        self.assertEqual(df["score"].dtype, "Float64")
+        self.assertTrue(pd.api.types.is_datetime64_dtype(df["date"]))
+        self.assertEqual(df["day_of_week"].tolist()[0], "Monday")
+        self.assertTrue(pd.isna(df["score"].iloc[3]))
+
+    def test_fractional_scores_match_baseline(self):
+        """Тест: дробные оценки дают те же результаты, что исходная версия
+        (pd.read_csv с float64 и расчёт через pandas)"""
+        with open("test_data.csv", "w") as f:
+            f.write(
+                "student_id,activity_type,timestamp,score\n"
+                "1,quiz,2024-01-15 09:30:00,72.3\n"
+                "1,assignment,2024-01-15 10:00:00,88.7\n"
+                "2,quiz,2024-01-15 11:00:00,64.1\n"
+                "2,forum,2024-01-16 12:00:00,\n"
+                "3,quiz,2024-01-17 13:00:00,91.9\n"
+            )
+        raw = pd.read_csv("test_data.csv")
+        scores = raw["score"].dropna()
+        students = raw.groupby("student_id").agg(
+            score=("score", "mean"), activity_count=("activity_type", "count")
+        )
+
+        self.assertEqual(self.parser.parse()[0]["score"], 72.3)
+        results = LearningAnalyzer(self.parser.parse_frame()).analyze_all()
+        stats = results["basic_stats"]["score_stats"]
+        self.assertEqual(stats["min"], 64.1)
+        self.assertEqual(stats["max"], 91.9)
+        self.assertAlmostEqual(stats["avg"], scores.mean(), places=12)
+        self.assertAlmostEqual(stats["std"], scores.std(), places=12)
+        performance = results["student_performance"]
+        self.assertAlmostEqual(
+            performance["correlation_activity_score"],
+            students["activity_count"].corr(students["score"]),
+            places=12,
+        )
+        self.assertEqual(performance["top_students"][1]["score"], 80.5)
+
+    def test_stats_from_frame(self):
+        """Тест статистики по DataFrame"""
+        stats = self.parser.get_stats(self.parser.parse_frame())
+
+        self.assertEqual(stats["total_records"], 5)
+        self.assertEqual(stats["unique_students"], 3)
+
+    def test_filter_rows(self):
+        """Тест отбора строк по типу активности и периоду"""
+        log_filter = LogFilter(
+            activity_types=["login", "forum"], since="2024-01-15", until="2024-01-15"
+        )
+        df = LogParser("test_data.csv", log_filter=log_filter).parse_frame()
+
+        self.assertEqual(df["student_id"].tolist(), [1, 2])
+        self.assertEqual(df["activity_type"].tolist(), ["login", "login"])
+        self.assertIsInstance(df["activity_type"].dtype, pd.CategoricalDtype)
+
+        stats = self.parser.get_stats(df)
+        self.assertEqual(stats["total_records"], 2)
+        self.assertEqual(stats["end_date"], "2024-01-15")
+
+    def test_filter_columns(self):
+        """Тест чтения только нужных колонок"""
+        log_filter = LogFilter(columns=["score"])
+        df = LogParser("test_data.csv", log_filter=log_filter).parse_frame()
+
+        self.assertEqual(len(df), 5)
+        self.assertNotIn("duration_minutes", df.columns)
+        self.assertIn("hour", df.columns)
+
+    def test_filter_chunks_by_course(self):
+        """Тест отбора по курсу при потоковом чтении"""
+        df = pd.read_csv("test_data.csv")
+        df["course_id"] = ["CS101", "CS101", "MATH201", "CS101", "MATH201"]
+        df.to_csv("test_data.csv", index=False)
+
+        parser = LogParser("test_data.csv", log_filter=LogFilter(courses=["MATH201"]))
+        chunks = list(parser.iter_chunks(2))
+
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 2)
+        self.assertEqual(pd.concat(chunks)["student_id"].tolist(), [2, 3])
+
     def test_stats_calculation(self):
         """Тест расчета статистики"""
         logs = self.parser.parse()
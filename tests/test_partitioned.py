@@ -0,0 +1,69 @@
+"""
+Тесты параллельного анализа по курсам
+"""
+
+import unittest
+import pandas as pd
+from src.analyzer import LearningAnalyzer
+from src.partitioned import SharedFrame, analyze_partitioned, read_slice
+
+
+class TestPartitionedAnalysis(unittest.TestCase):
+    def setUp(self):
+        """Создание тестовых данных"""
+        timestamps = pd.to_datetime(
+            [
+                "2024-01-15 09:30:00",
+                "2024-01-15 10:00:00",
+                "2024-01-15 09:45:00",
+                "2024-01-16 14:20:00",
+                "2024-01-17 11:15:00",
+                "2024-01-18 16:40:00",
+            ]
+        )
+        self.df = pd.DataFrame(
+            {
+                "student_id": [1, 1, 2, 2, 3, 3],
+                "activity_type": pd.Categorical(
+                    ["login", "quiz", "login", "forum", "quiz", "quiz"]
+                ),
+                "timestamp": timestamps,
+                "score": pd.array([85, 90, 70, None, 75, 60], dtype="Float32"),
+                "course_id": ["CS101", "MA201", "CS101", "MA201", "CS101", "MA201"],
+                "hour": pd.array(timestamps.hour, dtype="Int8"),
+                "day_of_week": timestamps.day_name(),
+            }
+        )
+
+    def test_shared_frame_roundtrip(self):
+        """Тест передачи колонок через общую память"""
+        with SharedFrame(self.df) as shared:
+            part = read_slice(shared.columns, shared.rows, 2, 5)
+
+        expected = self.df.iloc[2:5].reset_index(drop=True)
+        self.assertTrue(part.equals(expected))
+
+    def test_partitions_and_global_summary(self):
+        """Тест результатов по курсам и общей сводки"""
+        for workers in (1, 2):
+            result = analyze_partitioned(self.df, by="course_id", workers=workers)
+
+            self.assertEqual(sorted(result["partitions"]), ["CS101", "MA201"])
+            cs101 = result["partitions"]["CS101"]["basic_stats"]
+            self.assertEqual(cs101["total_activities"], 3)
+            self.assertEqual(cs101["total_students"], 3)
+
+            expected = LearningAnalyzer(self.df).analyze_all()
+            self.assertEqual(result["global"]["basic_stats"], expected["basic_stats"])
+            self.assertEqual(
+                result["global"]["time_patterns"], expected["time_patterns"]
+            )
+
+    def test_missing_column(self):
+        """Тест ошибки при отсутствии колонки разбиения"""
+        with self.assertRaises(ValueError):
+            analyze_partitioned(self.df, by="group_id")
+
+
+if __name__ == "__main__":
+    unittest.main()
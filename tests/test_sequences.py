@@ -0,0 +1,78 @@
+"""
+Тесты анализа путей обучения
+"""
+
+import unittest
+import pandas as pd
+from src.analyzer import LearningAnalyzer
+from src.sequences import EventSequence, frequent_paths, transition_matrix
+
+
+class TestSequences(unittest.TestCase):
+    def setUp(self):
+        """События в произвольном порядке строк"""
+        self.df = pd.DataFrame(
+            {
+                "student_id": [2, 1, 1, 2, 1, 2, 1],
+                "activity_type": [
+                    "quiz",
+                    "login",
+                    "quiz",
+                    "login",
+                    "forum",
+                    "forum",
+                    "login",
+                ],
+                "timestamp": pd.to_datetime(
+                    [
+                        "2024-01-15 12:00",
+                        "2024-01-15 09:00",
+                        "2024-01-15 11:00",
+                        "2024-01-15 09:30",
+                        "2024-01-15 10:00",
+                        "2024-01-15 10:30",
+                        "2024-01-16 09:00",
+                    ]
+                ),
+                "score": [70, None, 90, None, None, None, None],
+            }
+        )
+        self.sequence = EventSequence(self.df)
+
+    def test_transition_matrix(self):
+        """Тест переходов только внутри событий одного студента"""
+        matrix = transition_matrix(self.sequence)
+
+        self.assertEqual(matrix.loc["login", "forum"], 2)
+        self.assertEqual(matrix.loc["forum", "quiz"], 2)
+        self.assertEqual(matrix.loc["quiz", "login"], 1)
+        # 1: login→forum→quiz→login, 2: login→forum→quiz
+        self.assertEqual(int(matrix.to_numpy().sum()), 5)
+
+    def test_frequent_paths(self):
+        """Тест частых цепочек и балла после них"""
+        paths = frequent_paths(self.sequence, 3)
+
+        self.assertEqual(paths[0]["path"], ["login", "forum", "quiz"])
+        self.assertEqual(paths[0]["count"], 2)
+        self.assertEqual(paths[0]["students"], 2)
+        self.assertAlmostEqual(paths[0]["avg_outcome_score"], 80.0)
+        self.assertEqual(len(paths), 2)
+
+    def test_analyzer_paths(self):
+        """Тест путей в analyze_all и рекомендациях"""
+        results = LearningAnalyzer(self.df).analyze_all()
+        paths = results["learning_paths"]
+
+        self.assertAlmostEqual(paths["transition_matrix"]["login"]["forum"], 1.0)
+        self.assertEqual(paths["top_transitions"][0]["count"], 2)
+        self.assertIn("path", [rec["type"] for rec in results["recommendations"]])
+
+    def test_no_paths_for_aggregates(self):
+        """Тест: у готовых агрегатов нет порядка событий"""
+        analyzer = LearningAnalyzer.from_aggregates({})
+        self.assertEqual(analyzer.analyze_learning_paths(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Тесты локального сервера анализа
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from src.parser import LogParser
+from src.server import AnalysisServer, Dataset
+
+LOG = """student_id,activity_type,timestamp,score,duration_minutes
+1,login,2024-01-15 09:30:00,,5
+1,quiz,2024-01-15 09:40:00,85,20
+2,quiz,2024-01-15 10:00:00,70,15
+2,assignment,2024-01-16 12:00:00,60,40
+3,forum,2024-01-16 14:20:00,,10
+"""
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "logs.csv")
+        with open(self.path, "w") as f:
+            f.write(LOG)
+        self.server = AnalysisServer({"default": Dataset(LogParser(self.path))})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def request(self, target):
+        async def dispatch():
+            content_type, body = await self.server.dispatch(target)
+            return content_type, body
+
+        content_type, body = asyncio.run(dispatch())
+        return json.loads(body) if content_type.startswith("application/json") else body
+
+    def test_endpoints_and_cache(self):
+        """Тест ответов и повторного использования кэша"""
+        results = self.request("/analyze")
+        self.assertEqual(results["basic_stats"]["total_students"], 3)
+        self.assertEqual(self.request("/analyze/basic_stats"), results["basic_stats"])
+
+        student = self.request("/students/2")
+        self.assertEqual(student["comparison"]["activity_count"], 2)
+        self.assertEqual(student["comparison"]["avg_score"], 65.0)
+
+        spec = self.request("/plots/activity_effectiveness?format=json")
+        self.assertIn("panels", spec)
+        self.assertTrue(
+            self.request("/plots/score_distribution").startswith(b"\x89PNG")
+        )
+
+        self.request("/analyze")
+        self.assertEqual(self.server.cache.hits, 1)
+        self.assertEqual(self.server.cache.misses, 5)
+
+        # Анализатор и запросы по студентам используют один DataFrame
+        dataset = self.server.datasets["default"]
+        self.assertIs(dataset.analyzer.df, dataset._students)
+
+    def test_string_student_ids(self):
+        """Тест запроса по студенту при буквенно-цифровых student_id"""
+        with open(self.path, "a") as f:
+            f.write("S1,quiz,2024-01-17 10:00:00,90,30\n")
+        self.assertEqual(self.request("/students/S1")["comparison"]["avg_score"], 90.0)
+        self.assertEqual(self.request("/students/2")["student_id"], "2")
+
+    def test_reload_on_change(self):
+        """Тест: изменение файла логов даёт новую версию и новые ответы"""
+        self.assertEqual(self.request("/analyze/basic_stats")["total_activities"], 5)
+        with open(self.path, "a") as f:
+            f.write("4,quiz,2024-01-17 10:00:00,90,30\n")
+        os.utime(self.path, ns=(0, 10**18))
+
+        self.assertEqual(self.request("/analyze/basic_stats")["total_activities"], 6)
+        health = self.request("/health")
+        self.assertEqual(health["datasets"]["default"], 2)
+        self.assertEqual(health["validation"]["default"]["rejected"], 0)
+
+    def test_http_round_trip(self):
+        """Тест HTTP-запроса к серверу на 127.0.0.1 и ошибок"""
+
+        async def fetch(port, target):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            head, body = response.split(b"\r\n\r\n", 1)
+            return int(head.split()[1]), json.loads(body)
+
+        async def scenario():
+            server = await self.server.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await asyncio.gather(
+                    fetch(port, "/analyze/time_patterns"),
+                    fetch(port, "/students/99"),
+                    fetch(port, "/analyze/unknown"),
+                )
+
+        (ok, patterns), (missing, _), (unknown, _) = asyncio.run(scenario())
+        self.assertEqual(ok, 200)
+        self.assertIn("peak_hours", patterns)
+        self.assertEqual(missing, 404)
+        self.assertEqual(unknown, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Тесты разбиения событий на учебные сессии
+"""
+
+import unittest
+import pandas as pd
+from src.analyzer import LearningAnalyzer
+from src.sequences import EventSequence
+from src.sessions import assign_sessions, session_table
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        """Два студента; у первого длинное событие перекрывает паузу"""
+        self.df = pd.DataFrame(
+            {
+                "student_id": [1, 1, 1, 1, 2, 2],
+                "activity_type": [
+                    "login",
+                    "assignment",
+                    "quiz",
+                    "forum",
+                    "login",
+                    "quiz",
+                ],
+                "timestamp": pd.to_datetime(
+                    [
+                        "2024-01-15 09:00",
+                        "2024-01-15 09:10",
+                        # 70 минут после начала задания, но оно длилось 60
+                        "2024-01-15 10:20",
+                        "2024-01-15 14:00",
+                        "2024-01-15 09:05",
+                        "2024-01-15 09:20",
+                    ]
+                ),
+                "duration_minutes": [5, 60, 20, 10, 5, 15],
+                "score": [None, 80, 90, None, None, 60],
+            }
+        )
+        self.sequence = EventSequence(self.df)
+
+    def test_assign_sessions(self):
+        """Тест границ сессий с учётом длительности событий"""
+        ids = assign_sessions(self.sequence, gap_minutes=30)
+        self.assertEqual(ids.tolist(), [0, 0, 0, 1, 2, 2])
+
+        ids = assign_sessions(self.sequence, gap_minutes=4)
+        self.assertEqual(ids.tolist(), [0, 1, 2, 3, 4, 5])
+
+    def test_session_table(self):
+        """Тест длительности, числа событий и оценок сессий"""
+        sessions = session_table(self.sequence, assign_sessions(self.sequence, 30))
+
+        self.assertEqual(sessions["events"].tolist(), [3, 1, 2])
+        self.assertEqual(sessions["minutes"].tolist(), [100.0, 10.0, 30.0])
+        self.assertEqual(sessions["score_count"].tolist(), [2, 0, 1])
+
+    def test_analyzer_sessions(self):
+        """Тест метрик сессий в analyze_all"""
+        results = LearningAnalyzer(self.df).analyze_all()
+        sessions = results["sessions"]
+
+        self.assertEqual(sessions["total_sessions"], 3)
+        self.assertAlmostEqual(sessions["sessions_per_student"], 1.5)
+        self.assertAlmostEqual(
+            sessions["activity_mix"]["login"]["share_of_sessions"], 2 / 3
+        )
+        self.assertAlmostEqual(sessions["score_by_session_length"]["60-120"], 85.0)
+        self.assertEqual(
+            LearningAnalyzer(self.df, session_gap_minutes=4).analyze_sessions()[
+                "total_sessions"
+            ],
+            6,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Тесты скетчей приближённой статистики
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.analyzer import LearningAnalyzer
+from src.sketches import HeavyHitters, HyperLogLog, KLLSketch, SketchAggregator
+
+
+class TestSketches(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+
+    def test_hyperloglog(self):
+        """Тест оценки числа различных значений и слияния"""
+        values = self.rng.integers(0, 10**9, 50_000)
+        left, right = HyperLogLog(), HyperLogLog()
+        left.update(values[:30_000])
+        right.update(values[20_000:])
+        left.merge(right)
+
+        exact = len(np.unique(values))
+        self.assertLess(abs(left.estimate() / exact - 1), 4 * left.relative_error)
+
+        small = HyperLogLog()
+        small.update(np.array([1, 2, 3, 3, 2]))
+        self.assertEqual(small.estimate(), 3)
+
+    def test_kll_quantiles(self):
+        """Тест квантилей в пределах ошибки ранга"""
+        values = self.rng.normal(70, 15, 100_000)
+        sketch = KLLSketch()
+        for part in np.array_split(values, 4):
+            other = KLLSketch()
+            other.update(part)
+            sketch.merge(other)
+
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(sum(len(level) for level in sketch.levels), 2_000)
+        ordered = np.sort(values)
+        for q, estimate in sketch.quantiles([0.1, 0.5, 0.9]).items():
+            rank = np.searchsorted(ordered, estimate) / len(values)
+            self.assertLess(abs(rank - q), sketch.rank_error)
+
+    def test_heavy_hitters(self):
+        """Тест границ ошибки частых значений"""
+        values = pd.Series(self.rng.zipf(1.5, 20_000))
+        sketch = HeavyHitters(capacity=20)
+        for part in np.array_split(values, 5):
+            sketch.update(part)
+
+        exact = values.value_counts()
+        self.assertLessEqual(sketch.error, len(values) / 21)
+        for item in sketch.top(3):
+            true = exact[item["value"]]
+            self.assertLessEqual(item["count"], true)
+            self.assertGreaterEqual(item["max_count"], true)
+
+    def test_sketch_aggregator(self):
+        """Тест: точные агрегаты совпадают, оценки — в пределах ошибок"""
+        df = pd.DataFrame(
+            {
+                "student_id": self.rng.integers(0, 500, 5_000),
+                "activity_type": self.rng.choice(["login", "quiz"], 5_000),
+                "timestamp": pd.Timestamp("2024-01-15")
+                + pd.to_timedelta(self.rng.integers(0, 10**6, 5_000), unit="s"),
+                "score": self.rng.integers(40, 100, 5_000).astype("float64"),
+            }
+        )
+        df["hour"] = df["timestamp"].dt.hour
+        df["day_of_week"] = df["timestamp"].dt.day_name()
+
+        left, right = SketchAggregator(), SketchAggregator()
+        left.update(df.iloc[:2_000])
+        right.update(df.iloc[2_000:])
+        aggregator = left.merge(right)
+
+        results = LearningAnalyzer.from_aggregates(
+            aggregator.aggregates()
+        ).analyze_all()
+        exact = LearningAnalyzer(df).analyze_all()
+        for got, want in zip(
+            results["activity_effectiveness"], exact["activity_effectiveness"]
+        ):
+            self.assertEqual(got["count"], want["count"])
+            self.assertAlmostEqual(got["avg_score"], want["avg_score"])
+            self.assertAlmostEqual(got["std_score"], want["std_score"])
+        self.assertAlmostEqual(
+            results["basic_stats"]["score_stats"]["avg"],
+            exact["basic_stats"]["score_stats"]["avg"],
+        )
+
+        approximation = aggregator.approximation()
+        students = approximation["distinct_students"]
+        self.assertLess(
+            abs(students["estimate"] / df["student_id"].nunique() - 1),
+            4 * students["relative_std_error"],
+        )
+        top = approximation["most_active_students"]["top"][0]
+        # Студентов меньше ёмкости скетча, поэтому счётчики точные
+        self.assertEqual(top["count"], df["student_id"].value_counts().max())
+        self.assertEqual(approximation["most_active_students"]["max_undercount"], 0)
+        # Все студенты в выборке: раздел успеваемости точный
+        self.assertTrue(approximation["student_performance"]["exact"])
+        self.assertEqual(results["student_performance"], exact["student_performance"])
+
+    def test_student_sample(self):
+        """Тест разделов отчёта по выборке студентов меньше их числа"""
+        students = self.rng.integers(0, 2_000, 20_000)
+        df = pd.DataFrame(
+            {
+                "student_id": students,
+                "activity_type": "quiz",
+                "timestamp": pd.Timestamp("2024-01-15"),
+                # Средний балл растёт с номером студента
+                "score": (40 + students % 60).astype("float64"),
+            }
+        )
+        df["hour"] = df["timestamp"].dt.hour
+        df["day_of_week"] = df["timestamp"].dt.day_name()
+
+        left, right = SketchAggregator(200), SketchAggregator(200)
+        left.update(df.iloc[:7_000])
+        right.update(df.iloc[7_000:])
+        aggregator = left.merge(right)
+        results = LearningAnalyzer.from_aggregates(
+            aggregator.aggregates()
+        ).analyze_all()
+        exact = LearningAnalyzer(df).analyze_all()
+
+        self.assertEqual(set(results), set(exact))
+        performance = results["student_performance"]
+        self.assertEqual(set(performance), set(exact["student_performance"]))
+        sample = aggregator.approximation()["student_performance"]
+        self.assertEqual(sample, {"sampled_students": 200, "exact": False})
+
+        # Суммы студентов выборки точные, несмотря на слияние частей
+        counts = df["student_id"].value_counts()
+        for student, row in performance["top_students"].items():
+            self.assertEqual(row["activity_count"], counts[student])
+        distribution = performance["performance_distribution"]
+        want = exact["student_performance"]["performance_distribution"]
+        for level, count in want.items():
+            self.assertLess(abs(distribution[level] - count), 0.15 * len(counts))
+
+
+if __name__ == "__main__":
+    unittest.main()
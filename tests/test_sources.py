@@ -0,0 +1,116 @@
+"""
+Тесты чтения нескольких и сжатых файлов логов
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import sources
+from src.cache import ParsedLogCache
+from src.parser import LogParser
+from src.sources import MultiFileParser, expand_inputs, ingest_files
+
+HEADER = "student_id,activity_type,timestamp,score,course_id\n"
+DAYS = {
+    "2024-01-15": [
+        "1,login,2024-01-15 09:30:00,85,CS101\n",
+        "2,quiz,2024-01-15 10:00:00,70,MATH201\n",
+    ],
+    "2024-01-16": [
+        "1,quiz,2024-01-16 11:00:00,90,CS101\n",
+        "3,forum,2024-01-16 14:20:00,,CS101\n",
+    ],
+    "2024-01-17": ["2,assignment,2024-01-17 12:00:00,60,MATH201\n"],
+}
+
+
+class TestSources(unittest.TestCase):
+    def setUp(self):
+        """Каталог с ежедневными .csv.gz и тот же лог одним файлом"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.daily = os.path.join(self.tmpdir, "daily")
+        os.makedirs(self.daily)
+        for day in DAYS:
+            self._write_day(day)
+        with open(os.path.join(self.daily, "README.txt"), "w") as f:
+            f.write("не лог")
+
+        self.single = os.path.join(self.tmpdir, "all.csv")
+        with open(self.single, "w") as f:
+            f.write(HEADER)
+            for lines in DAYS.values():
+                f.writelines(lines)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_day(self, day):
+        with gzip.open(os.path.join(self.daily, f"{day}.csv.gz"), "wt") as f:
+            f.write(HEADER)
+            f.writelines(DAYS[day])
+
+    def test_expand_inputs(self):
+        """Тест раскрытия каталога и шаблона"""
+        paths = expand_inputs(self.daily)
+        self.assertEqual(
+            [os.path.basename(p) for p in paths],
+            ["2024-01-15.csv.gz", "2024-01-16.csv.gz", "2024-01-17.csv.gz"],
+        )
+        self.assertEqual(
+            expand_inputs(os.path.join(self.daily, "*-16.csv.gz")),
+            [os.path.join(self.daily, "2024-01-16.csv.gz")],
+        )
+        self.assertEqual(expand_inputs(self.single), [self.single])
+
+    def test_parse_frame_matches_single_file(self):
+        """Тест: набор сжатых файлов даёт тот же типизированный DataFrame"""
+        expected = LogParser(self.single).parse_frame()
+        parser = MultiFileParser(expand_inputs(self.daily), workers=2)
+        df = parser.parse_frame()
+
+        self.assertTrue(df.equals(expected))
+        self.assertEqual(len(parser.file_stats), 3)
+        self.assertEqual([s["rows"] for s in parser.file_stats], [2, 2, 1])
+
+    def test_parse_frame_uses_cache_per_file(self):
+        """Тест: уже разобранные файлы загружаются из кэша"""
+        cache = ParsedLogCache(os.path.join(self.tmpdir, "cache"))
+        MultiFileParser(expand_inputs(self.daily), cache=cache, workers=1).parse_frame()
+
+        # Файл изменён: тот же день с дополнительной строкой
+        DAYS["2024-01-17"].append("3,quiz,2024-01-17 13:00:00,75,CS101\n")
+        self.addCleanup(DAYS["2024-01-17"].pop)
+        self._write_day("2024-01-17")
+        parser = MultiFileParser(expand_inputs(self.daily), cache=cache, workers=1)
+        # В пул (здесь — последовательный) уходят только промахи кэша
+        with mock.patch("src.sources._parse_file", wraps=sources._parse_file) as job:
+            df = parser.parse_frame()
+        self.assertEqual(
+            [os.path.basename(call.args[0][0]) for call in job.call_args_list],
+            ["2024-01-17.csv.gz"],
+        )
+        self.assertEqual([s["cached"] for s in parser.file_stats], [True, True, False])
+        self.assertEqual(df["timestamp"].dt.day.tolist(), [15, 15, 16, 16, 17, 17])
+
+    def test_ingest_skips_processed_files(self):
+        """Тест инкрементальной обработки только новых файлов"""
+        state = os.path.join(self.tmpdir, "state.json")
+        os.remove(os.path.join(self.daily, "2024-01-17.csv.gz"))
+        parser = MultiFileParser(expand_inputs(self.daily), workers=1)
+        _, new_rows = ingest_files(parser, state, 10)
+        self.assertEqual(new_rows, 4)
+
+        self._write_day("2024-01-17")
+        parser = MultiFileParser(expand_inputs(self.daily), workers=1)
+        aggregator, new_rows = ingest_files(parser, state, 10)
+        self.assertEqual(new_rows, 1)
+        self.assertEqual(aggregator.rows, 5)
+        self.assertEqual([s["path"] for s in parser.file_stats], parser.paths[2:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Тесты потоковой агрегации
+"""
+
+import os
+import unittest
+from src.analyzer import LearningAnalyzer
+from src.parser import LogParser
+from src.streaming import StreamingAggregator, ingest_incremental
+
+
+class TestStreamingAggregator(unittest.TestCase):
+    def setUp(self):
+        """Создание тестовых данных"""
+        csv_data = """student_id,activity_type,timestamp,score,duration_minutes
+1,login,2024-01-15 09:30:00,85,5
+1,assignment,2024-01-15 10:00:00,70,45
+2,login,2024-01-15 09:45:00,78,5
+2,forum,2024-01-16 14:20:00,,20
+3,quiz,2024-01-17 11:15:00,92,30
+3,assignment,2024-01-18 10:10:00,64,40
+4,quiz,2024-01-20 19:05:00,55,25"""
+
+        with open("test_stream.csv", "w") as f:
+            f.write(csv_data)
+
+        self.parser = LogParser("test_stream.csv")
+        self.expected = LearningAnalyzer(self.parser.parse_frame()).analyze_all()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        for path in ("test_stream.csv", "test_append.csv", "test_state.json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _streaming_results(self, chunk_size):
+        aggregator = StreamingAggregator().consume(self.parser.iter_chunks(chunk_size))
+        return LearningAnalyzer.from_aggregates(aggregator.aggregates()).analyze_all()
+
+    def test_same_results_as_in_memory(self):
+        """Тест совпадения с анализом в памяти при разных размерах частей"""
+        for chunk_size in (1, 3, 100):
+            results = self._streaming_results(chunk_size)
+
+            self.assertEqual(results["basic_stats"]["total_activities"], 7)
+            self.assertEqual(results["basic_stats"]["total_students"], 4)
+            self.assertEqual(
+                results["basic_stats"]["date_range"],
+                self.expected["basic_stats"]["date_range"],
+            )
+            self.assertEqual(results["time_patterns"], self.expected["time_patterns"])
+            # Рекомендациям по цепочкам и группам нужен порядок событий,
+            # которого нет в потоковых агрегатах
+            expected = [
+                rec
+                for rec in self.expected["recommendations"]
+                if rec["type"] not in ("path", "cluster")
+            ]
+            self.assertEqual(results["recommendations"], expected)
+            self.assertAlmostEqual(
+                results["basic_stats"]["score_stats"]["std"],
+                self.expected["basic_stats"]["score_stats"]["std"],
+            )
+
+    def test_student_and_activity_tables(self):
+        """Тест агрегатов по студентам и активностям"""
+        results = self._streaming_results(2)
+        performance = results["student_performance"]
+        expected = self.expected["student_performance"]
+
+        self.assertEqual(performance["top_students"], expected["top_students"])
+        self.assertEqual(
+            performance["performance_distribution"],
+            expected["performance_distribution"],
+        )
+        self.assertAlmostEqual(
+            performance["correlation_activity_score"],
+            expected["correlation_activity_score"],
+        )
+
+        for got, want in zip(
+            results["activity_effectiveness"], self.expected["activity_effectiveness"]
+        ):
+            self.assertEqual(got["activity_type"], want["activity_type"])
+            self.assertEqual(got["count"], want["count"])
+            if want["count"] > 1:
+                self.assertAlmostEqual(got["std_score"], want["std_score"])
+
+    def test_incremental_append(self):
+        """Тест дочитывания дописанных строк с сохранённым состоянием"""
+        with open("test_stream.csv") as f:
+            lines = f.readlines()
+        with open("test_append.csv", "w") as f:
+            f.writelines(lines[:4])
+
+        parser = LogParser("test_append.csv")
+        _, new_rows = ingest_incremental(parser, "test_state.json", 2)
+        self.assertEqual(new_rows, 3)
+
+        # Последняя строка дописана не до конца: она ждёт следующего запуска
+        with open("test_append.csv", "a") as f:
+            f.writelines(lines[4:7] + [lines[7][:10]])
+        _, new_rows = ingest_incremental(parser, "test_state.json", 2)
+        self.assertEqual(new_rows, 3)
+
+        with open("test_append.csv", "a") as f:
+            f.write(lines[7][10:] + "\n")
+        aggregator, new_rows = ingest_incremental(parser, "test_state.json", 2)
+        self.assertEqual(new_rows, 1)
+
+        results = LearningAnalyzer.from_aggregates(
+            aggregator.aggregates()
+        ).analyze_all()
+        self.assertEqual(
+            results["basic_stats"], self._streaming_results(100)["basic_stats"]
+        )
+        self.assertEqual(
+            results["student_performance"]["top_students"],
+            self.expected["student_performance"]["top_students"],
+        )
+
+        _, new_rows = ingest_incremental(parser, "test_state.json", 2)
+        self.assertEqual(new_rows, 0)
+
+    def test_incremental_rebuilds_on_rewrite(self):
+        """Тест полного пересчёта, если файл был перезаписан"""
+        parser = LogParser("test_stream.csv")
+        ingest_incremental(parser, "test_state.json", 3)
+
+        with open("test_stream.csv", "w") as f:
+            f.write("student_id,activity_type,timestamp,score\n")
+            f.write("9,quiz,2024-02-01 10:00:00,50\n")
+        aggregator, new_rows = ingest_incremental(parser, "test_state.json", 3)
+
+        self.assertEqual(new_rows, 1)
+        self.assertEqual(aggregator.rows, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Тесты индекса по студентам
+"""
+
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.student_index import StudentIndex, analyze_student_frame
+from src.writers import dumps
+
+
+class TestStudentIndex(unittest.TestCase):
+    def setUp(self):
+        """Создание тестовых данных"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.df = pd.DataFrame(
+            {
+                "student_id": [2, 1, 2, 3, 1, 2],
+                "activity_type": ["quiz", "login", "login", "quiz", "quiz", "forum"],
+                "timestamp": pd.to_datetime(
+                    [
+                        "2024-01-16 10:00:00",
+                        "2024-01-15 09:30:00",
+                        "2024-01-15 09:45:00",
+                        "2024-01-17 11:15:00",
+                        "2024-01-16 12:00:00",
+                        "2024-01-18 14:20:00",
+                    ]
+                ),
+                "score": [80, 85, 70, 60, None, None],
+            }
+        )
+        self.index = StudentIndex.build(self.df, f"{self.tmpdir}/index")
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_student_rows_sorted_by_time(self):
+        """Тест чтения строк одного студента"""
+        rows = self.index.student_rows(2)
+
+        self.assertEqual(rows["activity_type"].tolist(), ["login", "quiz", "forum"])
+        self.assertTrue(rows["timestamp"].is_monotonic_increasing)
+        self.assertIsNone(self.index.student_rows(42))
+        # Идентификатор из командной строки приходит строкой
+        self.assertEqual(len(self.index.student_rows("2")), 3)
+        self.assertIsNone(self.index.student_rows("S1"))
+
+    def test_analyze_without_index(self):
+        """Тест: отчёт по DataFrame в памяти совпадает с отчётом индекса"""
+        # Сравнение через JSON: пропуски оценок (NaN) не равны сами себе
+        self.assertEqual(
+            dumps(analyze_student_frame(self.df, "2")),
+            dumps(self.index.analyze_student(2)),
+        )
+        self.assertIsNone(analyze_student_frame(self.df, 42))
+
+    def test_analyze_student(self):
+        """Тест анализа пути студента и сравнения с когортой"""
+        report = StudentIndex(self.index.path).analyze_student(2)
+
+        self.assertEqual(len(report["activity_sequence"]), 3)
+        self.assertEqual(
+            [point["running_avg"] for point in report["score_trajectory"]],
+            [70.0, 75.0],
+        )
+        comparison = report["comparison"]
+        self.assertEqual(comparison["activity_count"], 3)
+        self.assertEqual(comparison["cohort_avg_activities"], 2.0)
+        self.assertEqual(comparison["avg_score"], 75.0)
+        self.assertAlmostEqual(comparison["score_percentile"], 200 / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Тесты динамики по времени и когорт
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.analyzer import LearningAnalyzer
+from src.streaming import StreamingAggregator
+from src.trends import cohort_table, daily_table, rolling_windows
+from src.visualizer import ResultVisualizer
+
+
+def make_logs(days=20, start="2024-01-01"):
+    """Два курса; студент n начинает в день n и занимается через день"""
+    rows = []
+    for student in range(6):
+        for day in range(student, days, 2):
+            rows.append(
+                {
+                    "student_id": student,
+                    "course_id": "math" if student % 2 else "physics",
+                    "activity_type": "quiz" if day % 4 else "forum",
+                    "timestamp": pd.Timestamp(start) + pd.Timedelta(days=day, hours=10),
+                    "score": 50 + day if day % 4 else None,
+                }
+            )
+    df = pd.DataFrame(rows)
+    df["hour"] = df["timestamp"].dt.hour
+    df["day_of_week"] = df["timestamp"].dt.day_name()
+    return df
+
+
+class TestTrends(unittest.TestCase):
+    def setUp(self):
+        self.df = make_logs()
+
+    def test_daily_table(self):
+        """Тест сумм по дням во всех разрезах"""
+        daily = daily_table(self.df)
+
+        day = daily.loc[("all", "all", "2024-01-05")]
+        # 2024-01-05 — день 4: студенты 0, 2, 4
+        self.assertEqual(day["events"], 3)
+        self.assertEqual(day["active_students"], 3)
+        self.assertEqual(day["score_count"], 0)
+        self.assertEqual(daily.loc[("course_id", "math", "2024-01-02"), "events"], 1)
+        self.assertEqual(
+            daily.xs("all", level="dimension")["events"].sum(), len(self.df)
+        )
+
+    def test_incremental_windows(self):
+        """Тест: пересчёт окон с изменившегося дня равен полному расчёту"""
+        old = self.df[self.df["timestamp"] < pd.Timestamp("2024-01-12")]
+        # Новая часть: следующие дни и опоздавшие события нового курса
+        late = old.iloc[-3:].assign(course_id="art")
+        new = pd.concat([self.df.drop(old.index), late])
+
+        daily = daily_table(old, students=False)
+        windows = rolling_windows(daily, 7)
+        daily = daily.add(daily_table(new, students=False), fill_value=0)
+        changed_from = late["timestamp"].min().strftime("%Y-%m-%d")
+        incremental = rolling_windows(
+            daily.sort_index(), 7, previous=windows, changed_from=changed_from
+        )
+
+        full = pd.concat([old, new])
+        expected = rolling_windows(daily_table(full, students=False), 7)
+        pd.testing.assert_frame_equal(incremental, expected, check_like=True)
+
+        last = expected.loc[("all", "all", "2024-01-20")]
+        self.assertEqual(
+            last["events"], (full["timestamp"] >= pd.Timestamp("2024-01-14")).sum()
+        )
+
+    def test_cohort_table(self):
+        """Тест кривых удержания по неделе первого события"""
+        cohorts = cohort_table(self.df)
+
+        # 2024-01-01 — понедельник: студенты 0..5 начинают в первую неделю
+        self.assertEqual(
+            cohorts.index.get_level_values("cohort").unique().tolist(), ["2024-01-01"]
+        )
+        first = cohorts.loc[("2024-01-01", 0)]
+        self.assertEqual(first["cohort_size"], 6)
+        self.assertEqual(first["retention"], 1.0)
+        self.assertEqual(cohorts.loc[("2024-01-01", 2), "active_students"], 6)
+
+    def test_analyzer_and_streaming(self):
+        """Тест отчёта, графиков и совпадения окон у потоковых агрегатов"""
+        analyzer = LearningAnalyzer(self.df)
+        trends = analyzer.analyze_trends()
+        self.assertEqual(trends["window_days"], 7)
+        self.assertEqual(set(trends["daily"]["course_id"]), {"math", "physics"})
+        self.assertIn("2024-01-01", trends["cohorts"])
+        self.assertIn("trends", ResultVisualizer({"trends": trends}).chart_specs())
+        self.assertIn("cohorts", ResultVisualizer({"trends": trends}).chart_specs())
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "state.json")
+            aggregator = StreamingAggregator()
+            aggregator.update(self.df.iloc[:40])
+            aggregator.aggregates()
+            aggregator.save(path, {})
+            aggregator, _ = StreamingAggregator.load(path)
+            aggregator.update(self.df.iloc[40:])
+            streamed = LearningAnalyzer.from_aggregates(
+                aggregator.aggregates()
+            ).analyze_trends()
+        finally:
+            shutil.rmtree(tmpdir)
+
+        for dimension, groups in trends["daily"].items():
+            for value, rows in groups.items():
+                got = streamed["daily"][dimension][value]
+                self.assertEqual(
+                    [(r["date"], r["events_7d"], r["avg_score_7d"]) for r in got],
+                    [(r["date"], r["events_7d"], r["avg_score_7d"]) for r in rows],
+                )
+        self.assertNotIn("cohorts", streamed)
+
+
+if __name__ == "__main__":
+    unittest.main()
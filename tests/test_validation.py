@@ -0,0 +1,216 @@
+"""
+Тесты проверки строк и карантина
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from src import parser as parser_module
+from src.cache import ParsedLogCache
+from src.metrics import MetricsCollector
+from src.parser import LogParser
+from src.sources import MultiFileParser
+from src.streaming import StreamingAggregator
+from src.validation import Quarantine, validate_frame
+
+HEADER = "student_id,activity_type,timestamp,score,duration_minutes\n"
+CLEAN_ROWS = [
+    "1,login,2024-01-15 09:30:00,,5\n",
+    "1,quiz,2024-01-15 10:00:00,85,30\n",
+    "2,forum,2024-01-16 14:20:00,,20\n",
+]
+BAD_ROWS = [
+    ",quiz,2024-01-16 10:00:00,70,10\n",  # пустой student_id
+    "3,quiz,не дата,70,10\n",  # timestamp
+    "3,quiz,2024-01-17 11:15:00,отлично,10\n",  # score не число
+    "4,quiz,2024-01-17 12:00:00,140,-5\n",  # score_range и duration_range
+]
+
+
+class TestValidation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "logs.csv")
+        self.quarantine_path = os.path.join(self.tmpdir, "out", "quarantine.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, rows):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(HEADER + "".join(rows))
+
+    def test_validate_frame(self):
+        """Тест причин отклонения и типов корректных строк"""
+        raw = pd.DataFrame(
+            {
+                "student_id": ["1", None, "3", "4"],
+                "activity_type": ["quiz", "quiz", None, "quiz"],
+                "timestamp": [
+                    "2024-01-15 09:30:00",
+                    "2024-01-15 10:00:00",
+                    "2024-01-15 11:00:00",
+                    "2024-01-16",  # другой формат разбирается повторно
+                ],
+                "score": [80.0, 50.0, 60.0, 101.0],
+            }
+        )
+        valid, rejected = validate_frame(raw)
+
+        self.assertEqual(valid["student_id"].tolist(), [1])
+        self.assertEqual(valid["student_id"].dtype, "int64")
+        self.assertEqual(valid["score"].dtype, "Float64")
+        self.assertEqual(
+            rejected["reason"].tolist(), ["student_id", "activity_type", "score_range"]
+        )
+        self.assertEqual(rejected["student_id"].tolist()[1:], ["3", "4"])
+
+    def test_string_ids(self):
+        """Тест буквенно-цифровых student_id, в том числе после целых частей"""
+        self.write(CLEAN_ROWS * 2 + ["S1,quiz,2024-01-18 10:00:00,90,5\n"])
+        quarantine = Quarantine()
+        parser = LogParser(self.path, quarantine=quarantine)
+
+        df = parser.parse_frame()
+        self.assertEqual(quarantine.rejected, 0)
+        self.assertEqual(df["student_id"].tolist(), ["1", "1", "2"] * 2 + ["S1"])
+
+        chunks = list(parser.iter_chunks(3))
+        self.assertEqual(chunks[0]["student_id"].dtype, "int64")
+        aggregator = StreamingAggregator()
+        for chunk in chunks:
+            aggregator.update(chunk)
+        table = aggregator.aggregates()["students"]
+        self.assertEqual(table.index.tolist(), ["1", "2", "S1"])
+        self.assertEqual(table["activity_count"].tolist(), [4, 2, 1])
+
+    def test_quarantine_rows(self):
+        """Тест: плохие строки не прерывают разбор и попадают в карантин"""
+        self.write(CLEAN_ROWS[:2] + BAD_ROWS + CLEAN_ROWS[2:])
+        quarantine = Quarantine(self.quarantine_path)
+        df = LogParser(self.path, quarantine=quarantine).parse_frame()
+
+        self.assertEqual(df["student_id"].tolist(), [1, 1, 2])
+        self.assertEqual(df["duration_minutes"].dtype, "float32")
+        self.assertEqual(quarantine.rows, 7)
+        self.assertEqual(quarantine.rejected, 4)
+
+        saved = pd.read_csv(self.quarantine_path)
+        self.assertEqual(saved["row"].tolist(), [2, 3, 4, 5])
+        self.assertEqual(
+            saved["reason"].tolist(),
+            ["student_id", "timestamp", "score", "score_range;duration_range"],
+        )
+        self.assertEqual(saved["source"].unique().tolist(), [self.path])
+
+        metrics = MetricsCollector()
+        metrics.enable()
+        with mock.patch("src.validation.collector", metrics):
+            quarantine.report()
+        summary = metrics.values["validation"]
+        self.assertAlmostEqual(summary["error_rate"], 4 / 7)
+        self.assertEqual(summary["reasons"]["score_range"], 1)
+
+    def test_bad_lines(self):
+        """Тест строк с неверным числом полей при полном и потоковом чтении"""
+        rows = CLEAN_ROWS[:2] + ["2,quiz,2024-01-16 10:00:00,80,5,лишнее\n"]
+        self.write(rows + CLEAN_ROWS[2:] * 3)
+
+        quarantine = Quarantine(keep=True)
+        df = LogParser(self.path, quarantine=quarantine).parse_frame()
+        self.assertEqual(len(df), 5)
+        self.assertEqual(dict(quarantine.reasons), {"bad_line": 1})
+        self.assertIn("лишнее", quarantine.frames[0]["raw_line"].iloc[0])
+        self.assertEqual(quarantine.frames[0]["row"].tolist(), [2])
+
+        quarantine = Quarantine()
+        parser = LogParser(self.path, quarantine=quarantine)
+        chunks = list(parser.iter_chunks(4))
+        self.assertEqual(
+            pd.concat(chunks)["activity_type"].astype(str).tolist(),
+            ["login", "quiz", "forum", "forum", "forum"],
+        )
+        self.assertEqual(quarantine.rejected, 1)
+
+    def test_bad_lines_at_chunk_start(self):
+        """Тест: лишние поля в первой строке данных и в начале части
+        отклоняются одинаково при полном и потоковом чтении"""
+        extra = "2,quiz,2024-01-16 10:00:00,80,5,лишнее{}\n"
+        rows = [extra.format(0), CLEAN_ROWS[0], extra.format(2)]
+        # Запятая и перевод строки в кавычках не считаются разделителями
+        quoted = '1,"quiz,\nчасть 2",2024-01-15 10:00:00,85,30\n'
+        rows += CLEAN_ROWS[1:] + [quoted] + CLEAN_ROWS[2:]
+        rows += [extra.format(7), CLEAN_ROWS[0]]
+        self.write(rows)
+
+        def rejected(read):
+            quarantine = Quarantine(keep=True)
+            df = read(LogParser(self.path, quarantine=quarantine))
+            frame = pd.concat(quarantine.frames)
+            self.assertEqual(len(df), 6)
+            self.assertEqual(dict(quarantine.reasons), {"bad_line": 3})
+            return frame["row"].tolist(), frame["raw_line"].str[-7:].tolist()
+
+        expected = ([0, 2, 7], ["лишнее0", "лишнее2", "лишнее7"])
+        self.assertEqual(rejected(LogParser.parse_frame), expected)
+        self.assertEqual(rejected(lambda p: pd.concat(p.iter_chunks(2))), expected)
+
+        # Строки меток до места ошибки C-движка не сдвигают raw_line
+        # следующих отклонённых строк
+        rows = CLEAN_ROWS[:2] + [extra.format(2)] + CLEAN_ROWS[:2]
+        # После пропущенной строки C-движок ошибается только на 7 полях
+        self.write(rows + [extra.format("5,лишнее5"), CLEAN_ROWS[2]])
+        with mock.patch.object(parser_module._FieldCounter, "_scan"):
+            quarantine = Quarantine(keep=True)
+            parser = LogParser(self.path, quarantine=quarantine)
+            list(parser.iter_chunks(2))
+        frame = pd.concat(quarantine.frames)
+        self.assertEqual(frame["row"].tolist(), [5])
+        self.assertEqual(frame["raw_line"].str[-7:].tolist(), ["лишнее5"])
+
+    def test_cache_hit(self):
+        """Тест: загрузка из кэша сохраняет карантин и счётчики"""
+        self.write(CLEAN_ROWS + BAD_ROWS[:2])
+        cache = ParsedLogCache(os.path.join(self.tmpdir, "cache"))
+        for from_cache in (False, True):
+            quarantine = Quarantine(self.quarantine_path)
+            parser = LogParser(self.path, cache=cache, quarantine=quarantine)
+            parser.parse_frame()
+            quarantine.report()
+            self.assertEqual(parser.from_cache, from_cache)
+            self.assertEqual((quarantine.rows, quarantine.rejected), (5, 2))
+            self.assertEqual(
+                dict(quarantine.reasons), {"student_id": 1, "timestamp": 1}
+            )
+            saved = pd.read_csv(self.quarantine_path)
+            self.assertEqual(saved["row"].tolist(), [3, 4])
+
+    def test_files_in_pool(self):
+        """Тест сбора отклонённых строк из процессов пула"""
+        self.write(CLEAN_ROWS + BAD_ROWS[:1])
+        other = os.path.join(self.tmpdir, "more.csv")
+        shutil.copy(self.path, other)
+
+        quarantine = Quarantine(self.quarantine_path)
+        parser = MultiFileParser([self.path, other], workers=2, quarantine=quarantine)
+        df = parser.parse_frame()
+
+        self.assertEqual(len(df), 6)
+        self.assertEqual(quarantine.rejected, 2)
+        self.assertEqual([s["rejected"] for s in parser.file_stats], [1, 1])
+        saved = pd.read_csv(self.quarantine_path)
+        self.assertEqual(sorted(saved["source"]), sorted([self.path, other]))
+
+        # Запуск без ошибок удаляет карантин прошлого запуска
+        self.write(CLEAN_ROWS)
+        quarantine = Quarantine(self.quarantine_path)
+        LogParser(self.path, quarantine=quarantine).parse_frame()
+        quarantine.report()
+        self.assertFalse(os.path.exists(self.quarantine_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
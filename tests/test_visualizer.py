@@ -0,0 +1,63 @@
+"""
+Тесты визуализации
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from src.visualizer import ResultVisualizer, render_reports
+
+
+class TestResultVisualizer(unittest.TestCase):
+    def setUp(self):
+        """Создание тестовых результатов"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.results = {
+            "student_performance": {
+                "performance_distribution": {"высокий": 2, "средний": 1, "низкий": 0}
+            },
+            "activity_effectiveness": [
+                {"activity_type": "quiz", "avg_score": 90.0, "count": 3},
+                {"activity_type": "forum", "avg_score": float("nan"), "count": 0},
+            ],
+            "time_patterns": {
+                "peak_hours": {"hours": [9, 10], "counts": [3, 2]},
+                "weekday_distribution": {"Monday": 3, "Tuesday": 2},
+            },
+        }
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_unchanged_plots_skipped(self):
+        """Тест пропуска графиков с неизменными данными"""
+        reports = {self.tmpdir: self.results}
+
+        self.assertEqual(render_reports(reports), 3)
+        self.assertTrue(os.path.exists(f"{self.tmpdir}/time_patterns.png"))
+        self.assertEqual(render_reports(reports), 0)
+
+        self.results["time_patterns"]["weekday_distribution"]["Monday"] = 4
+        self.assertEqual(render_reports(reports), 1)
+
+    def test_json_specs(self):
+        """Тест описаний графиков без растеризации"""
+        ResultVisualizer(self.results, fmt="svg").create_plots(self.tmpdir)
+        render_reports({self.tmpdir: self.results}, fmt="json")
+
+        self.assertTrue(os.path.exists(f"{self.tmpdir}/score_distribution.svg"))
+        with open(f"{self.tmpdir}/activity_effectiveness.json") as f:
+            spec = json.load(f)
+        self.assertEqual(spec["panels"][0]["y"], [90.0, None])
+
+    def test_unknown_format(self):
+        """Тест ошибки для неизвестного формата"""
+        with self.assertRaises(ValueError):
+            ResultVisualizer(self.results, fmt="gif")
+
+
+if __name__ == "__main__":
+    unittest.main()
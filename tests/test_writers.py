@@ -0,0 +1,120 @@
+"""
+Тесты записи результатов
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src import writers
+from src.analyzer import LearningAnalyzer
+from src.writers import dumps, read_columnar, write_json, write_tables
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.df = pd.DataFrame(
+            {
+                "student_id": [1, 1, 1, 2, 2],
+                "activity_type": ["login", "quiz", "assignment", "login", "quiz"],
+                "timestamp": pd.to_datetime(
+                    [
+                        "2024-01-15 09:00",
+                        "2024-01-15 09:10",
+                        "2024-01-16 10:00",
+                        "2024-01-15 11:00",
+                        "2024-01-15 11:05",
+                    ]
+                ),
+                "score": [None, 80.0, 90.0, None, 60.0],
+            }
+        )
+        self.df["hour"] = self.df["timestamp"].dt.hour
+        self.df["day_of_week"] = self.df["timestamp"].dt.day_name()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_dumps(self):
+        """Тест numpy-чисел, дат, пропусков и нестроковых ключей, с orjson и без"""
+        value = {
+            "count": np.int64(3),
+            "avg": np.float32(0.5),
+            "values": np.arange(3),
+            "at": pd.Timestamp("2024-01-15 09:30"),
+            "hours": {9: 2},
+            "ids": {np.int64(7): {np.float32(0.5): 1}},
+            "missing": [float("nan"), np.float32("nan"), np.array([np.inf, 1.0])],
+        }
+        expected = {
+            "count": 3,
+            "avg": 0.5,
+            "values": [0, 1, 2],
+            "at": "2024-01-15T09:30:00",
+            "hours": {"9": 2},
+            "ids": {"7": {"0.5": 1}},
+            "missing": [None, None, [None, 1.0]],
+        }
+        for backend in {writers.orjson, None}:
+            with mock.patch.object(writers, "orjson", backend):
+                encoded = dumps(value)
+                self.assertEqual(json.loads(encoded), expected)
+                self.assertNotIn(b"\n", encoded)
+
+        path = os.path.join(self.tmpdir, "out", "results.json")
+        write_json(value, path)
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), expected)
+
+    def test_ndjson_tables(self):
+        """Тест выгрузки таблиц анализатора в NDJSON частями"""
+        analyzer = LearningAnalyzer(self.df)
+        with mock.patch.object(writers, "BATCH_ROWS", 2):
+            paths = write_tables(analyzer.export_tables(), self.tmpdir, "ndjson")
+
+        self.assertEqual(
+            list(paths),
+            [
+                "students",
+                "activities",
+                "transitions",
+                "paths",
+                "sessions",
+                "trends",
+                "cohorts",
+            ],
+        )
+        with open(paths["sessions"], encoding="utf-8") as f:
+            sessions = [json.loads(line) for line in f]
+        self.assertEqual([s["student_id"] for s in sessions], [1, 1, 2])
+        self.assertEqual([s["events"] for s in sessions], [2, 1, 2])
+
+        with open(paths["students"], encoding="utf-8") as f:
+            students = [json.loads(line) for line in f]
+        self.assertEqual(
+            students[0], {"student_id": 1, "avg_score": 85.0, "activity_count": 3}
+        )
+
+    def test_columnar_tables(self):
+        """Тест колоночной выгрузки и обратного чтения"""
+        analyzer = LearningAnalyzer(self.df)
+        expected = dict(analyzer.export_tables())
+        paths = write_tables(analyzer.export_tables(), self.tmpdir, "columnar")
+
+        for name, frame in expected.items():
+            restored = read_columnar(paths[name])
+            pd.testing.assert_frame_equal(
+                restored, frame, check_dtype=False, check_categorical=False
+            )
+
+        with self.assertRaises(ValueError):
+            write_tables([], self.tmpdir, "xml")
+
+
+if __name__ == "__main__":
+    unittest.main()